@@ -3,7 +3,7 @@
 import argparse
 import json
 
-from gopro_overlay.ffmpeg import load_gpmd_from
+from gopro_overlay.ffmpeg import gpmd_packets_from
 from gopro_overlay.gpmd import GoproMeta, interpret_item
 
 
@@ -91,8 +91,7 @@ class DumpAggregateConverter:
 
 
 def dump(input_file, fourcc, output_file):
-    gpmd_from = load_gpmd_from(input_file)
-    meta = GoproMeta.parse(gpmd_from)
+    meta = GoproMeta.stream(lambda: gpmd_packets_from(input_file))
 
     with open(output_file, 'wt', encoding='utf-8') as file:
         converter = DumpAggregateConverter(file)
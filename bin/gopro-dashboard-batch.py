@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+from importlib import metadata
+
+from gopro_overlay.arguments import gopro_dashboard_batch_arguments
+from gopro_overlay.batch import batch_inputs, clip_arguments, render_batch, ClipResult
+from gopro_overlay.dashboard import DashboardResources, render_dashboard, check_ffmpeg, terminal_progress, no_progress
+from gopro_overlay.log import log, fatal
+from gopro_overlay.timing import PoorTimer
+
+if __name__ == "__main__":
+
+    args = gopro_dashboard_batch_arguments()
+
+    clips = batch_inputs(args.inputs, related=args.related)
+
+    if not clips:
+        fatal("Didn't find any clips to render")
+
+    outputs = [clip_arguments(args, clip).output for clip in clips]
+    if len(set(outputs)) != len(outputs):
+        fatal("Some clips have the same name, so would have the same output file")
+
+    for clip, output in zip(clips, outputs):
+        if output.absolute() == clip.absolute():
+            fatal(f"Output for {clip} would overwrite it - use a different --output-dir")
+
+    check_ffmpeg()
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    version = metadata.version("gopro_overlay")
+    log(f"Starting gopro-dashboard-batch version {version} - {len(clips)} clips, {args.concurrency} at a time")
+
+    resources = DashboardResources(args, version=version)
+
+    def render(clip, timers):
+        log(f"Starting {clip}")
+        # clips rendered at the same time are on threads, so don't fork
+        render_dashboard(clip_arguments(args, clip), resources, timers=timers,
+                         create_progress=terminal_progress if args.concurrency == 1 else no_progress,
+                         processes=None if args.concurrency == 1 else 1)
+
+    def done(result: ClipResult):
+        if result.ok:
+            log(f"Finished {result.clip} in {result.seconds:.1f}s")
+        else:
+            log(f"Failed {result.clip}\n{result.failure}")
+
+    with PoorTimer("batch").timing(), resources.open():
+        batch = render_batch(clips, render, concurrency=args.concurrency, done=done)
+
+    log("\n\n*** Batch Timings ***")
+    for result in batch.clips:
+        log(f"{'OK' if result.ok else 'FAILED':6} {result.seconds:10.1f}s {result.clip}")
+    log("Totals, for all clips:")
+    for timer in batch.timers:
+        log(timer)
+    log("***\n\n")
+
+    if batch.failed:
+        fatal(f"{len(batch.failed)} of {len(clips)} clips failed")
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import argparse
+import pathlib
+import sys
+
+from gopro_overlay.log import log
+from gopro_overlay.server import submit, default_socket_location
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Send a render job to gopro-dashboard-server. Arguments after -- are as for gopro-dashboard",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument("--socket", type=pathlib.Path, default=default_socket_location,
+                        help="Unix socket the server is listening on")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="gopro-dashboard arguments")
+
+    args = parser.parse_args()
+
+    job_args = args.args[1:] if args.args[:1] == ["--"] else args.args
+
+    def on_event(event):
+        kind = event["event"]
+        if kind == "log":
+            log(event["message"])
+        elif kind == "progress":
+            log(f"Render: {event['frame']:,} of {event['frames']:,}")
+        elif kind in ("accepted", "started"):
+            log(f"Job {event['job']} {kind}")
+        elif kind == "done" and not event["ok"]:
+            log(event["failure"])
+
+    result = submit(args.socket, job_args, pathlib.Path.cwd(), on_event=on_event)
+
+    sys.exit(0 if result["ok"] else 1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import pathlib
+import threading
+from importlib import metadata
+
+from gopro_overlay.arguments import gopro_dashboard_arguments, relative_to
+from gopro_overlay.dashboard import SharedResources, render_dashboard, check_ffmpeg
+from gopro_overlay.log import log
+from gopro_overlay.server import RenderServer, default_socket_location
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render gopro-dashboard jobs sent over a local socket, keeping fonts, map tiles, ... loaded between them",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument("--socket", type=pathlib.Path, default=default_socket_location,
+                        help="Unix socket to listen on")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of jobs to render at the same time")
+
+    server_args = parser.parse_args()
+
+    if server_args.concurrency < 1:
+        parser.error("--concurrency needs to be at least 1")
+
+    check_ffmpeg()
+
+    version = metadata.version("gopro_overlay")
+
+    # argparse reports problems on stderr, which is shared by all jobs
+    parsing = threading.Lock()
+
+    def job_arguments(argv, cwd):
+        with parsing, contextlib.redirect_stderr(io.StringIO()) as errors:
+            try:
+                args = gopro_dashboard_arguments(argv)
+            except SystemExit:
+                raise IOError(f"Invalid arguments\n{errors.getvalue()}") from None
+
+        if args.workers > 1 or args.segments > 1 or args.resumable:
+            raise IOError("--workers, --segments and --resumable are not supported by the server, use gopro-dashboard")
+
+        return relative_to(args, cwd)
+
+    with SharedResources(version=version) as shared:
+
+        def render(argv, cwd, timers, create_progress):
+            args = job_arguments(argv, cwd)
+            # jobs are rendered on threads, alongside the server's, so don't fork
+            render_dashboard(args, shared.resources_for(args), timers=timers, create_progress=create_progress,
+                             processes=1)
+
+        server_args.socket.parent.mkdir(parents=True, exist_ok=True)
+
+        with RenderServer(server_args.socket, render, concurrency=server_args.concurrency) as server:
+            log(f"gopro-dashboard-server version {version} listening on {server_args.socket}, "
+                f"{server_args.concurrency} jobs at a time")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                log("...Stopping...")
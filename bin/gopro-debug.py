@@ -3,7 +3,7 @@
 import argparse
 import pathlib
 
-from gopro_overlay.ffmpeg import find_streams, load_gpmd_from
+from gopro_overlay.ffmpeg import find_streams, gpmd_packets_from
 from gopro_overlay.gpmd import GoproMeta
 from gopro_overlay.gpmd_visitors_debug import DebuggingVisitor
 from gopro_overlay.log import log
@@ -24,4 +24,4 @@ if __name__ == "__main__":
 
     log(f"Stream Info: {stream_info}")
 
-    GoproMeta.parse(load_gpmd_from(source)).accept(DebuggingVisitor())
+    GoproMeta.stream(lambda: gpmd_packets_from(source)).accept(DebuggingVisitor())
@@ -3,7 +3,7 @@
 import argparse
 import pathlib
 
-from gopro_overlay.ffmpeg import load_gpmd_from
+from gopro_overlay.ffmpeg import gpmd_packets_from
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract GoPro metadata to data file")
@@ -17,4 +17,5 @@ if __name__ == "__main__":
     source: pathlib.Path = args.input
 
     with dest.open("wb") as output:
-        output.write(load_gpmd_from(source))
+        for packet in gpmd_packets_from(source):
+            output.write(packet)
@@ -4,7 +4,7 @@ import argparse
 import os.path
 import pathlib
 
-from gopro_overlay.ffmpeg import join_files
+from gopro_overlay.ffmpeg import join_files, probe_cache
 from gopro_overlay.filenaming import GoProFile
 from gopro_overlay.log import log
 
@@ -13,9 +13,14 @@ if __name__ == "__main__":
 
     parser.add_argument("input", type=pathlib.Path, help="A single MP4 file from the sequence")
     parser.add_argument("output", type=pathlib.Path, help="Output MP4 file")
+    parser.add_argument("--cache-dir", type=pathlib.Path, default=pathlib.Path.home() / ".gopro-graphics",
+                        help="Location of caches (ffprobe results, ...)")
 
     args = parser.parse_args()
 
+    args.cache_dir.mkdir(exist_ok=True)
+    probe_cache.persist_to(args.cache_dir / "ffprobe-cache.jsonl")
+
     source: pathlib.Path = args.input
 
     if not source.exists():
@@ -24,6 +24,7 @@ from gopro_overlay.layout import Overlay
 from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout
 from gopro_overlay.log import log
 from gopro_overlay.privacy import NoPrivacyZone
+from gopro_overlay.telemetry_cache import TelemetryCache
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
 
@@ -80,7 +81,7 @@ if __name__ == "__main__":
 
         dimensions = stream_info.video.dimension
         try:
-            timeseries = framemeta_from(inputpath, metameta=stream_info.meta, units=units)
+            timeseries = framemeta_from(inputpath, metameta=stream_info.meta, units=units, cache=TelemetryCache(cache_dir))
 
             video_frame = load_frame(inputpath, stream_info.video.dimension, timeseries.mid)
 
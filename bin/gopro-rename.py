@@ -21,9 +21,14 @@ if __name__ == "__main__":
     parser.add_argument("--geo", action="store_true", help="[EXPERIMENTAL] Use Geocode.xyz to add description for you (city-state) - see https://geocode.xyz/pricing for terms")
     parser.add_argument("-y", "--yes", action="store_true", help="Rename the files, don't just print what would be done")
     parser.add_argument("--dirs", action="store_true", help="Allow directory")
+    parser.add_argument("--cache-dir", type=pathlib.Path, default=pathlib.Path.home() / ".gopro-graphics",
+                        help="Location of caches (ffprobe results, ...)")
 
     args = parser.parse_args()
 
+    args.cache_dir.mkdir(exist_ok=True)
+    ffmpeg.probe_cache.persist_to(args.cache_dir / "ffprobe-cache.jsonl")
+
     if not args.yes:
         log("*** DRY RUN - NOT ACTUALLY DOING ANYTHING ***")
 
@@ -43,7 +48,7 @@ if __name__ == "__main__":
     should_rename = not args.touch_only
 
     for file in file_list:
-        meta = GoproMeta.parse(ffmpeg.load_gpmd_from(file))
+        meta = GoproMeta.stream(lambda: ffmpeg.gpmd_packets_from(file))
         found = meta.accept(DetermineFirstLockedGPSUVisitor())
         gps_datetime = found.packet_time
         if gps_datetime is None:
@@ -3,6 +3,7 @@
 import argparse
 import csv
 import datetime
+import os
 import pathlib
 from pathlib import Path
 from typing import Optional
@@ -11,12 +12,14 @@ from gopro_overlay import timeseries_process
 from gopro_overlay.arguments import BBoxArgs
 from gopro_overlay.common import smart_open
 from gopro_overlay.counter import ReasonCounter
-from gopro_overlay.ffmpeg import find_streams
+from gopro_overlay.ffmpeg import find_metameta
 from gopro_overlay.framemeta import framemeta_from
 from gopro_overlay.gpmd import GPSFix, GPS_FIXED_VALUES
 from gopro_overlay.gpmd_visitors_gps import WorstOfGPSLockFilter, GPSLockTracker, GPSReportingFilter, GPSDOPFilter, GPSMaxSpeedFilter, NullGPSLockFilter, GPSBBoxFilter
 from gopro_overlay.gpx import load_timeseries
 from gopro_overlay.log import log, fatal
+from gopro_overlay.sensors import SensorSeries
+from gopro_overlay.telemetry_cache import TelemetryCache
 from gopro_overlay.units import units
 
 if __name__ == "__main__":
@@ -35,6 +38,10 @@ if __name__ == "__main__":
     parser.add_argument("output", type=pathlib.Path, nargs="?", default="-", help="Output CSV file (default stdout)")
 
     parser.add_argument("--gpx", action="store_true", help="Input is a gpx file")
+    parser.add_argument("--sensors", type=pathlib.Path,
+                        help="Also write every ACCL and GYRO sample (200Hz or more) to this CSV file")
+    parser.add_argument("--cache-dir", type=pathlib.Path, default=pathlib.Path.home() / ".gopro-graphics",
+                        help="Location of caches (parsed GoPro metadata, ...)")
 
     args = parser.parse_args()
 
@@ -43,7 +50,11 @@ if __name__ == "__main__":
     if not source.exists():
         fatal(f"{source}: No such file or directory")
 
+    sensors = {name: SensorSeries(name) for name in ["ACCL", "GYRO"]} if args.sensors else None
+
     if args.gpx:
+        if sensors is not None:
+            fatal("--sensors needs a GoPro file, a GPX file doesn't have them")
         ts = load_timeseries(source, units)
     else:
         if args.gps_bbox_lon_lat:
@@ -51,14 +62,15 @@ if __name__ == "__main__":
         else:
             bbox_filter = NullGPSLockFilter()
 
-        stream_info = find_streams(source)
-
         counter = ReasonCounter()
 
         ts = framemeta_from(
             source,
-            metameta=stream_info.meta,
+            metameta=find_metameta(source),
             units=units,
+            cache=TelemetryCache(args.cache_dir),
+            processes=os.cpu_count() or 1,
+            sensors=sensors,
             gps_lock_filter=WorstOfGPSLockFilter(
                 GPSReportingFilter(GPSLockTracker(), rejected=counter.inc("Heuristics")),
                 GPSReportingFilter(bbox_filter, rejected=counter.inc("Outside BBox")),
@@ -120,3 +132,14 @@ if __name__ == "__main__":
                 "accl_y": printable_unit(entry.accl.y) if entry.accl else None,
                 "accl_z": printable_unit(entry.accl.z) if entry.accl else None
             })
+
+    if sensors is not None:
+        with smart_open(args.sensors) as f:
+            writer = csv.writer(f)
+            writer.writerow(["sensor", "time", "x", "y", "z", "unit"])
+            for series in sensors.values():
+                for index in range(len(series)):
+                    writer.writerow([
+                        series.name, series.time[index] / 1_000_000,
+                        series.x[index], series.y[index], series.z[index], series.unit
+                    ])
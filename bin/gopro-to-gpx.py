@@ -2,6 +2,7 @@
 
 import argparse
 import datetime
+import os
 import pathlib
 from pathlib import Path
 from typing import Optional
@@ -15,6 +16,7 @@ from gopro_overlay.framemeta_gpx import framemeta_to_gpx
 from gopro_overlay.gpmd import GPS_FIXED_VALUES
 from gopro_overlay.gpmd_visitors_gps import WorstOfGPSLockFilter, GPSLockTracker, GPSReportingFilter, GPSDOPFilter, GPSMaxSpeedFilter, GPSBBoxFilter, NullGPSLockFilter
 from gopro_overlay.log import log, fatal
+from gopro_overlay.telemetry_cache import TelemetryCache
 from gopro_overlay.units import units
 
 if __name__ == "__main__":
@@ -31,6 +33,8 @@ if __name__ == "__main__":
 
     parser.add_argument("input", type=pathlib.Path, help="Input MP4 file")
     parser.add_argument("output", type=pathlib.Path, nargs="?", default="-", help="Output GPX file (default stdout)")
+    parser.add_argument("--cache-dir", type=pathlib.Path, default=pathlib.Path.home() / ".gopro-graphics",
+                        help="Location of caches (parsed GoPro metadata, ...)")
 
     args = parser.parse_args()
 
@@ -48,11 +52,12 @@ if __name__ == "__main__":
 
     counter = ReasonCounter()
 
-    stream_info = ffmpeg.find_streams(source)
     fm = framemeta_from(
         source,
-        metameta=stream_info.meta,
+        metameta=ffmpeg.find_metameta(source),
         units=units,
+        cache=TelemetryCache(args.cache_dir),
+        processes=os.cpu_count() or 1,
         gps_lock_filter=WorstOfGPSLockFilter(
             GPSReportingFilter(GPSLockTracker(), rejected=counter.inc("Heuristics")),
             GPSReportingFilter(bbox_filter, rejected=counter.inc("Outside BBox")),
@@ -40,6 +40,70 @@ def gopro_dashboard_arguments(args=None):
     parser.add_argument("output", type=pathlib.Path,
                         help="Output Video File - MP4/MOV/WEBM all supported, see Profiles documentation")
 
+    add_dashboard_options(parser)
+
+    args = parser.parse_args(args)
+
+    check_dashboard_options(parser, args, has_input=args.input is not None)
+
+    return args
+
+
+def gopro_dashboard_batch_arguments(args=None):
+    parser = argparse.ArgumentParser(
+        description="Overlay gadgets on to many GoPro MP4s, sharing fonts, layouts, map tiles... between them",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument("inputs", type=pathlib.Path, nargs="+",
+                        help="Input MP4 files, or directories of GoPro MP4 files")
+    parser.add_argument("--output-dir", type=pathlib.Path, required=True,
+                        help="Directory for output files, each named the same as its input")
+    parser.add_argument("--related", action="store_true",
+                        help="Also render the other chapters of the same recording, for each GoPro input file")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of clips to render at the same time. Clips share one process, so this mostly helps "
+                             "when ffmpeg is the bottleneck")
+
+    add_dashboard_options(parser)
+
+    args = parser.parse_args(args)
+
+    quit = _quitter(parser)
+
+    if args.concurrency < 1:
+        quit("--concurrency needs to be at least 1")
+
+    if args.concurrency > 1 and (args.workers > 1 or args.segments > 1 or args.resumable):
+        quit("--concurrency cannot be combined with --workers, --segments or --resumable")
+
+    check_dashboard_options(parser, args, has_input=True)
+
+    return args
+
+
+def relative_to(args, cwd: pathlib.Path):
+    """for arguments given in some other directory - make relative paths relative to that directory instead"""
+    for name, value in vars(args).items():
+        if isinstance(value, pathlib.Path) and not value.is_absolute():
+            setattr(args, name, cwd / value)
+
+    if args.font and not pathlib.Path(args.font).is_absolute() and (cwd / args.font).exists():
+        args.font = str(cwd / args.font)
+
+    return args
+
+
+def _quitter(parser):
+    def quit(reason):
+        parser.print_help(file=sys.stderr)
+        fatal(f"Invalid arguments: {reason}")
+
+    return quit
+
+
+def add_dashboard_options(parser):
+    """options for how a dashboard is rendered, the same whether rendering one clip or many"""
     parser.add_argument("--font", help="Selects a font", default="Roboto-Medium.ttf")
     parser.add_argument("--gpx", "--fit", type=pathlib.Path,
                         help="Use GPX/FIT file for location / alt / hr / cadence / temp ...")
@@ -54,10 +118,42 @@ def gopro_dashboard_arguments(args=None):
     parser.add_argument("--profile",
                         help="Use ffmpeg options profile <name> from ~/gopro-graphics/ffmpeg-profiles.json")
 
+    parser.add_argument("--overlay-fps", type=float, default=10.0,
+                        help="Frames per second of overlay to draw. The output video keeps its own frame rate")
+    parser.add_argument("--overlay-vfr", action="store_true",
+                        help="Only send overlay frames to ffmpeg when they change, each with its own timestamp")
+
+    parser.add_argument("--overlay-regions", action="store_true",
+                        help="Only send the areas of the overlay that widgets draw on to ffmpeg, found by drawing a sample of frames. "
+                             "If a widget later draws outside those areas, the render stops with an error, rather than cut it off - "
+                             "run again without this option")
+
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes to use for drawing frames. Each needs memory for ~10 frames in flight")
+
+    parser.add_argument("--segments", type=int, default=1,
+                        help="Split the video into this many segments, each drawn and encoded by its own process, "
+                             "then joined. Uses more cores when ffmpeg is the bottleneck. With --resumable, how many segments to render at once")
+
+    parser.add_argument("--resumable", action="store_true",
+                        help="Render in segments of --segment-length, keeping track of them next to the output, so an interrupted "
+                             "render carries on from where it stopped, when run again with the same arguments")
+    parser.add_argument("--segment-length", type=float, default=60.0,
+                        help="Length, in seconds, of segments for --resumable")
+
+    parser.add_argument("--preview", action="store_true",
+                        help="Only draw a frame every --preview-every seconds, into a contact sheet PNG (named like the output), "
+                             "with draw timings, instead of rendering the video")
+    parser.add_argument("--preview-every", type=float, default=60.0,
+                        help="Seconds between frames drawn for --preview")
+
     parser.add_argument("--config-dir", help="Location of config files (api keys, profiles, ...)", type=pathlib.Path,
                         default=default_config_location)
     parser.add_argument("--cache-dir", help="Location of caches (map tiles, ...)", type=pathlib.Path,
                         default=default_config_location)
+    parser.add_argument("--columnar-telemetry", action="store_true",
+                        help="Hold the GoPro telemetry as columns of numbers, loaded from the telemetry cache, rather than as "
+                             "an object per data point. Uses less memory for long videos - EXPERIMENTAL!")
 
     only = parser.add_argument_group("GPX Only", "Creating Movies from GPX File only")
 
@@ -104,11 +200,10 @@ def gopro_dashboard_arguments(args=None):
                            help="Show detailed information when parsing GoPro Metadata")
     debugging.add_argument("--profiler", action="store_true",
                            help="Do some basic profiling of the widgets to find ones that may be slow")
-    args = parser.parse_args(args)
 
-    def quit(reason):
-        parser.print_help(file=sys.stderr)
-        fatal(f"Invalid arguments: {reason}")
+
+def check_dashboard_options(parser, args, has_input: bool):
+    quit = _quitter(parser)
 
     if (args.video_time_start or args.video_time_end) and not args.use_gpx_only:
         quit("--video-time-start/--video-time-end only applies when --use-gpx-only")
@@ -116,10 +211,37 @@ def gopro_dashboard_arguments(args=None):
     if args.use_gpx_only and not args.gpx:
         quit("--gpx is required with --use-gpx-only")
 
-    if args.use_gpx_only and not args.input and not args.overlay_size:
+    if args.use_gpx_only and not has_input and not args.overlay_size:
         quit("--overlay-size is required with --use-gpx-only (when no input video is given)")
 
+    if args.overlay_fps <= 0:
+        quit("--overlay-fps needs to be more than 0")
+
+    if args.workers < 1:
+        quit("--workers needs to be at least 1")
+
+    if args.workers > 1 and args.profiler:
+        quit("--profiler cannot be combined with --workers")
+
+    if args.segments < 1:
+        quit("--segments needs to be at least 1")
+
+    if args.segment_length <= 0:
+        quit("--segment-length needs to be more than 0")
+
+    segmented = args.segments > 1 or args.resumable
+
+    if segmented and (args.workers > 1 or args.profiler):
+        quit("--segments/--resumable cannot be combined with --workers or --profiler")
+
+    if segmented and args.generate == "none":
+        quit("--segments/--resumable need some output to join, so can't use --generate none")
+
+    if args.preview_every <= 0:
+        quit("--preview-every needs to be more than 0")
+
+    if args.preview and (args.workers > 1 or segmented or args.overlay_regions):
+        quit("--preview cannot be combined with --workers, --segments, --resumable or --overlay-regions")
+
     if args.use_gpx_only and args.generate != "default":
         quit("--generate cannot be combined with --use-gpx-only")
-
-    return args
@@ -0,0 +1,112 @@
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Callable, Optional
+
+from gopro_overlay.common import new_thread_event_loop
+from gopro_overlay.filenaming import GoProFile, gopro_files_in
+from gopro_overlay.timing import Timers
+
+
+def batch_inputs(paths: List[Path], related: bool = False) -> List[Path]:
+    """
+    Clips to render - files are taken as given, directories are searched for GoPro files. If related, each GoPro file
+    brings along the other chapters of the same recording. Each clip appears once, in the order first found
+    """
+    found = []
+    for path in paths:
+        if not path.exists():
+            raise IOError(f"File not found {path}")
+
+        files = sorted(gopro_files_in(path)) if path.is_dir() else [path]
+
+        for file in files:
+            if related and GoProFile.is_valid_filepath(file):
+                found.extend(file.parent / f.name for f in GoProFile(file).related_files(file.parent))
+            else:
+                found.append(file)
+
+    return list(dict.fromkeys(found))
+
+
+_batch_only = ["inputs", "output_dir", "related", "concurrency"]
+
+
+def clip_arguments(args: argparse.Namespace, inputpath: Path) -> argparse.Namespace:
+    """arguments for rendering one clip of a batch, as they would be from gopro_dashboard_arguments"""
+    clip = argparse.Namespace(**{k: v for k, v in vars(args).items() if k not in _batch_only})
+    clip.input = inputpath
+    clip.output = args.output_dir / inputpath.name
+    return clip
+
+
+@dataclass
+class ClipResult:
+    clip: Path
+    timers: Timers
+    failure: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.failure is None
+
+    @property
+    def seconds(self) -> float:
+        return sum(t.seconds for t in self.timers if t.name == "program")
+
+
+@dataclass
+class BatchResult:
+    clips: List[ClipResult] = field(default_factory=list)
+    timers: Timers = field(default_factory=Timers)
+
+    @property
+    def failed(self) -> List[ClipResult]:
+        return [c for c in self.clips if not c.ok]
+
+
+def _render_clip(clip: Path, render: Callable[[Path, Timers], None]) -> ClipResult:
+    timers = Timers()
+    try:
+        render(clip, timers)
+        return ClipResult(clip=clip, timers=timers)
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        # includes SystemExit, from fatal(), so one bad clip doesn't stop the others
+        return ClipResult(clip=clip, timers=timers, failure=traceback.format_exc())
+
+
+def render_batch(clips: List[Path], render: Callable[[Path, Timers], None], concurrency: int = 1,
+                 done: Callable[[ClipResult], None] = lambda r: None) -> BatchResult:
+    """
+    Calls render for each clip, up to `concurrency` at the same time, on threads, so they all share whatever render uses.
+    A clip that fails is reported in the result, and doesn't stop the others. `done` is called as each clip finishes.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Need a concurrency of at least one, not {concurrency}")
+
+    results = {}
+
+    def finished(result: ClipResult):
+        results[result.clip] = result
+        done(result)
+
+    if concurrency == 1:
+        for clip in clips:
+            finished(_render_clip(clip, render))
+    else:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="clip", initializer=new_thread_event_loop)
+        try:
+            futures = [executor.submit(_render_clip, clip, render) for clip in clips]
+            for future in as_completed(futures):
+                finished(future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    batch = BatchResult(clips=[results[c] for c in clips if c in results])
+    for result in batch.clips:
+        batch.timers.merge(result.timers)
+    return batch
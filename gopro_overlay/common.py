@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 import os
 import sys
@@ -34,3 +35,8 @@ def temporary_file(**kwargs):
         yield name
     finally:
         os.remove(name)
+
+
+def new_thread_event_loop():
+    """map rendering (geotiler) uses the thread's asyncio loop, which only the main thread gets by default"""
+    asyncio.set_event_loop(asyncio.new_event_loop())
@@ -0,0 +1,726 @@
+import contextlib
+import datetime
+import itertools
+import math
+import os
+import threading
+import traceback
+from pathlib import Path
+from subprocess import TimeoutExpired
+from typing import Optional, Callable, Any
+
+import progressbar
+from PIL import Image
+
+from gopro_overlay import timeseries_process, progress_frames, gpx, fit
+from gopro_overlay.common import temp_file_name
+from gopro_overlay.counter import ReasonCounter
+from gopro_overlay.date_overlap import DateRange
+from gopro_overlay.dimensions import dimension_from, Dimension
+from gopro_overlay.execution import InProcessExecution
+from gopro_overlay.ffmpeg import FFMPEGOverlayVideo, FFMPEGOverlay, ffmpeg_is_installed, ffmpeg_libx264_is_installed, \
+    find_streams, FFMPEGNull, find_keyframes, join_files, load_frames, probe_cache
+from gopro_overlay.ffmpeg_profile import load_ffmpeg_profile
+from gopro_overlay.font import load_font
+from gopro_overlay.frame_writer import AsyncFrameWriter
+from gopro_overlay.framemeta import framemeta_from
+from gopro_overlay.framemeta_gpx import merge_gpx_with_gopro, timeseries_to_framemeta
+from gopro_overlay.geo import CachingRenderer, api_key_finder
+from gopro_overlay.gpmd import GPS_FIXED_VALUES, GPSFix
+from gopro_overlay.gpmd_visitors_gps import WorstOfGPSLockFilter, GPSLockTracker, GPSDOPFilter, GPSMaxSpeedFilter, GPSReportingFilter, GPSBBoxFilter, NullGPSLockFilter
+from gopro_overlay.layout import Overlay, speed_awareness_layout
+from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout, Converters
+from gopro_overlay.log import log, fatal
+from gopro_overlay.manifest import SegmentManifest, file_fingerprint, text_fingerprint
+from gopro_overlay.matroska import MatroskaFrameWriter
+from gopro_overlay.point import Point
+from gopro_overlay.preview import preview_indices, tile_dimension, contact_sheet, fmt_time
+from gopro_overlay.privacy import PrivacyZone, NoPrivacyZone
+from gopro_overlay.regions import find_regions, packed_dimension, overlay_filter, OutsideRegions
+from gopro_overlay.render_pool import FrameRenderPool
+from gopro_overlay.segments import Segment, plan_segments, render_segments
+from gopro_overlay.telemetry_cache import TelemetryCache
+from gopro_overlay.timeseries import Timeseries
+from gopro_overlay.timeunits import timeunits, Timeunit
+from gopro_overlay.timing import PoorTimer, Timers
+from gopro_overlay.units import units
+from gopro_overlay.widgets.profile import WidgetProfiler
+
+
+def accepter_from_args(include, exclude):
+    if include and exclude:
+        raise ValueError("Can't use both include and exclude at the same time")
+
+    if include:
+        return lambda n: n in include
+    if exclude:
+        return lambda n: n not in exclude
+
+    return lambda n: True
+
+
+def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude, renderer, timeseries, font,
+                          privacy_zone, profiler, converters: Converters, load_layout=load_xml_layout, scale=1.0):
+    accepter = accepter_from_args(include, exclude)
+
+    if layout_xml:
+        layout = "xml"
+
+    if layout == "default":
+        resource_name = Path(f"default-{dimensions.x}x{dimensions.y}")
+        try:
+            return layout_from_xml(
+                load_layout(resource_name), renderer, timeseries, font, privacy_zone, include=accepter,
+                decorator=profiler, converters=converters, scale=scale
+            )
+        except FileNotFoundError:
+            raise IOError(f"Unable to locate bundled layout resource: {resource_name}. "
+                          f"You may need to create a custom layout for this frame size") from None
+
+    elif layout == "speed-awareness":
+        return speed_awareness_layout(renderer, font=font)
+    elif layout == "xml":
+        return layout_from_xml(
+            load_layout(layout_xml), renderer, timeseries, font, privacy_zone, include=accepter,
+            decorator=profiler, converters=converters, scale=scale
+        )
+    else:
+        raise ValueError(f"Unsupported layout {layout}")
+
+
+def load_external(filepath: Path, units) -> Timeseries:
+    suffix = filepath.suffix.lower()
+    if suffix == ".gpx":
+        return gpx.load_timeseries(filepath, units)
+    elif suffix == ".fit":
+        return fit.load_timeseries(filepath, units)
+    else:
+        fatal(f"Don't recognise filetype from {filepath} - support .gpx and .fit")
+
+
+def fmtdt(dt: datetime.datetime):
+    return dt.replace(microsecond=0).isoformat()
+
+
+def check_ffmpeg():
+    if not ffmpeg_is_installed():
+        fatal("Can't start ffmpeg - is it installed?")
+    if not ffmpeg_libx264_is_installed():
+        fatal("ffmpeg doesn't seem to handle libx264 files - it needs to be compiled with support for this, "
+              "check your installation")
+
+
+class DashboardResources:
+    """
+    The parts of a render that don't depend on the clip being rendered - font, layouts, map tile cache,
+    ffmpeg profile, GPX/FIT files - loaded once, so that many renders with the same options can share them.
+    Renders may be on different threads.
+    """
+
+    def __init__(self, args, version: str):
+        self.version = version
+
+        self.config_dir = args.config_dir
+        self.config_dir.mkdir(exist_ok=True)
+
+        self.cache_dir = args.cache_dir
+        self.cache_dir.mkdir(exist_ok=True)
+
+        probe_cache.persist_to(self.cache_dir / "ffprobe-cache.jsonl")
+        self.telemetry_cache = TelemetryCache(self.cache_dir)
+
+        self.font = load_font(args.font)
+
+        self.caching_renderer = CachingRenderer(
+            cache_dir=self.cache_dir,
+            style=args.map_style,
+            api_key_finder=api_key_finder(args, self.config_dir)
+        )
+
+        if args.profile:
+            self.ffmpeg_options = load_ffmpeg_profile(self.config_dir, args.profile)
+        else:
+            self.ffmpeg_options = None
+
+        self.renderer = None
+        self._layouts = {}
+        self._externals = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def open(self, readonly=False):
+        """readonly, if something else in this process already has the tile cache open for writing"""
+        with self.caching_renderer.open(readonly=readonly) as renderer:
+            self.renderer = renderer
+            try:
+                yield self
+            finally:
+                self.renderer = None
+
+    def load_layout(self, filepath: Path) -> str:
+        with self._lock:
+            if filepath not in self._layouts:
+                self._layouts[filepath] = load_xml_layout(filepath)
+            return self._layouts[filepath]
+
+    def load_external(self, filepath: Path) -> Timeseries:
+        """renders only read from these, so they can share them"""
+        with self._lock:
+            if filepath not in self._externals:
+                timeseries = load_external(filepath, units)
+                len(timeseries)  # settle sorting of the dates now, not in a race between renders
+                self._externals[filepath] = timeseries
+            return self._externals[filepath]
+
+
+class SharedResources:
+    """
+    DashboardResources for each set of the options that they depend on, kept open, so that a long-lived process can
+    share them between renders with different options
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self._resources = {}
+        self._writable = set()
+        self._stack = contextlib.ExitStack()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(args):
+        return (args.font, args.config_dir.absolute(), args.cache_dir.absolute(), args.map_style, args.map_api_key,
+                args.profile)
+
+    def resources_for(self, args) -> DashboardResources:
+        key = self._key(args)
+        with self._lock:
+            if key not in self._resources:
+                resources = DashboardResources(args, version=self.version)
+                # only one writer of each tile cache
+                cache = args.cache_dir.absolute()
+                self._stack.enter_context(resources.open(readonly=cache in self._writable))
+                self._writable.add(cache)
+                self._resources[key] = resources
+            return self._resources[key]
+
+    def close(self):
+        with self._lock:
+            self._stack.close()
+            self._resources.clear()
+            self._writable.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def terminal_progress(max_value: int):
+    return progressbar.ProgressBar(
+        widgets=[
+            'Render: ',
+            progressbar.Counter(),
+            ' [', progressbar.Percentage(), '] ',
+            ' [', progress_frames.Rate(), '] ',
+            progressbar.Bar(), ' ', progressbar.ETA()
+        ],
+        poll_interval=2.0,
+        max_value=max_value
+    )
+
+
+def no_progress(max_value: int):
+    return progressbar.NullBar(max_value=max_value)
+
+
+def render_dashboard(args, resources: DashboardResources, timers: Optional[Timers] = None,
+                     create_progress: Callable[[int], Any] = terminal_progress, processes: Optional[int] = None):
+    """
+    Renders one clip, as described by args (see gopro_dashboard_arguments), using the given open resources.
+    create_progress makes something like a progressbar.ProgressBar (update/finish) for a number of frames
+
+    processes is how many (forked) processes long recordings' metadata is decoded on, by default one per CPU. It needs
+    to be 1 if other threads might be running, such as other renders in the same process - a process forked while
+    another thread holds a lock (stderr, imports, caches...) can hang.
+    """
+    timers = timers if timers is not None else Timers()
+    processes = processes if processes is not None else os.cpu_count() or 1
+
+    font = resources.font
+    renderer = resources.renderer
+    caching_renderer = resources.caching_renderer
+    ffmpeg_options = resources.ffmpeg_options
+
+    # need in this scope for now
+    inputpath: Optional[Path] = None
+    generate = args.generate
+
+    with timers.timer("program").timing():
+
+        with timers.timer("loading timeseries").timing():
+
+            if args.use_gpx_only:
+
+                start_date: Optional[datetime.datetime] = None
+                end_date: Optional[datetime.datetime] = None
+                duration: Optional[Timeunit] = None
+
+                if args.input:
+                    inputpath = args.input
+                    stream_info = find_streams(inputpath)
+                    dimensions = stream_info.video.dimension
+
+                    duration = stream_info.video.duration
+
+                    fns = {
+                        "file-created": lambda f: f.ctime,
+                        "file-modified": lambda f: f.mtime,
+                        "file-accessed": lambda f: f.atime
+                    }
+
+                    if args.video_time_start:
+                        start_date = fns[args.video_time_start](stream_info.file)
+                        end_date = start_date + duration.timedelta()
+
+                    if args.video_time_end:
+                        start_date = fns[args.video_time_end](stream_info.file) - duration.timedelta()
+                        end_date = start_date + duration.timedelta()
+
+                else:
+                    generate = "overlay"
+
+                external_file: Path = args.gpx
+                fit_or_gpx_timeseries = resources.load_external(external_file)
+
+                log(f"GPX/FIT file:     {fmtdt(fit_or_gpx_timeseries.min)} -> {fmtdt(fit_or_gpx_timeseries.max)}")
+
+                # Give a bit of information here about what is going on
+                if start_date is not None:
+                    log(f"Video File Dates: {fmtdt(start_date)} -> {fmtdt(end_date)}")
+
+                    overlap = DateRange(start=start_date, end=end_date).overlap_seconds(
+                        DateRange(start=fit_or_gpx_timeseries.min, end=fit_or_gpx_timeseries.max))
+
+                    if overlap == 0:
+                        fatal("Video file and GPX/FIT file don't overlap in time -  See https://github.com/time4tea/gopro-dashboard-overlay/tree/main/docs/bin#create-a-movie-from-gpx-and-video-not-created-with-gopro")
+
+                frame_meta = timeseries_to_framemeta(fit_or_gpx_timeseries, units, start_date=start_date, duration=duration,
+                                                     step=timeunits(seconds=1 / args.overlay_fps))
+                video_duration = frame_meta.duration()
+                packets_per_second = max(1, round(args.overlay_fps))
+            else:
+                if args.gps_bbox_lon_lat:
+                    bbox_filter = GPSBBoxFilter(bbox=args.gps_bbox_lon_lat)
+                else:
+                    bbox_filter = NullGPSLockFilter()
+
+                inputpath = args.input
+                stream_info = find_streams(inputpath)
+
+                if not stream_info.meta:
+                    raise IOError(f"Unable to locate metadata stream in '{inputpath}' - is it a GoPro file")
+
+                dimensions = stream_info.video.dimension
+                video_duration = stream_info.video.duration
+                packets_per_second = 18
+
+                counter = ReasonCounter()
+
+                try:
+                    frame_meta = framemeta_from(
+                        inputpath,
+                        metameta=stream_info.meta,
+                        units=units,
+                        cache=resources.telemetry_cache,
+                        processes=processes,
+                        columnar=args.columnar_telemetry,
+                        gps_lock_filter=WorstOfGPSLockFilter(
+                            GPSReportingFilter(GPSLockTracker(), rejected=counter.inc("Heuristics")),
+                            GPSReportingFilter(bbox_filter, rejected=counter.inc("Outside BBox")),
+                            GPSReportingFilter(GPSDOPFilter(args.gps_dop_max), rejected=counter.inc(f"DOP > {args.gps_dop_max}")),
+                            GPSReportingFilter(GPSMaxSpeedFilter(units.Quantity(args.gps_speed_max, args.gps_speed_max_units).to("mps").m), rejected=counter.inc(f"Speed > {args.gps_speed_max} {args.gps_speed_max_units}"))
+                        )
+                    )
+
+                    if counter.total() > 0:
+                        log(f"Note: {counter.total()} GoPro GPS readings were mapped to 'NO_LOCK', for the following reasons:")
+                        [log(f"* {k} -> {v}") for k, v in counter.items()]
+
+                except TimeoutExpired:
+                    traceback.print_exc()
+                    fatal(f"{inputpath} appears to be located on a slow device. Please ensure both input and output files are on fast disks")
+
+                if args.gpx:
+                    external_file: Path = args.gpx
+                    gpx_timeseries = resources.load_external(external_file)
+                    log(f"GPX/FIT Timeseries has {len(gpx_timeseries)} data points.. merging...")
+                    merge_gpx_with_gopro(gpx_timeseries, frame_meta)
+
+            if args.overlay_size:
+                dimensions = dimension_from(args.overlay_size)
+
+        # layouts are written for the input's size, but if ffmpeg is going to shrink the video, draw them at the smaller size
+        layout_dimensions = dimensions
+        overlay_scale = 1.0
+
+        scalable_layout = args.layout_xml or args.layout == "default"
+        if generate == "default" and scalable_layout and args.output_size != 1080 and args.output_size < stream_info.video.dimension.y:
+            overlay_scale = args.output_size / stream_info.video.dimension.y
+            dimensions = Dimension(round(dimensions.x * overlay_scale), round(dimensions.y * overlay_scale))
+            log(f"Drawing overlay at output size, scaled by {overlay_scale:.3f} from {layout_dimensions}")
+
+        if len(frame_meta) < 1:
+            fatal(f"Unable to load GoPro metadata from {inputpath}. Use --debug-metadata to see more information")
+
+        log(f"Generating overlay at {dimensions}")
+        log(f"Timeseries has {len(frame_meta)} data points")
+        log("Processing....")
+
+        with timers.timer("processing").timing():
+            locked_2d = lambda e: e.gpsfix in GPS_FIXED_VALUES
+            locked_3d = lambda e: e.gpsfix == GPSFix.LOCK_3D.value
+
+            frame_meta.process(timeseries_process.process_ses("point", lambda i: i.point, alpha=0.45), filter_fn=locked_2d)
+            frame_meta.process_deltas(timeseries_process.calculate_speeds(), skip=packets_per_second * 3, filter_fn=locked_2d)
+            frame_meta.process(timeseries_process.calculate_odo(), filter_fn=locked_2d)
+            frame_meta.process_deltas(timeseries_process.calculate_gradient(), skip=packets_per_second * 3, filter_fn=locked_3d)  # hack
+            frame_meta.process(timeseries_process.filter_locked())
+
+        # privacy zone applies everywhere, not just at start, so might not always be suitable...
+        if args.privacy:
+            lat, lon, km = args.privacy.split(",")
+            privacy_zone = PrivacyZone(
+                Point(float(lat), float(lon)),
+                units.Quantity(float(km), units.km)
+            )
+        else:
+            privacy_zone = NoPrivacyZone()
+
+        if args.profiler:
+            profiler = WidgetProfiler()
+        else:
+            profiler = None
+
+        if args.show_ffmpeg:
+            redirect = None
+        else:
+            redirect = temp_file_name()
+            log(f"FFMPEG Output is in {redirect}")
+
+        execution = InProcessExecution(redirect=redirect)
+
+        draw_timer = timers.timer("drawing frames" if args.workers == 1 else "waiting for frames")
+
+        # Draw an overlay frame every 1/fps seconds of video
+        timelapse_correction = frame_meta.duration() / video_duration
+        log(f"Timelapse Factor = {timelapse_correction:.3f}")
+        stepper = frame_meta.stepper(timeunits(seconds=timelapse_correction / args.overlay_fps))
+
+        unit_converters = Converters(
+            speed_unit=args.units_speed,
+            distance_unit=args.units_distance,
+            altitude_unit=args.units_altitude,
+            temperature_unit=args.units_temperature,
+        )
+
+        # frames waiting for ffmpeg, drawing can get this far ahead of encoding
+        frame_queue_size = 2
+
+        def create_overlay(renderer, canvases=1, regions=None):
+            return Overlay(
+                dimensions=dimensions,
+                framemeta=frame_meta,
+                canvases=canvases,
+                regions=regions,
+                create_widgets=create_desired_layout(
+                    layout=args.layout, layout_xml=args.layout_xml,
+                    dimensions=layout_dimensions,
+                    scale=overlay_scale,
+                    include=args.include, exclude=args.exclude,
+                    renderer=renderer,
+                    timeseries=frame_meta,
+                    font=font,
+                    privacy_zone=privacy_zone,
+                    profiler=profiler,
+                    converters=unit_converters,
+                    load_layout=resources.load_layout
+                )
+            )
+
+        @contextlib.contextmanager
+        def create_drawer():
+            with caching_renderer.open(readonly=True) as worker_renderer:
+                worker_overlay = create_overlay(worker_renderer, regions=regions)
+
+                def draw(dt):
+                    worker_overlay.draw(dt)
+                    # don't pickle the same frame again, None means "same as the last one"
+                    if worker_overlay.repeated:
+                        return None
+                    return bytes(worker_overlay.buffer())
+
+                draw.stats = lambda: worker_overlay.deduplicated
+                yield draw
+
+        def frame_time(index) -> Timeunit:
+            return timeunits(seconds=index / args.overlay_fps)
+
+        def open_writer(stdin):
+            if args.overlay_vfr:
+                return AsyncFrameWriter(MatroskaFrameWriter(stdin, overlay_size), queue_size=frame_queue_size)
+            return AsyncFrameWriter(stdin, queue_size=frame_queue_size)
+
+        def send(writer, index, frame, repeated):
+            if not args.overlay_vfr:
+                writer.write(frame)
+            elif not repeated or index == 0:
+                writer.write(frame, frame_time(index))
+
+        def send_end(writer, frame, count):
+            # the last frame needs to last until the end
+            if args.overlay_vfr and frame is not None:
+                writer.write(frame, frame_time(count))
+
+        def sample_regions(samples=50):
+            sampler = create_overlay(renderer)
+            every = max(1, len(stepper) // samples)
+            return find_regions(dimensions, (sampler.draw(dt) for dt in itertools.islice(stepper.steps(), 0, None, every)))
+
+        def print_profile():
+            if profiler:
+                log("\n\n*** Widget Timings ***")
+                profiler.print()
+                log("***\n\n")
+
+        def render_preview():
+            """draws a sample of frames, on their video frames, into a contact sheet, without encoding anything"""
+            sheet_path = args.output if args.output.suffix.lower() == ".png" else args.output.with_suffix(".png")
+            steps = list(stepper.steps())
+            indices = preview_indices(len(steps), args.overlay_fps, args.preview_every)
+            tile = tile_dimension(dimensions, 480)
+
+            log(f"Previewing {len(indices)} frames, every {args.preview_every}s, to {sheet_path}")
+
+            preview_overlay = create_overlay(renderer)
+            tiles = []
+            timings = []
+            for index in indices:
+                before = draw_timer.total
+                frame = draw_timer.time(lambda: preview_overlay.draw(steps[index]))
+                timings.append((draw_timer.total - before) / 1_000_000)
+                tiles.append(frame.resize(tile.tuple(), Image.LANCZOS))
+
+            times = [frame_time(index) for index in indices]
+
+            if generate == "default":
+                # the timeline includes the very end of the video, where there is no frame to seek to
+                last = video_duration - frame_time(1)
+                seeks = [min(t, last) for t in times]
+                backgrounds = [Image.frombytes("RGBA", tile.tuple(), b) for b in load_frames(inputpath, seeks, tile)]
+            else:
+                backgrounds = None
+
+            contact_sheet(tiles, [fmt_time(t) for t in times], font.font_variant(size=16), backgrounds=backgrounds).save(sheet_path)
+
+            with sheet_path.with_suffix(".csv").open("w") as f:
+                f.write("frame,time,draw_ms\n")
+                for index, t, ms in zip(indices, times, timings):
+                    log(f"Frame {index:,} at {fmt_time(t)} drew in {ms:.1f}ms")
+                    f.write(f"{index},{t.millis() / 1000:.3f},{ms:.3f}\n")
+
+            log(f"Contact sheet in {sheet_path}, draw timings in {sheet_path.with_suffix('.csv')}")
+
+        if args.preview:
+            try:
+                render_preview()
+            finally:
+                log(draw_timer)
+                print_profile()
+            return timers
+
+        progress = create_progress(len(stepper))
+
+        regions = None
+        overlay_size = dimensions
+
+        if args.overlay_regions:
+            if generate == "default":
+                regions = sample_regions()
+                if regions:
+                    overlay_size = packed_dimension(regions)
+                    log(f"Sending {len(regions)} overlay regions to ffmpeg, packed into {overlay_size} - "
+                        f"{100 * overlay_size.x * overlay_size.y / (dimensions.x * dimensions.y):.0f}% of full frame")
+                else:
+                    log("Widgets didn't draw anything, sending full frames")
+            else:
+                log("--overlay-regions only applies when overlaying on to a video, sending full frames")
+
+        def create_ffmpeg(output: Path, segment: Optional[Segment] = None):
+            if segment is not None and redirect is not None:
+                segment_execution = InProcessExecution(redirect=f"{redirect}-segment-{segment.index}")
+            else:
+                segment_execution = execution
+
+            if generate == "none":
+                return FFMPEGNull()
+            elif generate == "overlay":
+                return FFMPEGOverlay(output=output, options=ffmpeg_options, overlay_size=dimensions,
+                                     execution=segment_execution, fps=args.overlay_fps, vfr=args.overlay_vfr)
+            else:
+                return FFMPEGOverlayVideo(input=inputpath, output=output, options=ffmpeg_options,
+                                          vsize=args.output_size, overlay_size=overlay_size, execution=segment_execution,
+                                          fps=args.overlay_fps, vfr=args.overlay_vfr,
+                                          overlay_filter=overlay_filter(regions) if regions else None,
+                                          start=segment.start(args.overlay_fps) if segment else None,
+                                          duration=segment.duration(args.overlay_fps) if segment else None,
+                                          scale_first=overlay_scale != 1.0)
+
+        segment_dir = args.output.absolute().parent / f".{args.output.name}.segments"
+        # frames drawn, but not sent, before a segment, so stateful widgets (Window, MovingMap, ...) are warmed up
+        segment_preroll = round(10 * args.overlay_fps)
+
+        def segment_file(segment: Segment) -> Path:
+            return segment_dir / f"segment-{segment.index:04d}{args.output.suffix}"
+
+        def render_segment(segment: Segment, steps) -> int:
+            """returns how many of the segment's frames were deduplicated"""
+            segment_timer = PoorTimer(f"segment {segment.index} drawing frames")
+            with caching_renderer.open(readonly=True) as segment_renderer:
+                segment_overlay = create_overlay(segment_renderer, canvases=frame_queue_size + 2, regions=regions)
+
+                for dt in steps[max(0, segment.first - segment_preroll):segment.first]:
+                    segment_overlay.draw(dt)
+                preroll_deduplicated = segment_overlay.deduplicated
+
+                with create_ffmpeg(segment_file(segment), segment).generate() as stdin, open_writer(stdin) as segment_writer:
+                    for index, dt in enumerate(steps[segment.first:segment.first + segment.count]):
+                        segment_timer.time(lambda: segment_overlay.draw(dt))
+                        send(segment_writer, index, segment_overlay.buffer(), segment_overlay.repeated)
+                    send_end(segment_writer, segment_overlay.buffer(), segment.count)
+
+            log(segment_timer)
+            log(segment_writer)
+            return segment_overlay.deduplicated - preroll_deduplicated
+
+        def render_key():
+            """everything that affects the output of a render, so a resumed render can check it is still the same"""
+            ignored = {"output", "workers", "segments", "show_ffmpeg", "debug_metadata", "profiler", "resumable",
+                       "columnar_telemetry", "overlay_regions"}
+
+            if args.layout_xml:
+                layout_text = resources.load_layout(args.layout_xml)
+            elif args.layout == "default":
+                layout_text = resources.load_layout(Path(f"default-{layout_dimensions.x}x{layout_dimensions.y}"))
+            else:
+                layout_text = args.layout
+
+            return {
+                "version": resources.version,
+                "layout": text_fingerprint(layout_text),
+                "inputs": {str(p): file_fingerprint(p) for p in [inputpath, args.gpx] if p},
+                "options": {k: str(v) for k, v in sorted(vars(args).items()) if k not in ignored},
+            }
+
+        def render_in_segments():
+            steps = list(stepper.steps())
+
+            def plan():
+                if args.resumable:
+                    count = max(1, math.ceil(len(steps) / (args.segment_length * args.overlay_fps)))
+                else:
+                    count = args.segments
+                keyframes = find_keyframes(inputpath) if generate == "default" else None
+                return plan_segments(len(steps), count, args.overlay_fps, keyframes)
+
+            segment_dir.mkdir(exist_ok=True)
+
+            if args.resumable:
+                manifest = SegmentManifest.load_or_create(segment_dir / "manifest.json", render_key(), plan)
+                if manifest.resumed:
+                    log(f"Resuming render, {len(manifest.completed)} of {len(manifest.segments)} segments are already done")
+                segments = manifest.segments
+                todo = manifest.remaining()
+                done = manifest.complete
+            else:
+                segments = plan()
+                todo = segments
+                done = lambda segment: None
+
+            def segment_done(segment: Segment):
+                done(segment)
+                log(f"Segment {segment.index} done")
+
+            log(f"Rendering {len(steps):,} frames in {len(segments)} segments, {len(todo)} to do, in {segment_dir}")
+
+            deduplicated = render_segments(todo, lambda segment: render_segment(segment, steps), concurrency=args.segments,
+                                           done=segment_done)
+
+            join_files([segment_file(s) for s in segments], args.output)
+
+            for f in segment_dir.glob("segment-*"):
+                f.unlink()
+            for f in segment_dir.glob("manifest.json*"):
+                f.unlink()
+            segment_dir.rmdir()
+
+            return sum(deduplicated.values()), sum(s.count for s in todo)
+
+        ffmpeg = create_ffmpeg(args.output)
+
+        overlay = None
+        writer = None
+        deduplicated = None
+
+        try:
+            if args.segments > 1 or args.resumable:
+                deduplicated = render_in_segments()
+            elif args.workers > 1:
+                log(f"Drawing frames using {args.workers} workers")
+                pool = FrameRenderPool(workers=args.workers, create_drawer=create_drawer)
+                # start the workers first, while this process has no writer thread (or ffmpeg pipe) for them to inherit
+                with pool.frames(stepper.steps()) as frames, ffmpeg.generate() as stdin, open_writer(stdin) as writer:
+                    last = None
+                    for index, frame in enumerate(draw_timer.timed(frames)):
+                        progress.update(index)
+                        repeated = frame is None
+                        if not repeated:
+                            last = frame
+                        send(writer, index, last, repeated)
+                    send_end(writer, last, len(stepper))
+                deduplicated = sum(pool.stats), len(stepper)
+            else:
+                # the writer may still hold queue + 1 frames, so draw the next one on a different canvas
+                overlay = create_overlay(renderer, canvases=frame_queue_size + 2, regions=regions)
+                with ffmpeg.generate() as stdin, open_writer(stdin) as writer:
+                    for index, dt in enumerate(stepper.steps()):
+                        progress.update(index)
+                        draw_timer.time(lambda: overlay.draw(dt))
+                        send(writer, index, overlay.buffer(), overlay.repeated)
+                    send_end(writer, overlay.buffer(), len(stepper))
+            log("Finished drawing frames. waiting for ffmpeg to catch up")
+            progress.finish()
+
+        except KeyboardInterrupt:
+            log("...Stopping...")
+            pass
+        except OutsideRegions as e:
+            fatal(f"{e} - run again without --overlay-regions")
+        finally:
+            log(draw_timer)
+
+            if writer:
+                for t in [writer.write_timer, writer.stall_timer, writer.idle_timer]:
+                    log(t)
+                    timers.include(t)
+                log(writer)
+
+            if overlay:
+                deduplicated = overlay.deduplicated, draw_timer.count
+
+            if deduplicated is not None:
+                log(f"Deduplicated frames: {deduplicated[0]:,} of {deduplicated[1]:,}")
+
+            print_profile()
+
+    return timers
@@ -3,17 +3,50 @@ from datetime import timedelta
 from gopro_overlay.log import log
 
 
+# The items that telemetry sources and processing put on an entry - each has its own slot, so reading one is a plain
+# attribute lookup. Anything else is kept in a dict, made only for the entries that have one.
+fields = (
+    "timestamp", "packet", "packet_index", "dop", "gpsfix", "gpslock",
+    "point", "lat", "lon", "alt", "speed", "hr", "cad", "atemp", "power",
+    "accl", "grav", "cori", "ori",
+    "cspeed", "dist", "time", "azi", "cog", "codo", "odo", "grad", "cgrad",
+)
+
+_slots = frozenset(fields)
+
+
 class Entry:
+    __slots__ = ("dt", "_extra") + fields
 
     def __init__(self, dt, **kwargs):
         self.dt = dt
-        self.items = {k: v for k, v in dict(**kwargs).items() if v is not None}
+        take = kwargs.pop
+        for f in fields:
+            setattr(self, f, take(f, None))
+        self._extra = {k: v for k, v in kwargs.items() if v is not None} or None
+
+    @property
+    def items(self) -> dict:
+        found = {f: getattr(self, f) for f in fields}
+        if self._extra:
+            found.update(self._extra)
+        return {k: v for k, v in found.items() if v is not None}
 
     def update(self, **kwargs):
-        self.items.update(**kwargs)
+        for k, v in kwargs.items():
+            if k in _slots:
+                setattr(self, k, v)
+            elif self._extra is None:
+                if v is not None:
+                    self._extra = {k: v}
+            else:
+                self._extra[k] = v
 
     def __getattr__(self, item):
-        return self.items.get(item, None)
+        # only called for names that aren't slots
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return self._extra.get(item) if self._extra else None
 
     def __str__(self):
         return f"Entry: {self.dt} - {self.items}"
@@ -39,11 +72,10 @@ class Entry:
 
         position = point / range
 
-        items = {}
-        for key in self.items.keys():
-            start = self.items[key]
+        items, other_items = {}, other.items
+        for key, start in self.items.items():
             try:
-                end = other.items[key]
+                end = other_items[key]
                 diff = end - start
                 interp = start + (diff * position)
             except KeyError:
@@ -6,12 +6,13 @@ import itertools
 import json
 import os
 import subprocess
-from array import array
+import threading
 from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Iterator
 
+from gopro_overlay import mp4
 from gopro_overlay.common import temporary_file
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.execution import InProcessExecution
@@ -91,7 +92,7 @@ def join_files(filepaths, output):
     with temporary_file() as commandfile:
         with open(commandfile, "w") as f:
             for path in filepaths:
-                f.write(f"file '{path}\n")
+                f.write(f"file '{path}'\n")
 
         args = ["ffmpeg",
                 "-hide_banner",
@@ -127,14 +128,121 @@ def find_frame_duration(filepath, data_stream_number, invoke=invoke):
     return duration
 
 
-def find_streams(filepath: Path, invoke=invoke, find_frame_duration=find_frame_duration, stat=os.stat) -> StreamInfo:
-    ffprobe_output = str(invoke(["ffprobe", "-hide_banner", "-print_format", "json", "-show_streams", filepath]).stdout)
+def find_keyframes(filepath: Path, invoke=invoke) -> List[float]:
+    """times (seconds) of the video keyframes, from the packet index, so without decoding anything"""
+    ffprobe_output = str(invoke(
+        ["ffprobe",
+         "-hide_banner",
+         "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags",
+         "-print_format", "csv=print_section=0",
+         filepath]
+    ).stdout)
+
+    keyframes = []
+    for line in ffprobe_output.splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and "K" in parts[1] and parts[0] not in ("", "N/A"):
+            keyframes.append(float(parts[0]))
+    return sorted(keyframes)
+
+
+class ProbeCache:
+    """
+    What ffprobe said about each file, keyed on its path, size and modification time, so each file is only probed
+    once. If persisted, new probes are appended to a file, one json object per line, so later runs can use them too.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._lock = threading.Lock()
+        self._probes = {}
+        self.path = None
+        self._torn = False
+        if path is not None:
+            self.persist_to(path)
+
+    @staticmethod
+    def _key(filepath, meta: FileMeta):
+        return os.path.abspath(filepath), meta.length, meta.mtime.timestamp()
+
+    def persist_to(self, path: Path):
+        with self._lock:
+            if path == self.path:
+                return
+            self.path = path
+            self._torn = False
+            if path.exists():
+                with path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        self._torn = not line.endswith("\n")
+                        try:
+                            entry = json.loads(line)
+                            self._probes[tuple(entry["key"])] = entry["probe"]
+                        except (ValueError, KeyError, TypeError):
+                            # torn write from a process that was killed - just probe that file again
+                            continue
+
+    def get(self, filepath, meta: FileMeta) -> Optional[dict]:
+        with self._lock:
+            return self._probes.get(self._key(filepath, meta))
+
+    def put(self, filepath, meta: FileMeta, probe: dict):
+        key = self._key(filepath, meta)
+        with self._lock:
+            self._probes[key] = probe
+            if self.path is not None:
+                with self.path.open("a", encoding="utf-8") as f:
+                    if self._torn:
+                        f.write("\n")
+                        self._torn = False
+                    f.write(json.dumps({"key": key, "probe": probe}) + "\n")
+
+
+probe_cache = ProbeCache()
+
+_probed_stream_entries = ["index", "codec_type", "codec_tag_string", "width", "height", "duration", "nb_frames",
+                          "time_base"]
+
+
+def probe_file(filepath, invoke=invoke, find_frame_duration=find_frame_duration) -> dict:
+    """
+    Streams, and the duration of the first gpmd packet, with a single ffprobe. Packets are only read for the
+    first few seconds, which will include the first gpmd packet, unless the file is very oddly interleaved.
+    """
+    ffprobe_output = str(invoke(
+        ["ffprobe",
+         "-hide_banner",
+         "-print_format", "json",
+         "-show_entries", f"stream={','.join(_probed_stream_entries)}:packet=stream_index,duration",
+         "-read_intervals", "%+3",
+         filepath]
+    ).stdout)
 
     ffprobe_json = json.loads(ffprobe_output)
 
+    streams = [{k: v for k, v in s.items() if k in _probed_stream_entries} for s in ffprobe_json["streams"]]
+    probe = {"streams": streams}
+
+    gpmd = [s for s in streams if _is_gpmd(s)]
+    if len(gpmd) == 1:
+        index = int(gpmd[0]["index"])
+        durations = [p["duration"] for p in ffprobe_json.get("packets", []) if
+                     p.get("stream_index") == index and "duration" in p]
+        if durations:
+            probe["frame_duration"] = int(durations[0])
+        else:
+            probe["frame_duration"] = find_frame_duration(filepath, index, invoke)
+
+    return probe
+
+
+def _is_gpmd(s) -> bool:
+    return s["codec_type"] == "data" and s.get("codec_tag_string") == "gpmd"
+
+
+def stream_info(probe: dict, file: FileMeta) -> StreamInfo:
     video_selector = lambda s: s["codec_type"] == "video"
     audio_selector = lambda s: s["codec_type"] == "audio"
-    data_selector = lambda s: s["codec_type"] == "data" and s["codec_tag_string"] == "gpmd"
 
     def first_and_only(what, l, p):
         matches = list(filter(p, l))
@@ -149,7 +257,7 @@ def find_streams(filepath: Path, invoke=invoke, find_frame_duration=find_frame_d
         if matches:
             return first_and_only(what, l, p)
 
-    streams = ffprobe_json["streams"]
+    streams = probe["streams"]
     video = first_and_only("video stream", streams, video_selector)
 
     video_meta = VideoMeta(
@@ -163,28 +271,40 @@ def find_streams(filepath: Path, invoke=invoke, find_frame_duration=find_frame_d
     if audio:
         audio_meta = AudioMeta(stream=int(audio["index"]))
 
-    meta = only_if_present("metadata stream", streams, data_selector)
+    meta = only_if_present("metadata stream", streams, _is_gpmd)
 
     if meta:
-        data_stream_number = int(meta["index"])
-
         meta_meta = MetaMeta(
-            stream=data_stream_number,
+            stream=int(meta["index"]),
             frame_count=int(meta["nb_frames"]),
             timebase=int(meta["time_base"].split("/")[1]),
-            frame_duration=find_frame_duration(filepath, data_stream_number, invoke)
+            frame_duration=probe["frame_duration"]
         )
     else:
         meta_meta = None
 
     return StreamInfo(
-        file=file_meta(filepath, stat=stat),
+        file=file,
         audio=audio_meta,
         video=video_meta,
         meta=meta_meta
     )
 
 
+def find_streams(filepath: Path, invoke=invoke, find_frame_duration=find_frame_duration, stat=os.stat,
+                 probes: Optional[ProbeCache] = None) -> StreamInfo:
+    probes = probe_cache if probes is None else probes
+
+    file = file_meta(filepath, stat=stat)
+
+    probe = probes.get(filepath, file)
+    if probe is None:
+        probe = probe_file(filepath, invoke=invoke, find_frame_duration=find_frame_duration)
+        probes.put(filepath, file, probe)
+
+    return stream_info(probe, file)
+
+
 def file_meta(filepath: Path, stat=os.stat) -> FileMeta:
     sr = stat(filepath)
 
@@ -196,17 +316,33 @@ def file_meta(filepath: Path, stat=os.stat) -> FileMeta:
     )
 
 
-def load_gpmd_from(filepath: Path):
-    track = find_streams(filepath).meta.stream
-    if track:
-        cmd = ["ffmpeg", "-hide_banner", '-y', '-i', filepath, '-codec', 'copy', '-map', '0:%d' % track, '-f',
-               'rawvideo', "-"]
-        result = run(cmd, capture_output=True, timeout=10)
-        if result.returncode != 0:
-            raise IOError(f"ffmpeg failed code: {result.returncode} : {result.stderr.decode('utf-8')}")
-        arr = array("b")
-        arr.frombytes(result.stdout)
-        return arr
+def load_gpmd_from(filepath: Path) -> Optional[bytes]:
+    """the GoPro metadata track, read straight from the file"""
+    with mp4.mapped(filepath) as buf:
+        track = mp4.gpmd_track(buf)
+        if track:
+            return mp4.sample_data(buf, track)
+
+
+def gpmd_packets_from(filepath: Path) -> Iterator[bytes]:
+    """the packets of the GoPro metadata track, one at a time, read straight from the file"""
+    with mp4.mapped(filepath) as buf:
+        track = mp4.gpmd_track(buf)
+        if track:
+            yield from mp4.samples(buf, track)
+
+
+def find_metameta(filepath: Path) -> Optional[MetaMeta]:
+    """as find_streams(filepath).meta, but from the file itself, without ffprobe"""
+    with mp4.mapped(filepath) as buf:
+        track = mp4.gpmd_track(buf)
+        if track:
+            return MetaMeta(
+                stream=track.index,
+                frame_count=len(track),
+                timebase=track.timebase,
+                frame_duration=track.durations[0]
+            )
 
 
 def ffmpeg_is_installed():
@@ -233,6 +369,39 @@ def load_frame(filepath: Path, at_time: Timeunit) -> Optional[bytes]:
             raise IOError(f"Error: {cmd}\n stderr: {e.stderr}")
 
 
+def load_frames(filepath: Path, at_times: List[Timeunit], size: Dimension, run=run, batch: int = 32) -> List[bytes]:
+    """
+    Frames (rgba, scaled to size) from each of the times, seeking to each one rather than decoding the whole video,
+    several in each ffmpeg call, rather than one call per frame
+    """
+    frame_length = size.x * size.y * 4
+    frames = []
+
+    for first in range(0, len(at_times), batch):
+        times = at_times[first:first + batch]
+        inputs = [["-ss", str(t.millis() / 1000), "-i", str(filepath.absolute())] for t in times]
+        chains = [f"[{i}:v]trim=end_frame=1,scale={size.x}:{size.y},setsar=1[f{i}]" for i in range(len(times))]
+        concat = "{}concat=n={}:v=1:a=0[out]".format("".join(f"[f{i}]" for i in range(len(times))), len(times))
+
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error",
+               *flatten(inputs),
+               "-filter_complex", ";".join([*chains, concat]),
+               "-map", "[out]", "-vsync", "passthrough", "-f", "rawvideo", "-pix_fmt", "rgba", "-"]
+        log(f"Loading {len(times)} frames from {filepath}")
+        try:
+            output = run(cmd, capture_output=True).stdout
+        except subprocess.CalledProcessError as e:
+            raise IOError(f"Error: {cmd}\n stderr: {e.stderr}")
+
+        if len(output) != frame_length * len(times):
+            raise IOError(f"Expected {len(times)} frames from {filepath}, but got {len(output) / frame_length:.1f} - "
+                          f"is a time past the end of the video?")
+
+        frames.extend(output[i:i + frame_length] for i in range(0, len(output), frame_length))
+
+    return frames
+
+
 class DiscardingBytesIO(BytesIO):
 
     def __init__(self, initial_bytes: bytes = ...) -> None:
@@ -249,11 +418,27 @@ class FFMPEGNull:
         yield DiscardingBytesIO()
 
 
+def overlay_input(overlay_size: Dimension, fps: float, vfr: bool):
+    """vfr frames come with their own timestamps, in a matroska stream - see MatroskaFrameWriter"""
+    if vfr:
+        return ["-f", "matroska", "-i", "-"]
+    return [
+        "-f", "rawvideo",
+        "-framerate", str(fps),
+        "-s", f"{overlay_size.x}x{overlay_size.y}",
+        "-pix_fmt", "rgba",
+        "-i", "-",
+    ]
+
+
 class FFMPEGOverlay:
 
-    def __init__(self, output: Path, overlay_size: Dimension, options: FFMPEGOptions = None, execution=None):
+    def __init__(self, output: Path, overlay_size: Dimension, options: FFMPEGOptions = None, execution=None,
+                 fps: float = 10.0, vfr: bool = False):
         self.output = output
         self.overlay_size = overlay_size
+        self.fps = fps
+        self.vfr = vfr
         self.execution = execution if execution else InProcessExecution()
         self.options = options if options else FFMPEGOptions()
 
@@ -264,11 +449,7 @@ class FFMPEGOverlay:
             "-hide_banner",
             "-y",
             self.options.general,
-            "-f", "rawvideo",
-            "-framerate", "10.0",
-            "-s", f"{self.overlay_size.x}x{self.overlay_size.y}",
-            "-pix_fmt", "rgba",
-            "-i", "-",
+            overlay_input(self.overlay_size, self.fps, self.vfr),
             "-r", "30",
             self.options.output,
             str(self.output)
@@ -293,32 +474,46 @@ class FFMPEGOptions:
 
 class FFMPEGOverlayVideo:
 
-    def __init__(self, input: Path, output: Path, overlay_size: Dimension, options: FFMPEGOptions = None, vsize=1080, execution=None):
+    def __init__(self, input: Path, output: Path, overlay_size: Dimension, options: FFMPEGOptions = None, vsize=1080, execution=None,
+                 fps: float = 10.0, vfr: bool = False, overlay_filter: str = None,
+                 start: Optional[Timeunit] = None, duration: Optional[Timeunit] = None, scale_first: bool = False):
+        """
+        overlay_filter puts overlay input 1 on to video input 0, if the overlay isn't just a full size frame
+        start/duration select just part of the input video, for rendering in segments
+        scale_first scales the video to vsize before the overlay goes on, for an overlay drawn at the output size
+        """
         self.output = output
         self.input = input
+        self.start = start
+        self.duration = duration
+        self.fps = fps
+        self.vfr = vfr
+        self.overlay_filter = overlay_filter if overlay_filter else "[0:v][1:v]overlay"
         self.options = options if options else FFMPEGOptions()
         self.overlay_size = overlay_size
         self.vsize = vsize
         self.execution = execution if execution else InProcessExecution()
+        self.scale_first = scale_first
+
+    def filter(self) -> str:
+        if self.scale_first:
+            return f"[0:v]scale=-1:{self.vsize}[scaled];" + self.overlay_filter.replace("[0:v]", "[scaled]")
+        if self.vsize == 1080:
+            return self.overlay_filter
+        return f"{self.overlay_filter},scale=-1:{self.vsize}"
 
     @contextlib.contextmanager
     def generate(self):
-        if self.vsize == 1080:
-            filter_extra = ""
-        else:
-            filter_extra = f",scale=-1:{self.vsize}"
         cmd = flatten([
             "ffmpeg",
             "-y",
             self.options.general,
             self.options.input,
+            ["-ss", str(self.start.millis() / 1000)] if self.start is not None else [],
+            ["-t", str(self.duration.millis() / 1000)] if self.duration is not None else [],
             "-i", str(self.input),
-            "-f", "rawvideo",
-            "-framerate", "10.0",
-            "-s", f"{self.overlay_size.x}x{self.overlay_size.y}",
-            "-pix_fmt", "rgba",
-            "-i", "-",
-            "-filter_complex", f"[0:v][1:v]overlay{filter_extra}",
+            overlay_input(self.overlay_size, self.fps, self.vfr),
+            "-filter_complex", self.filter(),
             self.options.output,
             str(self.output)
         ])
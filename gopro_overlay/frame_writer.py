@@ -0,0 +1,92 @@
+import queue
+import threading
+
+from gopro_overlay.timing import PoorTimer
+
+_STOP = object()
+
+
+class AsyncFrameWriter:
+    """
+    Writes frames to ffmpeg on a thread, so drawing the next frame overlaps with ffmpeg reading & encoding
+    the previous ones.
+
+    Frames are handed over without copying, so a frame must not be changed until queue_size + 1 further
+    frames have been written - a Scene with queue_size + 2 canvases guarantees that.
+
+    Whatever is given to write() is passed on to the underlying writer's write(), on the thread.
+    Errors from the underlying writer are raised from the next call to write(), or on exit
+    """
+
+    def __init__(self, writer, queue_size: int = 2):
+        if queue_size < 1:
+            raise ValueError(f"Need a queue of at least one frame, not {queue_size}")
+        self.writer = writer
+        self.queue_size = queue_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self._error = None
+
+        self.write_timer = PoorTimer("writing to ffmpeg")
+        self.stall_timer = PoorTimer("drawing stalled on full queue")
+        self.idle_timer = PoorTimer("writer idle on empty queue")
+        self.max_depth = 0
+        self._depth_total = 0
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._finish()
+        if exc_type is None:
+            self._raise_if_failed()
+
+    def _run(self):
+        while True:
+            args = self.idle_timer.time(self._queue.get)
+            if args is _STOP:
+                return
+            # keep draining after a failure, so write() never blocks on a queue that won't empty
+            if self._error is None:
+                try:
+                    self.write_timer.time(lambda: self.writer.write(*args))
+                except BaseException as e:
+                    self._error = e
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    def _finish(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def write(self, *args):
+        self._raise_if_failed()
+
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+
+        self.stall_timer.time(lambda: self._queue.put(args))
+
+    @property
+    def avg_depth(self) -> float:
+        if self.stall_timer.count > 0:
+            return self._depth_total / self.stall_timer.count
+        return 0
+
+    @property
+    def bound(self) -> str:
+        """
+        If the writer spent more time waiting for frames than drawing waited for the writer, then
+        drawing is the bottleneck, otherwise it is ffmpeg
+        """
+        return "render-bound" if self.idle_timer.total >= self.stall_timer.total else "encode-bound"
+
+    def __str__(self):
+        return f"Frame queue (size {self.queue_size}) - Avg depth: {self.avg_depth:.2f}, Max depth: {self.max_depth}, " \
+               f"Drawing stalled: {self.stall_timer.seconds:.3f}s, Writer idle: {self.idle_timer.seconds:.3f}s " \
+               f"- {self.bound}"
@@ -1,19 +1,25 @@
 import bisect
+import copy
 import datetime
+import sys
 from datetime import timedelta
 from pathlib import Path
-from typing import Callable, List, MutableMapping
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
 
 from gopro_overlay import timeseries_process
 from gopro_overlay.entry import Entry
-from gopro_overlay.ffmpeg import load_gpmd_from, MetaMeta
-from gopro_overlay.gpmd import GoproMeta
-from gopro_overlay.gpmd_calculate import timestamp_calculator_for_packet_type
+from gopro_overlay.ffmpeg import load_gpmd_from, gpmd_packets_from, MetaMeta
+from gopro_overlay.framemeta_columns import encode, decode, Reader
+from gopro_overlay.gpmd import GoproMeta, GoproMetaStream
+from gopro_overlay.gpmd_calculate import timestamp_calculator_for_packet_type, timestamp_calculators
+from gopro_overlay.gpmd_parallel import Handoff, packet_ranges, handoffs, map_in_processes
+from gopro_overlay.gpmd_visitors import FanOutVisitor
 from gopro_overlay.gpmd_visitors_cori import CORIVisitor, CORIComponentConverter
-from gopro_overlay.gpmd_visitors_gps import GPS5EntryConverter, GPSVisitor, NullGPSLockFilter
+from gopro_overlay.gpmd_visitors_gps import GPS5EntryConverter, GPSVisitor, NullGPSLockFilter, GPSLockLog
 from gopro_overlay.gpmd_visitors_grav import GRAVisitor, GRAVComponentConverter
 from gopro_overlay.gpmd_visitors_xyz import XYZVisitor, XYZComponentConverter
 from gopro_overlay.log import log
+from gopro_overlay.sensors import SensorSeries, sensor_visitors
 from gopro_overlay.timeunits import Timeunit, timeunits
 from gopro_overlay.timing import PoorTimer
 
@@ -23,6 +29,10 @@ class View:
         self.data = data
         self.version = version
 
+    def __eq__(self, other):
+        return isinstance(other, View) and self.data == other.data
+
+
 
 class Window:
 
@@ -217,72 +227,86 @@ class FrameMeta:
         return self.framelist[-1]
 
 
-def gps_framemeta(meta: GoproMeta, units, metameta=None, gps_lock_filter=NullGPSLockFilter()):
-    frame_meta = FrameMeta()
+def _gps_visitor(frame_meta: FrameMeta, units, calculator, gps_lock_filter, counter=0, total_samples=0,
+                 lock_log=None):
+    return GPSVisitor(
+        converter=GPS5EntryConverter(
+            units,
+            calculator=calculator,
+            on_item=lambda c, e: frame_meta.add(c, e),
+            gps_lock_filter=gps_lock_filter,
+            total_samples=total_samples,
+            lock_log=lock_log
+        ).convert,
+        counter=counter
+    )
 
-    meta.accept(
-        GPSVisitor(
-            converter=GPS5EntryConverter(
-                units,
-                calculator=timestamp_calculator_for_packet_type(meta, metameta, "GPS5"),
-                on_item=lambda c, e: frame_meta.add(c, e),
-                gps_lock_filter=gps_lock_filter
-            ).convert
-        )
+
+def _accl_visitor(frame_meta: FrameMeta, units, calculator, counter=0, total_samples=0):
+    return XYZVisitor(
+        "ACCL",
+        on_item=XYZComponentConverter(
+            frame_calculator=calculator,
+            units=units,
+            on_item=lambda t, x: frame_meta.add(t, x),
+            total_samples=total_samples
+        ).convert,
+        counter=counter
     )
 
-    return frame_meta
 
+def _accl_smooth(frame_meta: FrameMeta):
+    kalman = timeseries_process.process_kalman_pp3("accl", lambda i: i.accl)
+    frame_meta.process(kalman)
+
+
+def _grav_visitor(frame_meta: FrameMeta, units, calculator, counter=0, total_samples=0):
+    return GRAVisitor(
+        on_item=GRAVComponentConverter(
+            frame_calculator=calculator,
+            units=units,
+            on_item=lambda t, x: frame_meta.add(t, x),
+            total_samples=total_samples
+        ).convert,
+        counter=counter
+    )
 
-def accl_framemeta(meta, units, metameta=None):
-    framemeta = FrameMeta()
 
-    meta.accept(
-        XYZVisitor(
-            "ACCL",
-            on_item=XYZComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(meta, metameta, "ACCL"),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x)
-            ).convert
-        )
+def _cori_visitor(frame_meta: FrameMeta, units, calculator, counter=0, total_samples=0):
+    return CORIVisitor(
+        on_item=CORIComponentConverter(
+            frame_calculator=calculator,
+            units=units,
+            on_item=lambda t, x: frame_meta.add(t, x),
+            total_samples=total_samples
+        ).convert,
+        counter=counter
     )
 
-    kalman = timeseries_process.process_kalman_pp3("accl", lambda i: i.accl)
-    framemeta.process(kalman)
 
-    return framemeta
+def gps_framemeta(meta: GoproMeta, units, metameta=None, gps_lock_filter=NullGPSLockFilter()):
+    frame_meta = FrameMeta()
+    calculator = timestamp_calculator_for_packet_type(meta, metameta, "GPS5")
+    meta.accept(_gps_visitor(frame_meta, units, calculator, gps_lock_filter))
+    return frame_meta
 
 
-def grav_framemeta(meta, units, metameta=None):
+def accl_framemeta(meta, units, metameta=None):
     framemeta = FrameMeta()
+    meta.accept(_accl_visitor(framemeta, units, timestamp_calculator_for_packet_type(meta, metameta, "ACCL")))
+    _accl_smooth(framemeta)
+    return framemeta
 
-    meta.accept(
-        GRAVisitor(
-            on_item=GRAVComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(meta, metameta, "GRAV"),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x)
-            ).convert
-        )
-    )
 
+def grav_framemeta(meta, units, metameta=None):
+    framemeta = FrameMeta()
+    meta.accept(_grav_visitor(framemeta, units, timestamp_calculator_for_packet_type(meta, metameta, "GRAV")))
     return framemeta
 
 
 def cori_framemeta(meta, units, metameta=None):
     framemeta = FrameMeta()
-
-    meta.accept(
-        CORIVisitor(
-            on_item=CORIComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(meta, metameta, "CORI"),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x)
-            ).convert
-        )
-    )
-
+    meta.accept(_cori_visitor(framemeta, units, timestamp_calculator_for_packet_type(meta, metameta, "CORI")))
     return framemeta
 
 
@@ -294,41 +318,185 @@ def merge_frame_meta(gps: FrameMeta, other: FrameMeta, update: Callable[[FrameMe
             item.update(**update(closest_previous))
 
 
-def parse_gopro(gpmd_from, units, metameta: MetaMeta, gps_lock_filter=NullGPSLockFilter()):
-    with PoorTimer("parsing").timing():
-        with PoorTimer("GPMD", 1).timing():
-            gopro_meta = GoproMeta.parse(gpmd_from)
+def refilter_gps_lock(frame_meta: FrameMeta, lock_log: GPSLockLog, units, gps_lock_filter):
+    """
+    apply a lock filter to a framemeta that was parsed without one, as if it had been given to parse_gopro, using the
+    lock log recorded as it was parsed - so the filter sees every sample, in the order it would have
+    """
+    if isinstance(gps_lock_filter, NullGPSLockFilter):
+        return
 
-        with PoorTimer("extract GPS", 1).timing():
-            gps_frame_meta = gps_framemeta(gopro_meta, units, metameta=metameta, gps_lock_filter=gps_lock_filter)
+    for frame_time, fix in lock_log.replay(gps_lock_filter).items():
+        frame_meta.get(frame_time, interpolate=False).update(gpsfix=fix.value, gpslock=units.Quantity(fix.value))
 
-        with PoorTimer("extract ACCL", 1).timing():
-            merge_frame_meta(
-                gps_frame_meta,
-                accl_framemeta(gopro_meta, units, metameta=metameta),
-                lambda a: {"accl": a.accl}
-            )
 
-        with PoorTimer("extract GRAV", 1).timing():
-            merge_frame_meta(
-                gps_frame_meta,
-                grav_framemeta(gopro_meta, units, metameta=metameta),
-                lambda a: {"grav": a.grav}
-            )
+extracted_types = ["GPS5", "ACCL", "GRAV", "CORI"]
+# their converters don't ask the calculators about packets without any samples - ACCL's does
+skips_empty = ["GPS5", "GRAV", "CORI"]
+
+# below this many packets (about 20 minutes of footage), starting processes costs more than it saves
+parallel_packets = 1200
 
-        with PoorTimer("extract CORI", 1).timing():
-            merge_frame_meta(
-                gps_frame_meta,
-                cori_framemeta(gopro_meta, units, metameta=metameta),
-                lambda a: {"cori": a.cori, "ori": a.ori}
+
+def _extract(meta, units, calculators, gps_lock_filter, counter=0, total_samples=None, lock_log=None,
+             sensors: Optional[Dict[str, SensorSeries]] = None, sensor_calculators=None,
+             sensor_samples=None) -> List[FrameMeta]:
+    total_samples = total_samples if total_samples is not None else {t: 0 for t in extracted_types}
+    gps_frame_meta, accl, grav, cori = FrameMeta(), FrameMeta(), FrameMeta(), FrameMeta()
+    sensors = sensors if sensors is not None else {}
+    meta.accept(
+        FanOutVisitor(
+            _gps_visitor(
+                gps_frame_meta, units, calculators["GPS5"], gps_lock_filter, counter, total_samples["GPS5"], lock_log
+            ),
+            _accl_visitor(accl, units, calculators["ACCL"], counter, total_samples["ACCL"]),
+            _grav_visitor(grav, units, calculators["GRAV"], counter, total_samples["GRAV"]),
+            _cori_visitor(cori, units, calculators["CORI"], counter, total_samples["CORI"]),
+            *sensor_visitors(sensors, sensor_calculators, counter, sensor_samples),
+        )
+    )
+    return [gps_frame_meta, accl, grav, cori]
+
+
+def _extract_in_processes(meta: GoproMeta, units, calculators, processes: int,
+                          sensors: Optional[Dict[str, SensorSeries]] = None,
+                          sensor_calculators=None) -> Tuple[List[FrameMeta], GPSLockLog]:
+    """
+    As _extract, with no lock filter, but with runs of packets extracted on separate processes, each starting with
+    the state the visitors would have had at that packet. The extracted entries come back as columns, along with the
+    lock log of each run, so the lock filter - which needs every sample, in order - can be applied afterwards.
+    The samples of each run's sensor series are added to those of sensors, in order.
+    """
+    sensors = sensors if sensors is not None else {}
+    ranges = packet_ranges(meta, processes)
+    runs = handoffs(meta, calculators, ranges, skips_empty)
+    # the series' converters ask about every packet, even those without samples
+    sensor_runs = handoffs(meta, sensor_calculators, ranges, []) if sensors else [None] * len(runs)
+
+    def extract(handoffs_of_run: Tuple[Handoff, Optional[Handoff]]):
+        handoff, sensor_handoff = handoffs_of_run
+        lock_log = GPSLockLog()
+        found = {name: SensorSeries(name) for name in sensors}
+        extracted = _extract(
+            GoproMeta(meta[handoff.start:handoff.end]), units, handoff.calculators, NullGPSLockFilter(),
+            handoff.counter, handoff.total_samples, lock_log, found,
+            sensor_calculators=sensor_handoff.calculators if sensor_handoff else None,
+            sensor_samples=sensor_handoff.total_samples if sensor_handoff else None
+        )
+        columns = [(header, b"".join(blob.tobytes() for blob in blobs)) for header, blobs in map(encode, extracted)]
+        return columns, (len(lock_log), b"".join(c.tobytes() for c in lock_log.columns())), found
+
+    merged = [FrameMeta(), FrameMeta(), FrameMeta(), FrameMeta()]
+    lock_log = GPSLockLog()
+    for columns, (samples, data), found in map_in_processes(extract, list(zip(runs, sensor_runs))):
+        for frame_meta, (header, frame_data) in zip(merged, columns):
+            decode(header, frame_data, 0, units, frame_meta)
+        reader = Reader(data, 0, sys.byteorder)
+        lock_log.extend(GPSLockLog([reader.take(t, samples) for t in GPSLockLog.typecodes.values()]))
+        for name, series in found.items():
+            sensors[name].append(series)
+    return merged, lock_log
+
+
+def parse_gopro(gpmd_from, units, metameta: MetaMeta, gps_lock_filter=NullGPSLockFilter(), processes=1,
+                lock_log: Optional[GPSLockLog] = None, sensors: Optional[Dict[str, SensorSeries]] = None):
+    """
+    gpmd_from is either the whole GPMD track, or a GoproMetaStream of its packets, which is visited twice - to find
+    the timestamps, and then to extract - so neither the track, nor all its items, are ever held at once.
+
+    processes > 1 decodes long recordings (at least parallel_packets packets) on that many processes, which needs
+    the whole track.
+
+    lock_log, if given, has what the lock filter was given for every GPS sample added to it, so that another lock
+    filter can be applied later, with refilter_gps_lock
+
+    sensors, if given, maps the names of XYZ streams (ACCL, GYRO) to SensorSeries, which are given every sample of
+    their stream, found along with everything else, rather than the 1 in 10 ACCL samples that become entries
+    """
+    with PoorTimer("parsing").timing():
+        if isinstance(gpmd_from, GoproMetaStream):
+            gopro_meta = gpmd_from
+        else:
+            with PoorTimer("GPMD", 1).timing():
+                gopro_meta = GoproMeta.parse(gpmd_from)
+
+        with PoorTimer("timestamps", 1).timing():
+            calculators = timestamp_calculators(
+                gopro_meta, metameta, extracted_types + [t for t in sensors or [] if t not in extracted_types]
             )
+            # the series' converters are given each packet as well as the entries' ones, so need calculators of their own
+            sensor_calculators = {name: copy.deepcopy(calculators[name]) for name in sensors or []}
+
+        parallel = processes > 1 and isinstance(gopro_meta, GoproMeta) and len(gopro_meta) >= parallel_packets
+
+        with PoorTimer("extract", 1).timing():
+            if parallel:
+                (gps_frame_meta, accl, grav, cori), run_lock_log = _extract_in_processes(
+                    gopro_meta, units, calculators, processes, sensors, sensor_calculators
+                )
+                if lock_log is not None:
+                    lock_log.extend(run_lock_log)
+            else:
+                gps_frame_meta, accl, grav, cori = _extract(
+                    gopro_meta, units, calculators, gps_lock_filter, lock_log=lock_log,
+                    sensors=sensors, sensor_calculators=sensor_calculators
+                )
+            for series in (sensors or {}).values():
+                series.sort()
+
+        with PoorTimer("merge ACCL", 1).timing():
+            _accl_smooth(accl)
+            merge_frame_meta(gps_frame_meta, accl, lambda a: {"accl": a.accl})
+
+        with PoorTimer("merge GRAV", 1).timing():
+            merge_frame_meta(gps_frame_meta, grav, lambda a: {"grav": a.grav})
+
+        with PoorTimer("merge CORI", 1).timing():
+            merge_frame_meta(gps_frame_meta, cori, lambda a: {"cori": a.cori, "ori": a.ori})
+
+        if parallel:
+            # the lock filter keeps state from one sample to the next, so is applied here, to every sample, in order
+            refilter_gps_lock(gps_frame_meta, run_lock_log, units, gps_lock_filter)
 
         return gps_frame_meta
 
 
-def framemeta_from(filepath: Path, units, metameta: MetaMeta, gps_lock_filter=NullGPSLockFilter()):
-    gpmd_from = load_gpmd_from(filepath)
-    return parse_gopro(gpmd_from, units, metameta, gps_lock_filter=gps_lock_filter)
+def _gpmd_of(filepath: Path, metameta: MetaMeta, processes: int):
+    """the whole track, for a recording long enough to be decoded in parallel, otherwise its packets, as they're read"""
+    if processes > 1 and metameta is not None and metameta.frame_count >= parallel_packets:
+        return load_gpmd_from(filepath)
+    return GoproMeta.stream(lambda: gpmd_packets_from(filepath))
+
+
+def framemeta_from(filepath: Path, units, metameta: MetaMeta, gps_lock_filter=NullGPSLockFilter(), cache=None,
+                   processes=1, columnar=False, sensors: Optional[Dict[str, SensorSeries]] = None):
+    """
+    with columnar, and a cache, the telemetry is held as a ColumnarFrameMeta, made from the cached columns
+
+    sensors, as for parse_gopro, is filled from the same parse as the entries, or from the cache
+    """
+    if cache is None:
+        gpmd_from = _gpmd_of(filepath, metameta, processes)
+        return parse_gopro(gpmd_from, units, metameta, gps_lock_filter=gps_lock_filter, processes=processes,
+                           sensors=sensors)
+
+    # the cache holds the telemetry as it is in the file - the lock filter depends on the options, so is applied after
+    loaded = cache.load(filepath, units, metameta, columnar=columnar, sensors=sensors)
+    if loaded is None:
+        lock_log = GPSLockLog()
+        frame_meta = parse_gopro(_gpmd_of(filepath, metameta, processes), units, metameta, processes=processes,
+                                 lock_log=lock_log, sensors=sensors)
+        cache.save(filepath, metameta, frame_meta, lock_log, sensors)
+        if columnar:
+            loaded = cache.load(filepath, units, metameta, columnar=True)
+            if loaded is None:
+                log("Telemetry could not be stored as columns, so is held as entries")
+
+    if loaded is not None:
+        frame_meta, lock_log = loaded
+
+    refilter_gps_lock(frame_meta, lock_log, units, gps_lock_filter)
+    return frame_meta
 
 
 def framemeta_from_datafile(datapath, units, metameta: MetaMeta):
@@ -0,0 +1,367 @@
+import bisect
+import collections
+import datetime
+import math
+import weakref
+from array import array
+from datetime import timedelta
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Union
+
+import pint
+
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import Stepper, max_distance
+from gopro_overlay.framemeta_columns import kind_of, kinds, epoch, one_us, encode, Reader, Unsupported, _Kind
+from gopro_overlay.log import log
+from gopro_overlay.timeunits import Timeunit
+
+nan = float("nan")
+
+
+class Column:
+    """one item of every row, as `width` doubles a row - NaN where a row doesn't have it - with a single unit"""
+
+    def __init__(self, name: str, kind: _Kind, unit, data: array, integral: bool):
+        self.name = name
+        self.kind = kind
+        self.unit = unit
+        self.integral = integral
+        self.data = data
+
+    @staticmethod
+    def empty(name: str, kind: _Kind, unit, rows: int) -> 'Column':
+        return Column(name, kind, unit, array("d", [nan]) * (rows * kind.width), integral=True)
+
+    def get(self, units, row: int):
+        width = self.kind.width
+        start = row * width
+        if math.isnan(self.data[start]):
+            return None
+        parts = self.data[start:start + width]
+        if self.integral:
+            parts = [int(p) for p in parts]
+        return self.kind.value(units, self.unit, parts)
+
+    def set(self, row: int, v):
+        width = self.kind.width
+        start = row * width
+        if v is None:
+            self.data[start:start + width] = array("d", [nan]) * width
+            return
+        if not self.kind.matches(v):
+            raise Unsupported(f"'{self.name}' can't hold {type(v).__name__}")
+        if self.kind.unit(v) != self.unit:
+            try:
+                v = self.kind.converted(v, self.unit)
+            except pint.DimensionalityError:
+                raise Unsupported(f"'{self.name}' can't hold {v}, as it is in {self.unit}") from None
+        parts = self.kind.parts(v)
+        if self.integral and any(type(p) is not int for p in parts):
+            self.integral = False
+        self.data[start:start + width] = array("d", parts)
+
+    def insert(self, row: int):
+        start = row * self.kind.width
+        self.data[start:start] = array("d", [nan]) * self.kind.width
+
+    def copy(self) -> 'Column':
+        return Column(self.name, self.kind, self.unit, array("d", self.data), self.integral)
+
+
+class ObjectColumn:
+    """
+    one item of every row, as the values themselves - None where a row doesn't have it - for an item that a Column
+    can't hold, because its values aren't all of one kind, or unit, or aren't numbers at all
+    """
+
+    def __init__(self, name: str, values: list):
+        self.name = name
+        self.values = values
+
+    @staticmethod
+    def of(column: Column, units, rows: int) -> 'ObjectColumn':
+        return ObjectColumn(column.name, [column.get(units, row) for row in range(rows)])
+
+    def get(self, units, row: int):
+        return self.values[row]
+
+    def set(self, row: int, v):
+        self.values[row] = v
+
+    def insert(self, row: int):
+        self.values.insert(row, None)
+
+    def copy(self) -> 'ObjectColumn':
+        return ObjectColumn(self.name, list(self.values))
+
+
+class Row:
+    """
+    A view of one row of a ColumnarFrameMeta, that looks like an Entry. Each item is made from its column the first
+    time it is read, and then kept on the view, so reading it again is a plain attribute lookup.
+    """
+
+    def __init__(self, fm: 'ColumnarFrameMeta', row: int):
+        self._fm = fm
+        self._row = row
+
+    @property
+    def dt(self) -> datetime.datetime:
+        return epoch + timedelta(microseconds=self._fm.dts[self._row])
+
+    @property
+    def items(self) -> dict:
+        found = {name: getattr(self, name) for name in self._fm.columns}
+        return {k: v for k, v in found.items() if v is not None}
+
+    def update(self, **kwargs):
+        for name, v in kwargs.items():
+            if v is None and name not in self._fm.columns:
+                continue
+            self._fm.set(self._row, name, v)
+            self.__dict__.pop(name, None)
+
+    def forget(self):
+        """the items read so far are read again, from the columns"""
+        for name in [name for name in self.__dict__ if not name.startswith("_")]:
+            del self.__dict__[name]
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        column = self._fm.columns.get(item)
+        value = column.get(self._fm.units, self._row) if column is not None else None
+        self.__dict__[item] = value
+        return value
+
+    def __str__(self):
+        return f"Entry: {self.dt} - {self.items}"
+
+
+class Frames(Mapping):
+    """the rows of a ColumnarFrameMeta, by frame time, like FrameMeta.frames"""
+
+    def __init__(self, fm: 'ColumnarFrameMeta'):
+        self._fm = fm
+
+    def __getitem__(self, frame_time: Timeunit) -> Row:
+        return self._fm.get(frame_time, interpolate=False)
+
+    def __iter__(self) -> Iterator[Timeunit]:
+        return iter(self._fm.framelist)
+
+    def __len__(self):
+        return len(self._fm)
+
+
+class ColumnarFrameMeta:
+    """
+    The same as a FrameMeta, but with the entries held as columns - the frame times and datetimes as int64
+    microseconds, and each item as doubles with its unit held once - rather than as an Entry of pint Quantities for
+    each frame. It is made straight from the columns that framemeta_columns.encode makes (as the telemetry cache
+    stores them), and rows are read (and updated) through views that look like entries.
+
+    The views of the most recently used rows are kept, so the widgets reading the same row for frame after frame
+    don't make its items over and over. There is only ever one view of a row, so an update through one is never
+    missed by another.
+
+    An item whose values a Column can't hold - values of another kind, or in an incompatible unit, written by an
+    update - is moved to an ObjectColumn, which holds them as they are, as the entries of a FrameMeta would.
+    Rows can be added, as they can to a FrameMeta, but each add moves the rows after it, so is slow.
+    """
+
+    def __init__(self, units, times: array, dts: array, columns: Dict[str, Union[Column, ObjectColumn]],
+                 recent_rows: int = 256):
+        self.units = units
+        self.times = times
+        self.dts = dts
+        self.columns = columns
+        self._framelist: Optional[List[Timeunit]] = None
+        self._rows = collections.OrderedDict()
+        self._views = weakref.WeakValueDictionary()
+        self._recent_rows = recent_rows
+
+    @staticmethod
+    def decode(header: dict, data, offset: int, units) -> 'ColumnarFrameMeta':
+        """from the columns framemeta_columns.encode made, without making any entries"""
+        rows = header["rows"]
+        reader = Reader(data, offset, header["byteorder"])
+
+        times = reader.take("q", rows)
+        dts = reader.take("q", rows)
+
+        columns = {}
+        for c in header["columns"]:
+            kind = kinds[c["kind"]]
+            unit = units.Unit(c["unit"]) if c["unit"] is not None else None
+            present = reader.take("B", rows) if c["sparse"] else None
+            count = sum(present) if present is not None else rows
+            values = reader.take(c["typecode"], count * kind.width)
+
+            if present is None:
+                flat = array("d", values)
+            else:
+                flat = array("d", [nan]) * (rows * kind.width)
+                it = iter(values)
+                for row, p in enumerate(present):
+                    if p:
+                        start = row * kind.width
+                        for i in range(kind.width):
+                            flat[start + i] = next(it)
+
+            columns[c["name"]] = Column(c["name"], kind, unit, flat, integral=c["typecode"] == "q")
+
+        return ColumnarFrameMeta(units, times, dts, columns)
+
+    @staticmethod
+    def of(frame_meta, units) -> 'ColumnarFrameMeta':
+        header, blobs = encode(frame_meta)
+        return ColumnarFrameMeta.decode(header, b"".join(blob.tobytes() for blob in blobs), 0, units)
+
+    def _column_for(self, name: str, v) -> Union[Column, ObjectColumn]:
+        column = self.columns.get(name)
+        if column is None:
+            try:
+                kind = kind_of(name, v)
+                column = Column.empty(name, kind, kind.unit(v), len(self.times))
+            except Unsupported:
+                column = ObjectColumn(name, [None] * len(self.times))
+            self.columns[name] = column
+        return column
+
+    def set(self, row: int, name: str, v):
+        column = self._column_for(name, v)
+        try:
+            column.set(row, v)
+        except Unsupported as e:
+            log(f"Holding the values of '{name}' as they are, not as numbers - {e}")
+            column = self.columns[name] = ObjectColumn.of(column, self.units, len(self.times))
+            column.set(row, v)
+
+    def add(self, at_time: Timeunit, entry: Entry):
+        index = bisect.bisect_left(self.times, at_time.us)
+        if index == len(self.times) or self.times[index] != at_time.us:
+            self._insert(index, at_time)
+        self.dts[index] = (entry.dt - epoch) // one_us
+        for name in self.columns:
+            self.set(index, name, None)
+        for name, v in entry.items.items():
+            self.set(index, name, v)
+        view = self._views.get(index)
+        if view is not None:
+            view.forget()
+
+    def _insert(self, index: int, at_time: Timeunit):
+        self.times.insert(index, at_time.us)
+        self.dts.insert(index, 0)
+        for column in self.columns.values():
+            column.insert(index)
+        self._framelist = None
+
+        # the views of the rows from here on are of the row after the one they were
+        views = {(i + 1 if i >= index else i): view for i, view in self._views.items()}
+        for i, view in views.items():
+            view._row = i
+        self._views = weakref.WeakValueDictionary(views)
+        self._rows = collections.OrderedDict((i + 1 if i >= index else i, view) for i, view in self._rows.items())
+
+    def clone(self) -> 'ColumnarFrameMeta':
+        """a copy of the rows, which can be updated, or added to, without changing these"""
+        return ColumnarFrameMeta(
+            self.units, array("q", self.times), array("q", self.dts),
+            {name: column.copy() for name, column in self.columns.items()}, self._recent_rows
+        )
+
+    @property
+    def frames(self) -> Frames:
+        return Frames(self)
+
+    def _row(self, index: int) -> Row:
+        row = self._rows.get(index)
+        if row is None:
+            row = self._views.get(index)
+            if row is None:
+                row = self._views[index] = Row(self, index)
+            self._rows[index] = row
+            if len(self._rows) > self._recent_rows:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(index)
+        return row
+
+    @property
+    def framelist(self) -> List[Timeunit]:
+        if self._framelist is None:
+            self._framelist = [Timeunit(t) for t in self.times]
+        return self._framelist
+
+    def __len__(self):
+        return len(self.times)
+
+    def check_modified(self):
+        pass
+
+    def stepper(self, step: Timeunit):
+        return Stepper(self, step)
+
+    @property
+    def min(self):
+        return Timeunit(self.times[0])
+
+    @property
+    def max(self):
+        return Timeunit(self.times[-1])
+
+    @property
+    def mid(self):
+        return self.min + ((self.max - self.min) / 2)
+
+    def get(self, frame_time: Timeunit, interpolate=True) -> Row:
+        index = bisect.bisect_left(self.times, frame_time.us)
+        if index < len(self.times) and self.times[index] == frame_time.us:
+            return self._row(index)
+
+        if not interpolate:
+            raise KeyError(f"Frame at {frame_time}ms not found")
+
+        if frame_time < self.min:
+            log(f"Request for data at time {frame_time}, before start of metadata, returning first item")
+            return self._row(0)
+
+        if frame_time > self.max:
+            log(f"Request for data at time {frame_time}, after end of metadata, returning last item")
+            return self._row(len(self.times) - 1)
+
+        delta = frame_time - Timeunit(self.times[index - 1])
+        if delta > max_distance:
+            log(f"Closest item to wanted time {frame_time} is {delta} away")
+
+        return self._row(index - 1)
+
+    def items(self, step: timedelta = timedelta(seconds=0)):
+        last = None
+        step_us = step // one_us
+
+        for row, dt in enumerate(self.dts):
+            if last is None or dt >= last + step_us:
+                last = dt
+                yield self._row(row)
+
+    def process_deltas(self, processor, skip=1, filter_fn: Callable[[Row], bool] = lambda e: True):
+        for a in range(len(self.times) - skip):
+            entry_a, entry_b = self._row(a), self._row(a + skip)
+            if filter_fn(entry_a) and filter_fn(entry_b):
+                updates = processor(entry_a, entry_b, skip)
+                if updates:
+                    entry_a.update(**updates)
+
+    def process(self, processor, filter_fn: Callable[[Row], bool] = lambda e: True):
+        for row in range(len(self.times)):
+            entry = self._row(row)
+            if filter_fn(entry):
+                updates = processor(entry)
+                if updates:
+                    entry.update(**updates)
+
+    def duration(self):
+        return self.max
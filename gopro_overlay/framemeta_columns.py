@@ -0,0 +1,281 @@
+import datetime
+import sys
+from array import array
+from typing import Optional, Tuple, List
+
+import pint
+
+from gopro_overlay.entry import Entry
+from gopro_overlay.gpmd_visitors_cori import Orientation
+from gopro_overlay.point import Point, Point3, PintPoint3, Quaternion
+from gopro_overlay.timeunits import Timeunit
+
+epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+one_us = datetime.timedelta(microseconds=1)
+
+
+class Unsupported(ValueError):
+    pass
+
+
+class _Kind:
+    """how the values of one entry item are stored: each value is `width` numbers, all with the same unit"""
+    name = None
+    width = 1
+
+    def matches(self, v) -> bool:
+        raise NotImplementedError
+
+    def unit(self, v):
+        return None
+
+    def parts(self, v) -> tuple:
+        raise NotImplementedError
+
+    def values(self, units, unit: Optional[str], flat: array) -> list:
+        raise NotImplementedError
+
+    def value(self, units, unit, parts):
+        """a single value from its parts, unit being the pint Unit, or None"""
+        raise NotImplementedError
+
+    def converted(self, v, unit):
+        return v
+
+
+class _Number(_Kind):
+    name = "number"
+
+    def matches(self, v):
+        return type(v) in (int, float)
+
+    def parts(self, v):
+        return v,
+
+    def values(self, units, unit, flat):
+        return flat.tolist()
+
+    def value(self, units, unit, parts):
+        return parts[0]
+
+
+class _Quantity(_Kind):
+    name = "quantity"
+
+    def matches(self, v):
+        return isinstance(v, pint.Quantity)
+
+    def unit(self, v):
+        return v.units
+
+    def parts(self, v):
+        return v.magnitude,
+
+    def values(self, units, unit, flat):
+        q, u = units.Quantity, units.Unit(unit)
+        return [q(m, u) for m in flat]
+
+    def value(self, units, unit, parts):
+        return units.Quantity(parts[0], unit)
+
+    def converted(self, v, unit):
+        return v.to(unit)
+
+
+class _Point(_Kind):
+    name = "point"
+    width = 2
+
+    def matches(self, v):
+        return type(v) is Point
+
+    def parts(self, v):
+        return v.lat, v.lon
+
+    def values(self, units, unit, flat):
+        return [Point(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+    def value(self, units, unit, parts):
+        return Point(*parts)
+
+
+class _PintPoint3(_Kind):
+    name = "pintpoint3"
+    width = 3
+
+    def matches(self, v):
+        return type(v) is PintPoint3
+
+    def unit(self, v):
+        if not (v.x.units == v.y.units == v.z.units):
+            raise Unsupported(f"Mixed units in {v}")
+        return v.x.units
+
+    def parts(self, v):
+        return v.x.magnitude, v.y.magnitude, v.z.magnitude
+
+    def values(self, units, unit, flat):
+        q, u = units.Quantity, units.Unit(unit)
+        return [PintPoint3(q(flat[i], u), q(flat[i + 1], u), q(flat[i + 2], u)) for i in range(0, len(flat), 3)]
+
+    def value(self, units, unit, parts):
+        q = units.Quantity
+        return PintPoint3(q(parts[0], unit), q(parts[1], unit), q(parts[2], unit))
+
+    def converted(self, v, unit):
+        return PintPoint3(v.x.to(unit), v.y.to(unit), v.z.to(unit))
+
+
+class _Quaternion(_Kind):
+    name = "quaternion"
+    width = 4
+
+    def matches(self, v):
+        return type(v) is Quaternion and type(v.v) is Point3
+
+    def parts(self, v):
+        return v.w, v.v.x, v.v.y, v.v.z
+
+    def values(self, units, unit, flat):
+        return [Quaternion(flat[i], Point3(flat[i + 1], flat[i + 2], flat[i + 3])) for i in range(0, len(flat), 4)]
+
+    def value(self, units, unit, parts):
+        return Quaternion(parts[0], Point3(*parts[1:]))
+
+
+class _Orientation(_Kind):
+    name = "orientation"
+    width = 3
+
+    def matches(self, v):
+        return type(v) is Orientation
+
+    def unit(self, v):
+        if not (v.roll.units == v.pitch.units == v.yaw.units):
+            raise Unsupported(f"Mixed units in {v}")
+        return v.roll.units
+
+    def parts(self, v):
+        return v.roll.magnitude, v.pitch.magnitude, v.yaw.magnitude
+
+    def values(self, units, unit, flat):
+        q, u = units.Quantity, units.Unit(unit)
+        return [Orientation(q(flat[i], u), q(flat[i + 1], u), q(flat[i + 2], u)) for i in range(0, len(flat), 3)]
+
+    def value(self, units, unit, parts):
+        q = units.Quantity
+        return Orientation(q(parts[0], unit), q(parts[1], unit), q(parts[2], unit))
+
+    def converted(self, v, unit):
+        return Orientation(v.roll.to(unit), v.pitch.to(unit), v.yaw.to(unit))
+
+
+kinds = {k.name: k for k in [_Number(), _Quantity(), _Point(), _PintPoint3(), _Quaternion(), _Orientation()]}
+
+
+def kind_of(name, v) -> _Kind:
+    for kind in kinds.values():
+        if kind.matches(v):
+            return kind
+    raise Unsupported(f"Don't know how to store '{name}' of type {type(v).__name__}")
+
+
+def _typecode(name, parts) -> str:
+    types = set(map(type, parts))
+    if types <= {int}:
+        return "q"
+    if types <= {float}:
+        return "d"
+    raise Unsupported(f"'{name}' has values of types {sorted(t.__name__ for t in types)}")
+
+
+def encode(frame_meta) -> Tuple[dict, List[array]]:
+    """
+    The entries of the framemeta as columns - the frame times, the datetimes, and one for each item, holding
+    only the entries that have that item.
+    """
+    frame_meta.check_modified()
+    times = frame_meta.framelist
+    entries = [frame_meta.frames[t] for t in times]
+
+    dts = array("q")
+    for entry in entries:
+        if entry.dt.utcoffset() != datetime.timedelta(0):
+            raise Unsupported(f"Datetime {entry.dt} is not UTC")
+        dts.append((entry.dt - epoch) // one_us)
+
+    names = dict.fromkeys(name for entry in entries for name in entry.items)
+
+    columns = []
+    blobs = [array("q", [t.us for t in times]), dts]
+    for name in names:
+        values = [entry.items.get(name) for entry in entries]
+        present = [v for v in values if v is not None]
+
+        kind = kind_of(name, present[0])
+        unit = kind.unit(present[0])
+        parts = []
+        for v in present:
+            if not kind.matches(v) or kind.unit(v) != unit:
+                raise Unsupported(f"'{name}' has values of different kinds, or units")
+            parts.extend(kind.parts(v))
+
+        sparse = len(present) != len(values)
+        if sparse:
+            blobs.append(array("B", [v is not None for v in values]))
+
+        typecode = _typecode(name, parts)
+        blobs.append(array(typecode, parts))
+        columns.append({
+            "name": name, "kind": kind.name, "unit": str(unit) if unit is not None else None, "typecode": typecode,
+            "sparse": sparse
+        })
+
+    return {"rows": len(times), "byteorder": sys.byteorder, "columns": columns}, blobs
+
+
+class Reader:
+    """arrays, one after another, from data written with array.tobytes() on a machine of the given byteorder"""
+
+    def __init__(self, data, offset: int, byteorder: str):
+        self.data = data
+        self.offset = offset
+        self.swap = byteorder != sys.byteorder
+
+    def take(self, typecode: str, count: int) -> array:
+        a = array(typecode)
+        end = self.offset + count * a.itemsize
+        if end > len(self.data):
+            raise ValueError("Telemetry cache is truncated")
+        a.frombytes(self.data[self.offset:end])
+        if self.swap:
+            a.byteswap()
+        self.offset = end
+        return a
+
+
+def decode(header: dict, data, offset: int, units, frame_meta):
+    """adds the entries that encode made columns of back into frame_meta"""
+    rows = header["rows"]
+    take = Reader(data, offset, header["byteorder"]).take
+
+    times = take("q", rows)
+    dts = take("q", rows)
+
+    items = []
+    for column in header["columns"]:
+        kind = kinds[column["kind"]]
+        present = take("B", rows) if column["sparse"] else None
+        count = sum(present) if present is not None else rows
+        values = kind.values(units, column["unit"], take(column["typecode"], count * kind.width))
+        if present is not None:
+            it = iter(values)
+            values = [next(it) if p else None for p in present]
+        items.append((column["name"], values))
+
+    for row in range(rows):
+        frame_meta.add(
+            Timeunit(times[row]),
+            Entry(epoch + datetime.timedelta(microseconds=dts[row]), **{name: values[row] for name, values in items})
+        )
+    return frame_meta
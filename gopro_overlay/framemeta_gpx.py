@@ -64,7 +64,8 @@ def merge_gpx_with_gopro(gpx_timeseries: Timeseries, gopro_framemeta: FrameMeta)
     gopro_framemeta.process(processor)
 
 
-def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datetime.datetime = None, duration: Timeunit = None) -> FrameMeta:
+def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datetime.datetime = None, duration: Timeunit = None,
+                            step: Timeunit = timeunits(seconds=0.1)) -> FrameMeta:
     fake_frame_meta = FrameMeta()
 
     if start_date is None:
@@ -75,7 +76,7 @@ def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datet
     else:
         end_date = start_date + duration.timedelta()
 
-    stepper = gpx_timeseries.stepper(step=timeunits(seconds=0.1))
+    stepper = gpx_timeseries.stepper(step=step)
 
     for pts in stepper.steps():
 
@@ -103,10 +103,27 @@ def dbm_downloader(dbm_file):
     return partial(caching_downloader, get_key, set_key, fetch_tiles)
 
 
-def dbm_caching_renderer(provider, dbm_file):
+def layered_downloader(dbm_file):
+    """read from the dbm file, but keep new tiles in memory only - for when the dbm file is shared"""
+    local = {}
+
+    def get_key(key):
+        value = local.get(key, None)
+        return value if value is not None else dbm_file.get(key, None)
+
+    def set_key(key, value):
+        if value:
+            local.setdefault(key, value)
+
+    return partial(caching_downloader, get_key, set_key, fetch_tiles)
+
+
+def dbm_caching_renderer(provider, dbm_file, readonly=False):
+    downloader = layered_downloader(dbm_file) if readonly else dbm_downloader(dbm_file)
+
     def render(map, tiles=None, **kwargs):
         map.provider = provider
-        return geotiler.render_map(map, tiles, downloader=dbm_downloader(dbm_file), **kwargs)
+        return geotiler.render_map(map, tiles, downloader=downloader, **kwargs)
 
     return render
 
@@ -190,6 +207,7 @@ class CachingRenderer:
         self.provider = provider_for_style(style, api_key_finder)
 
     @contextlib.contextmanager
-    def open(self):
-        with dbm.ndbm.open(str(self.cache_dir.joinpath("tilecache.ndbm")), "c") as db:
-            yield dbm_caching_renderer(self.provider, db)
+    def open(self, readonly=False):
+        """readonly allows several processes to share the cache - new tiles are not saved"""
+        with dbm.ndbm.open(str(self.cache_dir.joinpath("tilecache.ndbm")), "r" if readonly else "c") as db:
+            yield dbm_caching_renderer(self.provider, db, readonly=readonly)
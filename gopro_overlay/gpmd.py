@@ -1,10 +1,14 @@
 import array
 import collections
+import collections.abc
 import datetime
+import functools
 import itertools
+import operator
 import struct
+import sys
 from enum import Enum
-from typing import List
+from typing import List, Callable, Iterable, Dict, Optional, FrozenSet
 
 from .timeunits import timeunits
 
@@ -39,26 +43,80 @@ type_mappings = {'c': 'c',
                  }
 
 
+# array typecodes of the same size as the struct ones, for decoding many values at once
+array_mappings = {k: v for k, v in {'s': 'h', 'S': 'H', 'f': 'f', 'l': 'i', 'L': 'I', 'B': 'B', 'J': 'Q'}.items()
+                  if array.array(v).itemsize == struct.calcsize('>' + type_mappings[k])}
+
+
+class Samples(collections.abc.Sequence):
+    """
+    An item's values, scaled, decoded all at once into one flat array of doubles, `width` values for each sample.
+    Indexing or iterating gives the same named tuples as interpret(), but only makes them when asked
+    """
+    __slots__ = ["values", "width", "_kind"]
+
+    def __init__(self, values: array.array, width: int, kind):
+        self.values = values
+        self.width = width
+        self._kind = kind
+
+    def __len__(self):
+        return len(self.values) // self.width
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sample index out of range")
+        start = index * self.width
+        return self._kind._make(self.values[start:start + self.width])
+
+    def column(self, n: int) -> array.array:
+        return self.values[n::self.width]
+
+
+def _decode_samples(item, scale, kind) -> Samples:
+    typecode = array_mappings.get(item.type_char)
+    single = _struct_mapping_for(item, repeat=1).size
+    width = item.size // single
+
+    if item.size > 1 and len(scale) == 1:
+        scale = scale * width
+
+    if typecode is None or width * single != item.size or len(scale) != width:
+        return Samples(array.array("d", itertools.chain.from_iterable(_interpret_element(item, scale))), width, kind)
+
+    raw = array.array(typecode)
+    raw.frombytes(item.rawdata[:item.repeat * item.size])
+    if sys.byteorder == "little":
+        raw.byteswap()
+
+    return Samples(array.array("d", map(operator.truediv, raw, itertools.cycle(scale))), width, kind)
+
+
 def _interpret_string(item, *args):
     return str(item.rawdata, encoding='unicode_escape', errors="replace").strip('\0')
 
 
 def _interpret_gps_timestamp(item, *args):
     return datetime.datetime.strptime(
-        item.rawdata.decode(
-            'utf-8',
-            errors='replace'
-        ),
+        str(item.rawdata, encoding='utf-8', errors='replace'),
         '%y%m%d%H%M%S.%f').replace(tzinfo=datetime.timezone.utc)
 
 
+@functools.lru_cache(maxsize=1024)
+def _struct_for(type_char, repeat) -> struct.Struct:
+    return struct.Struct('>' + type_mappings[type_char] * repeat)
+
+
 def _struct_mapping_for(item, repeat=None):
-    repeat = item.repeat if repeat is None else repeat
-    return struct.Struct('>' + type_mappings[item.type_char] * repeat)
+    return _struct_for(item.type_char, item.repeat if repeat is None else repeat)
 
 
 def _interpret_atom(item, *args):
-    return _struct_mapping_for(item).unpack_from(item.rawdata)[0]
+    return item.unpack(_struct_mapping_for(item))[0]
 
 
 def _interpret_timestamp(item, *args):
@@ -66,7 +124,7 @@ def _interpret_timestamp(item, *args):
 
 
 def _interpret_list(item, *args):
-    return _struct_mapping_for(item).unpack_from(item.rawdata)
+    return item.unpack(_struct_mapping_for(item))
 
 
 def _interpret_element(item, scale):
@@ -77,14 +135,14 @@ def _interpret_element(item, scale):
         scale = list(itertools.repeat(scale[0], item.size))
 
     def unpack_single(r):
-        unscaled = mapping.unpack_from(item.rawdata[r * item.size: (r + 1) * item.size])
+        unscaled = item.unpack(mapping, r * item.size)
         return [float(x) / float(y) for x, y in zip(unscaled, scale)]
 
     return [unpack_single(r) for r in range(item.repeat)]
 
 
 def _interpret_gps5(item, scale) -> List[GPS5]:
-    return [GPS5._make(it) for it in _interpret_element(item, scale)]
+    return list(_decode_samples(item, scale, GPS5))
 
 
 def _interpret_gps_precision(item, *args) -> float:
@@ -92,15 +150,15 @@ def _interpret_gps_precision(item, *args) -> float:
 
 
 def _interpret_xyz(item, scale) -> List[XYZ]:
-    return [XYZ._make(it) for it in _interpret_element(item, scale)]
+    return list(_decode_samples(item, scale, XYZ))
 
 
 def _interpret_vector(item, scale) -> List[VECTOR]:
-    return [VECTOR._make(it) for it in _interpret_element(item, scale)]
+    return list(_decode_samples(item, scale, VECTOR))
 
 
 def _interpret_quaternion(item, scale) -> List[QUATERNION]:
-    return [QUATERNION._make(it) for it in _interpret_element(item, scale)]
+    return list(_decode_samples(item, scale, QUATERNION))
 
 
 def _interpret_gps_lock(item, *args) -> GPSFix:
@@ -141,6 +199,23 @@ interpreters = {
 }
 
 
+sample_kinds = {
+    "ACCL": XYZ,
+    "CORI": QUATERNION,
+    "GPS5": GPS5,
+    "GRAV": VECTOR,
+    "GYRO": XYZ,
+}
+
+
+def interpret_samples(item, scale) -> Samples:
+    """like interpret_item, for items of many samples, but all the values are in one array"""
+    try:
+        return _decode_samples(item, scale, sample_kinds[item.fourcc])
+    except KeyError:
+        raise KeyError(f"No sample interpreter is configured for packets of type {item.fourcc}") from None
+
+
 def interpret_item(item, scale=None):
     try:
         return interpreters[item.fourcc](item, scale)
@@ -148,14 +223,59 @@ def interpret_item(item, scale=None):
         raise KeyError(f"No interpreter is configured for packets of type {item.fourcc}") from None
 
 
+class VisitorTable:
+    """
+    Which functions of a visitor handle which fourccs - items: f(visitor, item), containers: f(visitor, item, contents)
+    so visiting doesn't need to look them up by name for every item
+    """
+    __slots__ = ["items", "containers", "wanted"]
+
+    def __init__(self, items: Dict[str, Callable], containers: Dict[str, Callable]):
+        self.items = items
+        self.containers = containers
+        self.wanted = frozenset(items) | frozenset(containers)
+
+    @staticmethod
+    def from_methods(cls) -> 'VisitorTable':
+        return VisitorTable(
+            items={name[3:]: getattr(cls, name) for name in dir(cls) if name.startswith("vi_")},
+            containers={name[4:]: getattr(cls, name) for name in dir(cls) if name.startswith("vic_")},
+        )
+
+
+_class_tables: Dict[type, Optional[VisitorTable]] = {}
+
+
+def visitor_table(visitor) -> Optional[VisitorTable]:
+    """
+    The table a visitor declares, as `visitor_table`, or else one made (once per class) from its vi_XXXX and
+    vic_XXXX methods. None for visitors that make up their methods in __getattr__, which are visited by name.
+    """
+    try:
+        return object.__getattribute__(visitor, "visitor_table")
+    except AttributeError:
+        pass
+
+    cls = type(visitor)
+    try:
+        return _class_tables[cls]
+    except KeyError:
+        table = None if hasattr(cls, "__getattr__") else VisitorTable.from_methods(cls)
+        _class_tables[cls] = table
+        return table
+
+
 class GPMDContainer:
 
+    __slots__ = ["fourcc", "items", "_size", "_repeat", "_padded_length", "_itemset"]
+
     def __init__(self, fourcc, size, repeat, padded_length, items):
         self.fourcc = fourcc
         self.items = items
         self._size = size
         self._repeat = repeat
         self._padded_length = padded_length
+        self._itemset = None
 
     def __str__(self) -> str:
         return f"GPMDContainer: {self.fourcc}" \
@@ -173,34 +293,63 @@ class GPMDContainer:
         return GPMDStruct.size + self._padded_length
 
     @property
-    def itemset(self):
-        return set([i.fourcc for i in self.items])
+    def itemset(self) -> FrozenSet[str]:
+        if self._itemset is None:
+            self._itemset = frozenset(i.fourcc for i in self.items)
+        return self._itemset
 
     def with_type(self, fourcc):
         return [i for i in self.items if i.fourcc == fourcc]
 
     def accept(self, visitor):
+        table = visitor_table(visitor)
 
-        method = f"vic_{self.fourcc}"
-        if hasattr(visitor, method):
+        if table is None:
+            method = f"vic_{self.fourcc}"
+            if not hasattr(visitor, method):
+                return
             container_visitor = getattr(visitor, method)(self, self.itemset)
-
-            if container_visitor is not None:
-                for i in self.items:
-                    i.accept(container_visitor)
-
-                container_visitor.v_end()
+        else:
+            handler = table.containers.get(self.fourcc)
+            if handler is None:
+                return
+            container_visitor = handler(visitor, self, self.itemset)
+
+        if container_visitor is not None:
+            self._visit_items(container_visitor)
+            container_visitor.v_end()
+
+    def _visit_items(self, visitor):
+        table = visitor_table(visitor)
+
+        if table is None:
+            for i in self.items:
+                i.accept(visitor)
+        elif not table.wanted.isdisjoint(self.itemset):
+            items, containers = table.items, table.containers
+            for i in self.items:
+                if type(i) is GPMDContainer:
+                    if i.fourcc in containers:
+                        i.accept(visitor)
+                else:
+                    handler = items.get(i.fourcc)
+                    if handler is not None:
+                        handler(visitor, i)
 
 
 class GPMDItem:
 
-    def __init__(self, fourcc, type_char_code, size, repeat, padded_length, rawdata):
+    __slots__ = ["_fourcc", "_type", "_size", "_repeat", "_padded_length", "_data", "_offset"]
+
+    def __init__(self, fourcc, type_char_code, size, repeat, padded_length, rawdata, offset=0):
         self._fourcc = fourcc
         self._type = chr(type_char_code)
         self._size = size
         self._repeat = repeat
         self._padded_length = padded_length
-        self._rawdata = rawdata
+        # payload is data[offset:offset+padded_length] - only made into a view when asked for
+        self._data = rawdata
+        self._offset = offset
 
     @property
     def repeat(self):
@@ -212,7 +361,14 @@ class GPMDItem:
 
     @property
     def rawdata(self):
-        return self._rawdata
+        if self._data is None:
+            return None
+        if self._offset == 0 and len(self._data) == self._padded_length:
+            return self._data
+        return memoryview(self._data)[self._offset:self._offset + self._padded_length]
+
+    def unpack(self, s: struct.Struct, offset: int = 0):
+        return s.unpack_from(self._data, self._offset + offset)
 
     @property
     def fourcc(self):
@@ -229,10 +385,20 @@ class GPMDItem:
     def interpret(self, scale=None):
         return interpret_item(self, scale)
 
+    def samples(self, scale) -> Samples:
+        return interpret_samples(self, scale)
+
     def accept(self, visitor):
-        method = f"vi_{self.fourcc}"
-        if hasattr(visitor, method):
-            getattr(visitor, method)(self)
+        table = visitor_table(visitor)
+
+        if table is None:
+            method = f"vi_{self.fourcc}"
+            if hasattr(visitor, method):
+                getattr(visitor, method)(self)
+        else:
+            handler = table.items.get(self._fourcc)
+            if handler is not None:
+                handler(visitor, self)
 
     def __str__(self):
         if self.rawdata is None:
@@ -240,7 +406,7 @@ class GPMDItem:
             rawdatas = "null"
         else:
             rawdata = ' '.join(format(x, '02x') for x in self.rawdata)
-            rawdatas = self.rawdata[0:50]
+            rawdatas = bytes(self.rawdata[0:50])
 
         return f"GPMDItem: {self.fourcc}" \
                f", Type={self.type_char}" \
@@ -251,38 +417,43 @@ class GPMDItem:
 
 
 class GPMDParser:
+    """
+    Parses GPMD without copying it - containers are found by offset into the one buffer, and item payloads are
+    memoryviews of it, so the data must not change while the items are in use
+    """
 
-    def __init__(self, data: array.array):
-        self.data = data
+    def __init__(self, data):
+        self.data = memoryview(data).cast("B") if not isinstance(data, memoryview) or data.format != "B" else data
 
     def items(self):
         offset = 0
-        while offset < len(self.data):
-            item = self.from_array(self.data, offset)
+        end = len(self.data)
+        while offset < end:
+            item = self.from_array(self.data, offset, end)
             yield item
             offset += item.bytecount
 
-    def from_array(self, data, offset):
+    def from_array(self, data, offset, end=None):
+        end = len(data) if end is None else end
         fourcc, type_char_code, size, repeat = GPMDStruct.unpack_from(data, offset=offset)
         fourcc = fourcc.decode()
         length = size * repeat
         padded_length = GPMDParser.extend(length)
 
-        if type_char_code != 0 and padded_length >= 0:
-            s = struct.Struct('>' + str(padded_length) + 's')
-            rawdata, = s.unpack_from(data, offset=offset + 8)
+        start = offset + GPMDStruct.size
+        if start + padded_length > end:
+            raise struct.error(f"{fourcc} at {offset} needs {padded_length} bytes, but only {end - start} remain")
 
-            return GPMDItem(fourcc, type_char_code, size, repeat, padded_length, rawdata)
+        if type_char_code != 0 and padded_length >= 0:
+            return GPMDItem(fourcc, type_char_code, size, repeat, padded_length, data, start)
         else:
-            offset += GPMDStruct.size
-            child_data = data[offset:padded_length + offset]
-
             children = []
 
-            child_offset = 0
+            child_offset = start
+            child_end = start + padded_length
 
-            while child_offset < len(child_data):
-                child = self.from_array(child_data, child_offset)
+            while child_offset < child_end:
+                child = self.from_array(data, child_offset, child_end)
                 children.append(child)
                 child_offset += child.bytecount
 
@@ -290,10 +461,7 @@ class GPMDParser:
 
     @staticmethod
     def extend(n, base=4):
-        i = n
-        while i % base != 0:
-            i += 1
-        return i
+        return (n + base - 1) // base * base
 
 
 class GoproMeta:
@@ -315,3 +483,27 @@ class GoproMeta:
     @staticmethod
     def parse(data) -> 'GoproMeta':
         return GoproMeta(list(GPMDParser(data).items()))
+
+    @staticmethod
+    def stream(packets: Callable[[], Iterable]) -> 'GoproMetaStream':
+        return GoproMetaStream(packets)
+
+
+class GoproMetaStream:
+    """
+    Like GoproMeta, but parses a packet at a time as it is visited, passing each DEVC to the visitor as soon as it
+    is complete, so only one packet's items are ever held. `packets` gives the packets afresh for each accept, so
+    each accept parses them again - good for a single visitor, less so for many.
+    """
+
+    def __init__(self, packets: Callable[[], Iterable]):
+        self._packets = packets
+
+    def items(self):
+        for packet in self._packets():
+            yield from GPMDParser(packet).items()
+
+    def accept(self, visitor):
+        for item in self.items():
+            item.accept(visitor)
+        return visitor
@@ -1,10 +1,10 @@
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List
 
 from gopro_overlay.exceptions import Defect
 from gopro_overlay.ffmpeg import MetaMeta
 from gopro_overlay.gpmd import GoproMeta
 from gopro_overlay.gpmd_visitors import CorrectionFactors, DetermineTimestampOfFirstSHUTVisitor, \
-    CalculateCorrectionFactorsVisitor
+    CalculateCorrectionFactorsVisitor, FanOutVisitor
 from gopro_overlay.log import log
 from gopro_overlay.timeunits import Timeunit, timeunits
 
@@ -61,17 +61,29 @@ class UnknownPacketTimeCalculator:
         raise Defect("can't calculate timings for {self._packet_type} as none were seen.")
 
 
-def timestamp_calculator_for_packet_type(meta: GoproMeta, metameta: MetaMeta, packet_type: str) -> Optional[Any]:
-    cori_timestamp = meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+def _calculator_for(packet_type: str, cori_timestamp: Optional[Timeunit],
+                    corrections: Optional[CalculateCorrectionFactorsVisitor]):
     if cori_timestamp is not None:
         return CoriTimestampPacketTimeCalculator(cori_timestamp)
     else:
-        assert metameta is not None
-        visitor = CalculateCorrectionFactorsVisitor(packet_type, metameta)
-        meta.accept(visitor)
+        assert corrections is not None
 
-        if visitor.found():
-            return CorrectionFactorsPacketTimeCalculator(visitor.factors())
+        if corrections.found():
+            return CorrectionFactorsPacketTimeCalculator(corrections.factors())
         else:
             # assume that processing of same packet will follow, and not find any...
             return UnknownPacketTimeCalculator(packet_type)
+
+
+def timestamp_calculators(meta: GoproMeta, metameta: Optional[MetaMeta], packet_types: List[str]) -> Dict[str, Any]:
+    """a timestamp calculator for each packet type, from a single traversal of meta, sharing the first SHUT timestamp"""
+    shut = DetermineTimestampOfFirstSHUTVisitor()
+    corrections = {} if metameta is None else {t: CalculateCorrectionFactorsVisitor(t, metameta) for t in packet_types}
+
+    meta.accept(FanOutVisitor(shut, *corrections.values()))
+
+    return {t: _calculator_for(t, shut.timestamp, corrections.get(t)) for t in packet_types}
+
+
+def timestamp_calculator_for_packet_type(meta: GoproMeta, metameta: MetaMeta, packet_type: str) -> Optional[Any]:
+    return timestamp_calculators(meta, metameta, [packet_type])[packet_type]
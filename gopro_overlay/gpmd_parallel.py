@@ -0,0 +1,159 @@
+import copy
+import dataclasses
+import multiprocessing
+import traceback
+from queue import Empty
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from gopro_overlay.gpmd import GoproMeta, VisitorTable
+
+# GPMD is a run of DEVC packets that can each be decoded on their own, apart from a little state that the visitors
+# carry from one to the next: the DEVC counter, how many samples of each stream have been seen, and the timestamp
+# calculators. That state only depends on the timestamps and sample counts of the streams, which can be read from
+# the item headers without decoding any samples, so runs of packets can be decoded on separate processes, each
+# starting with the state that it would have had, had all the packets before it been decoded first.
+
+
+@dataclasses.dataclass(frozen=True)
+class Handoff:
+    """the state of the visitors at the start of the top level items [start, end)"""
+    start: int
+    end: int
+    counter: int
+    total_samples: Dict[str, int]
+    calculators: Dict[str, Any]
+
+
+# noinspection PyPep8Naming
+class _StreamCounts:
+
+    def __init__(self, on_end, packet_types: Iterable[str]):
+        self._on_end = on_end
+        self._timestamp = None
+        self._counts = []
+        self.visitor_table = VisitorTable(
+            items={"STMP": _StreamCounts.vi_STMP, **{t: _StreamCounts._samples for t in packet_types}},
+            containers={}
+        )
+
+    def vi_STMP(self, item):
+        self._timestamp = item.interpret()
+
+    def _samples(self, item):
+        self._counts.append((item.fourcc, item.repeat))
+
+    def v_end(self):
+        for packet_type, count in self._counts:
+            self._on_end(packet_type, self._timestamp, count)
+
+
+# noinspection PyPep8Naming
+class PacketCountsVisitor:
+    """the timestamp and number of samples of each packet of the given types, as they are visited - from headers only"""
+
+    def __init__(self, packet_types: Iterable[str], on_packet: Callable[[str, Any, int], None]):
+        self._types = frozenset(packet_types)
+        self._on_packet = on_packet
+        self.devcs = 0
+
+    def vic_DEVC(self, item, contents):
+        self.devcs += 1
+        return self
+
+    def vic_STRM(self, item, contents):
+        found = self._types.intersection(contents)
+        if found:
+            return _StreamCounts(self._on_packet, found)
+
+    def v_end(self):
+        pass
+
+
+def packet_ranges(meta: GoproMeta, count: int) -> List[Tuple[int, int]]:
+    """splits the top level items into (at most) count contiguous runs, [start, end), of about the same size"""
+    sizes = [item.bytecount for item in meta]
+    total = sum(sizes)
+
+    edges, running = [0], 0
+    for index, size in enumerate(sizes[:-1]):
+        running += size
+        if running >= total * len(edges) / count:
+            edges.append(index + 1)
+    edges.append(len(sizes))
+
+    return [(start, end) for start, end in zip(edges, edges[1:]) if end > start]
+
+
+def handoffs(meta: GoproMeta, calculators: Dict[str, Any], ranges: List[Tuple[int, int]],
+             skips_empty: Iterable[str]) -> List[Handoff]:
+    """
+    The state at the start of each range, found by giving each calculator the packets before it, as the
+    converters would. Converters for the packet types in skips_empty don't ask about packets with no samples.
+    """
+    skips_empty = frozenset(skips_empty)
+    calculators = copy.deepcopy(calculators)
+    total_samples = {t: 0 for t in calculators}
+
+    def on_packet(packet_type, timestamp, count):
+        if count == 0 and packet_type in skips_empty:
+            return
+        calculators[packet_type].next_packet(timestamp, total_samples[packet_type], count)
+        total_samples[packet_type] += count
+
+    counts = PacketCountsVisitor(calculators.keys(), on_packet)
+
+    found = []
+    ends = dict(ranges)
+    for index, item in enumerate(meta):
+        if index in ends:
+            found.append(Handoff(index, ends[index], counts.devcs, dict(total_samples), copy.deepcopy(calculators)))
+        item.accept(counts)
+
+    return found
+
+
+def _run(fn: Callable, job, queue, index: int):
+    try:
+        queue.put((index, fn(job), None))
+    except BaseException:
+        queue.put((index, None, traceback.format_exc()))
+
+
+def map_in_processes(fn: Callable, jobs: List, poll: float = 1.0) -> List:
+    """
+    fn(job) for each job, each on its own (forked) process, so neither fn nor the jobs need to be picklable,
+    only the results.
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_run, args=(fn, job, queue, index), name=f"gpmd-{index}", daemon=True)
+        for index, job in enumerate(jobs)
+    ]
+
+    for p in processes:
+        p.start()
+
+    try:
+        results, remaining = [None] * len(jobs), len(jobs)
+        while remaining:
+            try:
+                index, result, failure = queue.get(timeout=poll)
+            except Empty:
+                for p in processes:
+                    if not p.is_alive() and p.exitcode != 0:
+                        raise IOError(f"{p.name} exited with code {p.exitcode}") from None
+                continue
+
+            if failure is not None:
+                raise IOError(f"{processes[index].name} failed:\n{failure}")
+            results[index] = result
+            remaining -= 1
+        return results
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        for p in processes:
+            p.join()
+        queue.close()
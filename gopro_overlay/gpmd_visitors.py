@@ -1,10 +1,82 @@
 import collections
 
 from gopro_overlay.ffmpeg import MetaMeta
-from gopro_overlay.gpmd import interpret_item
+from gopro_overlay.gpmd import interpret_item, visitor_table, VisitorTable
 from gopro_overlay.timeunits import timeunits
 
 
+class FanOutVisitor:
+    """
+    Passes everything it visits on to each of its visitors that wants it, so that they can all be run with one
+    traversal. Containers that only one visitor wants go straight to that visitor's container visitor.
+    """
+
+    def __init__(self, *visitors):
+        self._visitors = visitors
+
+        tables = [visitor_table(v) for v in visitors]
+        if all(t is not None for t in tables):
+            self.visitor_table = FanOutVisitor._table(visitors, tables)
+
+    @staticmethod
+    def _table(visitors, tables) -> VisitorTable:
+        def fan_out_items(handlers):
+            def visit_item(fan, item):
+                for v, f in handlers:
+                    f(v, item)
+
+            return visit_item
+
+        def fan_out_containers(handlers):
+            def visit_container(fan, item, contents):
+                found = [c for c in (f(v, item, contents) for v, f in handlers) if c is not None]
+                if len(found) > 1:
+                    return FanOutVisitor(*found)
+                if found:
+                    return found[0]
+
+            return visit_container
+
+        def handlers(kind, fourcc):
+            return [(v, getattr(t, kind)[fourcc]) for v, t in zip(visitors, tables) if fourcc in getattr(t, kind)]
+
+        items = set().union(*(t.items for t in tables))
+        containers = set().union(*(t.containers for t in tables))
+
+        return VisitorTable(
+            items={fourcc: fan_out_items(handlers("items", fourcc)) for fourcc in items},
+            containers={fourcc: fan_out_containers(handlers("containers", fourcc)) for fourcc in containers},
+        )
+
+    def __getattr__(self, name):
+        if not name.startswith("vi"):
+            raise AttributeError(name)
+
+        interested = [getattr(v, name) for v in self._visitors if hasattr(v, name)]
+        if not interested:
+            raise AttributeError(name)
+
+        if name.startswith("vic_"):
+            def visit_container(item, contents):
+                visitors = [c for c in (f(item, contents) for f in interested) if c is not None]
+                if len(visitors) > 1:
+                    return FanOutVisitor(*visitors)
+                if visitors:
+                    return visitors[0]
+
+            return visit_container
+        else:
+            def visit_item(item):
+                for f in interested:
+                    f(item)
+
+            return visit_item
+
+    def v_end(self):
+        for v in self._visitors:
+            v.v_end()
+
+
 class DetermineTimestampOfFirstSHUTVisitor:
     """
         Seems like first SHUT frame is correlated with video frame?
@@ -58,6 +130,12 @@ class CalculateCorrectionFactorsVisitor:
         self.meanY = 0
         self.meanX = 0
         self.repeatarray = []
+        # declared, as the item it wants is only known now
+        self.visitor_table = VisitorTable(
+            items={wanted: CalculateCorrectionFactorsVisitor._handle_item},
+            containers={"DEVC": CalculateCorrectionFactorsVisitor.vic_DEVC,
+                        "STRM": CalculateCorrectionFactorsVisitor.vic_STRM},
+        )
 
     def vic_DEVC(self, item, contents):
         return self
@@ -1,6 +1,6 @@
 import dataclasses
 import datetime
-from typing import List, Optional
+from typing import Optional, Sequence
 
 from pint import Quantity
 
@@ -11,7 +11,7 @@ from gopro_overlay.point import Quaternion, Point3, EulerRadians
 
 @dataclasses.dataclass(frozen=True)
 class CORIComponents:
-    orientations: List[QUATERNION]
+    orientations: Sequence[QUATERNION]
     timestamp: int
     samples: int
 
@@ -34,11 +34,11 @@ def euler_to_orientation(e: EulerRadians, units) -> Orientation:
 
 class CORIComponentConverter:
 
-    def __init__(self, frame_calculator, units, on_item):
+    def __init__(self, frame_calculator, units, on_item, total_samples=0):
         self._frame_calculator = frame_calculator
         self._units = units
         self._on_item = on_item
-        self._total_samples = 0
+        self._total_samples = total_samples
 
     def convert(self, counter: int, components: CORIComponents):
 
@@ -83,7 +83,7 @@ class CORIStreamVisitor:
     def __init__(self, on_end):
         self.on_end = on_end
         self._scale: Optional[int] = None
-        self._cori: Optional[List[QUATERNION]] = None
+        self._cori: Optional[Sequence[QUATERNION]] = None
 
     def vi_STMP(self, item):
         self._timestamp = item.interpret()
@@ -95,7 +95,7 @@ class CORIStreamVisitor:
         self._scale = item.interpret()
 
     def vi_CORI(self, item):
-        self._cori = item.interpret(self._scale)
+        self._cori = item.samples(self._scale)
 
     def v_end(self):
         self.on_end(
@@ -106,8 +106,8 @@ class CORIStreamVisitor:
 # noinspection PyPep8Naming
 class CORIVisitor:
 
-    def __init__(self, on_item=lambda counter, components: None):
-        self._counter = 0
+    def __init__(self, on_item=lambda counter, components: None, counter=0):
+        self._counter = counter
         self._on_item = on_item
 
     def vic_DEVC(self, i, s):
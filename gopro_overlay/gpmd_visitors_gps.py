@@ -1,10 +1,13 @@
 import dataclasses
 import datetime
-from typing import List, Optional
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence
 
 from gopro_overlay.entry import Entry
-from gopro_overlay.gpmd import interpret_item, GPS_FIXED, GPS5, GPSFix
+from gopro_overlay.gpmd import interpret_item, interpret_samples, GPS_FIXED, GPS5, GPSFix
 from gopro_overlay.point import Point, BoundingBox
+from gopro_overlay.timeunits import Timeunit
 
 
 @dataclasses.dataclass(frozen=True)
@@ -15,7 +18,7 @@ class GPS5Components:
     fix: GPSFix
     dop: float
     scale: int
-    points: List[GPS5]
+    points: Sequence[GPS5]
 
 
 @dataclasses.dataclass(frozen=True)
@@ -119,13 +122,56 @@ class GPSLockTracker(GPSLockFilter):
         return components.fix
 
 
+class GPSLockLog:
+    """
+    What a lock filter is given for every GPS sample, in the order they are found, along with the frame time of each,
+    so that a lock filter can be applied afterwards exactly as it would have been while parsing - where samples
+    land on the same frame time, the last one is the one that is kept.
+    """
+    typecodes = {"time": "q", "fix": "b", "lat": "d", "lon": "d", "speed": "d", "dop": "d"}
+
+    def __init__(self, columns: Optional[List[array]] = None):
+        if columns is None:
+            columns = [array(t) for t in self.typecodes.values()]
+        self.time, self.fix, self.lat, self.lon, self.speed, self.dop = columns
+
+    def __len__(self):
+        return len(self.time)
+
+    def columns(self) -> List[array]:
+        return [self.time, self.fix, self.lat, self.lon, self.speed, self.dop]
+
+    def record(self, at: Timeunit, components: GPSLockComponents):
+        self.time.append(at.us)
+        self.fix.append(components.fix.value)
+        self.lat.append(components.point.lat)
+        self.lon.append(components.point.lon)
+        self.speed.append(components.speed)
+        self.dop.append(components.dop if components.dop is not None else math.nan)
+
+    def extend(self, other: 'GPSLockLog'):
+        for mine, theirs in zip(self.columns(), other.columns()):
+            mine.extend(theirs)
+
+    def replay(self, gps_lock_filter: GPSLockFilter) -> Dict[Timeunit, GPSFix]:
+        """the fix the filter gives, for each frame time"""
+        fixes = {}
+        for t, fix, lat, lon, speed, dop in zip(*self.columns()):
+            fixes[t] = gps_lock_filter.submit(
+                GPSLockComponents(GPSFix(fix), Point(lat, lon), speed, None if math.isnan(dop) else dop)
+            )
+        return {Timeunit(t): fix for t, fix in fixes.items()}
+
+
 class GPS5EntryConverter:
-    def __init__(self, units, calculator, on_item=lambda c, e: None, gps_lock_filter=NullGPSLockFilter()):
+    def __init__(self, units, calculator, on_item=lambda c, e: None, gps_lock_filter=NullGPSLockFilter(),
+                 total_samples=0, lock_log: Optional[GPSLockLog] = None):
         self._units = units
         self._on_item = on_item
-        self._total_samples = 0
+        self._total_samples = total_samples
         self._frame_calculator = calculator
         self._tracker = gps_lock_filter
+        self._lock_log = lock_log
 
     def convert(self, counter, components: GPS5Components):
 
@@ -147,7 +193,10 @@ class GPS5EntryConverter:
             position = Point(point.lat, point.lon)
             speed = self._units.Quantity(point.speed, self._units.mps)
 
-            calculated_fix = self._tracker.submit(GPSLockComponents(gpsfix, position, speed.magnitude, components.dop))
+            lock_components = GPSLockComponents(gpsfix, position, speed.magnitude, components.dop)
+            if self._lock_log is not None:
+                self._lock_log.record(sample_frame_timestamp, lock_components)
+            calculated_fix = self._tracker.submit(lock_components)
 
             point_datetime = components.basetime + datetime.timedelta(
                 microseconds=sample_time_offset.us
@@ -179,7 +228,7 @@ class GPS5StreamVisitor:
         self._basetime: Optional[datetime.datetime] = None
         self._fix: Optional[int] = None
         self._scale: Optional[int] = None
-        self._points: Optional[List[GPS5]] = None
+        self._points: Optional[Sequence[GPS5]] = None
         self._timestamp: Optional[int] = None
         self._dop: Optional[float] = None
 
@@ -202,7 +251,7 @@ class GPS5StreamVisitor:
         self._scale = interpret_item(item)
 
     def vi_GPS5(self, item):
-        self._points = interpret_item(item, self._scale)
+        self._points = interpret_samples(item, self._scale)
 
     def v_end(self):
         self._on_end(GPS5Components(
@@ -275,9 +324,9 @@ class DetermineFirstLockedGPSUVisitor:
 # noinspection PyPep8Naming
 class GPSVisitor:
 
-    def __init__(self, converter):
+    def __init__(self, converter, counter=0):
         self._converter = converter
-        self._counter = 0
+        self._counter = counter
 
     def vic_DEVC(self, item, contents):
         return self
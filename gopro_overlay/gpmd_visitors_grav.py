@@ -1,6 +1,6 @@
 import dataclasses
 import datetime
-from typing import List
+from typing import Sequence
 
 from pint import Quantity
 
@@ -11,7 +11,7 @@ from gopro_overlay.point import PintPoint3
 
 @dataclasses.dataclass(frozen=True)
 class GRAVComponents:
-    vectors: List[VECTOR]
+    vectors: Sequence[VECTOR]
     timestamp: int
     samples: int
 
@@ -19,11 +19,11 @@ class GRAVComponents:
 
 class GRAVComponentConverter:
 
-    def __init__(self, frame_calculator, units, on_item):
+    def __init__(self, frame_calculator, units, on_item, total_samples=0):
         self._frame_calculator = frame_calculator
         self._units = units
         self._on_item = on_item
-        self._total_samples = 0
+        self._total_samples = total_samples
 
     def convert(self, counter: int, components: GRAVComponents):
 
@@ -75,7 +75,7 @@ class GRAVStreamVisitor:
         self._scale = item.interpret()
 
     def vi_GRAV(self, item):
-        self._grav = item.interpret(self._scale)
+        self._grav = item.samples(self._scale)
 
     def v_end(self):
         self.on_end(
@@ -86,8 +86,8 @@ class GRAVStreamVisitor:
 # noinspection PyPep8Naming
 class GRAVisitor:
 
-    def __init__(self, on_item=lambda counter, components: None):
-        self._counter = 0
+    def __init__(self, on_item=lambda counter, components: None, counter=0):
+        self._counter = counter
         self._on_item = on_item
 
     def vic_DEVC(self, i, s):
@@ -1,25 +1,29 @@
 import dataclasses
 import datetime
-from typing import List
+from typing import Sequence
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.gpmd import XYZ
 from gopro_overlay.point import PintPoint3
 
 
+# for each of x, y, z: which of the sensor's axes it is, and its sign
+orin_columns = {
+    "ZXY": ((1, 1), (2, 1), (0, 1)),
+    "YxZ": ((1, -1), (0, 1), (2, 1)),
+    "yXZ": ((1, 1), (0, -1), (2, 1)),
+    "zxY": ((1, -1), (2, 1), (0, -1)),
+}
+
+
 class ORIN:
 
     def __init__(self, conversion):
-        if conversion == "ZXY":
-            self.convert = lambda xyz: XYZ(x=xyz.y, y=xyz.z, z=xyz.x)
-        elif conversion == "YxZ":
-            self.convert = lambda xyz: XYZ(x=-xyz.y, y=xyz.x, z=xyz.z)
-        elif conversion == "yXZ":
-            self.convert = lambda xyz: XYZ(x=xyz.y, y=-xyz.x, z=xyz.z)
-        elif conversion == "zxY":
-            self.convert = lambda xyz: XYZ(x=-xyz.y, y=xyz.z, z=-xyz.x)
-        else:
+        if conversion not in orin_columns:
             raise IOError(f"Unhandled ORIN spec: {conversion}")
+        self.columns = orin_columns[conversion]
+        (xi, xs), (yi, ys), (zi, zs) = self.columns
+        self.convert = lambda xyz: XYZ(x=xs * xyz[xi], y=ys * xyz[yi], z=zs * xyz[zi])
 
     def apply(self, xyz):
         return self.convert(xyz)
@@ -33,7 +37,7 @@ class XYZComponents:
     orin: ORIN
     siun: str
     temp: int
-    points: List[XYZ]
+    points: Sequence[XYZ]
 
 
 # noinspection PyPep8Naming
@@ -70,11 +74,11 @@ class XYZStreamVisitor:
 
     def vi_ACCL(self, item):
         self._type = item.fourcc
-        self._points = item.interpret(self._scale)
+        self._points = item.samples(self._scale)
 
     def vi_GYRO(self, item):
         self._type = item.fourcc
-        self._points = item.interpret(self._scale)
+        self._points = item.samples(self._scale)
 
     def v_end(self):
         self._on_end(
@@ -95,11 +99,11 @@ units_acceleration = "m/s²"
 
 class XYZComponentConverter:
 
-    def __init__(self, frame_calculator, units, on_item):
+    def __init__(self, frame_calculator, units, on_item, total_samples=0):
         self._on_item = on_item
         self._frame_calculator = frame_calculator
         self._units = units
-        self._total_samples = 0
+        self._total_samples = total_samples
 
     # This only converts 1 in 10 of the XYZ Items - they run at 200Hz, and that's too much for our needs.
     def convert(self, counter, components):
@@ -114,9 +118,8 @@ class XYZComponentConverter:
         else:
             raise IOError(f"Unsupported units {components.siun}")
 
-        for index, point in enumerate(components.points):
-            if index % 10 != 0:
-                continue
+        for index in range(0, len(components.points), 10):
+            point = components.points[index]
             sample_frame_timestamp, _ = sample_time_calculator(index)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000, tz=datetime.timezone.utc)
@@ -142,8 +145,8 @@ class XYZComponentConverter:
 # noinspection PyPep8Naming
 class XYZVisitor:
 
-    def __init__(self, name, on_item):
-        self._counter = 0
+    def __init__(self, name, on_item, counter=0):
+        self._counter = counter
         self._name = name
         self._on_item = on_item
 
@@ -1,4 +1,5 @@
-from typing import Callable
+import operator
+from typing import Callable, List, Optional
 
 from PIL import ImageFont, Image, ImageDraw
 
@@ -6,6 +7,7 @@ from .dimensions import Dimension
 from .framemeta import FrameMeta
 from .layout_components import moving_map
 from .point import Coordinate
+from .regions import Region, RegionPacker
 from .units import units
 from .widgets.widgets import Scene, Translate, Composite, Widget
 from .widgets.text import CachingText, Text
@@ -14,7 +16,7 @@ from gopro_overlay.widgets.info import ComparativeEnergy
 
 def gps_info(at, entry, font):
     return Composite(
-        CachingText(at + Coordinate(0, 0), lambda: "GPS INFO", font, align="right"),
+        CachingText(at + Coordinate(0, 0), lambda: "GPS INFO", font, align="right", static=True),
         Text(at + Coordinate(-130, 24), lambda: f"Lat: {entry().point.lat:0.6f}", font, align="right"),
         Text(at + Coordinate(0, 24), lambda: f"Lon: {entry().point.lon:0.6f}", font, align="right"),
     )
@@ -91,16 +93,84 @@ def speed_awareness_layout(renderer, font: ImageFont):
     return create
 
 
+class RecordingEntry:
+    """Passes through to an entry, noting down how to get each field that is read, or value that is rendered"""
+    __slots__ = ["_entry", "_fields"]
+
+    def __init__(self, entry, fields: dict):
+        self._entry = entry
+        self._fields = fields
+
+    def rendered(self, render: Callable):
+        self._fields[render] = render
+        return render(self._entry)
+
+    def __getattr__(self, item):
+        if item not in self._fields:
+            self._fields[item] = operator.attrgetter(item)
+        return getattr(self._entry, item)
+
+
+class EntryFingerprint:
+    """
+    Tells if an entry has the same values as the last one, for all the fields that the widgets have read - or, where
+    they say what they render from the entry, with layout_components.rendered, for all the values they render
+    """
+
+    def __init__(self):
+        self._seen = {}
+        self._getters = ()
+        self._values = None
+
+    def recording(self, entry) -> RecordingEntry:
+        return RecordingEntry(entry, self._seen)
+
+    def _values_of(self, entry):
+        return tuple(get(entry) for get in self._getters)
+
+    def remember(self, entry):
+        self._getters = tuple(self._seen.values())
+        self._values = self._values_of(entry)
+
+    def matches(self, entry) -> bool:
+        return self._values is not None and self._values_of(entry) == self._values
+
+
 class Overlay:
 
-    def __init__(self, dimensions: Dimension, framemeta: FrameMeta, create_widgets: Callable):
-        self.scene = Scene(dimensions, create_widgets(self.entry))
+    def __init__(self, dimensions: Dimension, framemeta: FrameMeta, create_widgets: Callable, canvases: int = 1,
+                 regions: Optional[List[Region]] = None):
+        self.scene = Scene(dimensions, create_widgets(self.entry), canvases=canvases)
         self.framemeta = framemeta
+        self._packer = RegionPacker(regions, canvases=canvases) if regions else None
+        self._packed = None
         self._entry = None
+        self._fingerprint = EntryFingerprint()
+        self._image = None
+        self.repeated = False
+        self.deduplicated = 0
 
     def entry(self):
         return self._entry
 
+    def buffer(self) -> memoryview:
+        """The rgba bytes of the last frame drawn, without copying - just the packed regions, if given regions"""
+        if self._packer:
+            return self._packed
+        return self.scene.buffer()
+
     def draw(self, pts) -> Image.Image:
-        self._entry = self.framemeta.get(pts)
-        return self.scene.draw()
+        """Returns the previous image again, (with repeated=True), if nothing the widgets read has changed"""
+        entry = self.framemeta.get(pts)
+
+        self.repeated = self._image is not None and self._fingerprint.matches(entry)
+        if self.repeated:
+            self.deduplicated += 1
+            return self._image
+
+        self._entry = self._fingerprint.recording(entry)
+        self._image = self.scene.draw()
+        self._fingerprint.remember(entry)
+        if self._packer:
+            self._packed = self._packer.pack(self._image)
+        return self._image
@@ -1,3 +1,5 @@
+from typing import Callable
+
 from .widgets.text import CachingText, Text
 from .widgets.map import MovingMap, JourneyMap
 from .widgets.widgets import Widget
@@ -20,15 +22,26 @@ def moving_map(at, entry, **kwargs) -> Widget:
     )
 
 
+def rendered(entry, render: Callable):
+    """
+    render(entry), for a widget to draw. When an Overlay is drawing, this is noted down in place of the fields render
+    reads, so frames are only redrawn when what render makes changes - render needs to be the same function each time
+    """
+    recording = getattr(type(entry), "rendered", None)
+    if recording is not None:
+        return recording(entry, render)
+    return render(entry)
+
+
 def metric_value(entry, accessor, converter, formatter, default="-"):
-    def value():
-        v = accessor(entry())
+    def render(e):
+        v = accessor(e)
         if v is not None:
             v = converter(v)
             return formatter(v)
         return default
 
-    return value
+    return lambda: rendered(entry(), render)
 
 
 def text(cache=True, **kwargs) -> Widget:
@@ -9,7 +9,7 @@ from pint.formatting import format_unit
 from gopro_overlay import layouts
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.framemeta import Window
-from gopro_overlay.layout_components import moving_map, journey_map, text, metric, metric_value
+from gopro_overlay.layout_components import moving_map, journey_map, text, metric, metric_value, rendered
 from gopro_overlay.point import Coordinate
 from gopro_overlay.timeseries import Entry
 from gopro_overlay.timeunits import timeunits
@@ -23,6 +23,7 @@ from .widgets.compass_arrow import CompassArrow
 from .widgets.gps import GPSLock
 from .widgets.map import MovingJourneyMap, Circuit
 from .widgets.profile import WidgetProfiler
+from .widgets.text import CachingText
 from .widgets.widgets import simple_icon, Translate, Composite, Frame, Widget
 from .widgets.gradient_bar import GradientBar
 
@@ -85,7 +86,8 @@ class Converters:
 
 
 def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name: True,
-                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters()):
+                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters(), scale: float = 1.0):
+    """scale multiplies all positions and sizes, so a layout can be drawn smaller (or larger) than it was written for"""
     root = ET.fromstring(xml)
 
     fonts = {}
@@ -99,6 +101,7 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
         renderer=renderer,
         framemeta=framemeta,
         converters=converters,
+        scale=scale,
     )
 
     def name_of(element):
@@ -142,7 +145,7 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
                 name=name_of(element),
                 level=level,
                 widget=Translate(
-                    at(element),
+                    factory.at(element),
                     Composite(
                         *[do_element(child, level + 1) for child in element if want_element(child)]
                     )
@@ -154,14 +157,14 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
                 name=name_of(element),
                 level=level,
                 widget=Translate(
-                    at(element),
+                    factory.at(element),
                     Frame(
-                        dimensions=Dimension(x=iattrib(element, "width"), y=iattrib(element, "height")),
+                        dimensions=Dimension(x=factory.px(element, "width"), y=factory.px(element, "height")),
                         opacity=fattrib(element, "opacity", d=1.0),
-                        corner_radius=iattrib(element, "cr", d=0),
+                        corner_radius=factory.px(element, "cr", d=0),
                         outline=rgbattr(element, "outline", None),
                         fill=rgbattr(element, "bg", d=None),
-                        fade_out=iattrib(element, "fo", d=0),
+                        fade_out=factory.px(element, "fo", d=0),
                         child=Composite(
                             *[do_element(child, level + 1) for child in element if want_element(child)]
                         )
@@ -299,9 +302,10 @@ def quantity_formatter_from(element) -> Callable[[pint.Quantity], str]:
 
 def date_formatter_from(entry: Callable[[], Entry], format_string, truncate=0, tz=None) -> Callable[[], str]:
     if truncate > 0:
-        return lambda: entry().dt.astimezone(tz=tz).strftime(format_string)[:-truncate]
+        render = lambda e: e.dt.astimezone(tz=tz).strftime(format_string)[:-truncate]
     else:
-        return lambda: entry().dt.astimezone(tz=tz).strftime(format_string)
+        render = lambda e: e.dt.astimezone(tz=tz).strftime(format_string)
+    return lambda: rendered(entry(), render)
 
 
 def date_formatter_from_element(element, entry: Callable[[], Entry]):
@@ -333,28 +337,46 @@ def format_uppercase(unit, registry, **options):
     return format_unit(unit, "D", registry).upper()
 
 
+def scaled(v, scale: float):
+    """scales a number of pixels, keeping something that was there (a line...) at least 1 pixel"""
+    if v is None or scale == 1.0:
+        return v
+    r = round(v * scale)
+    if r == 0 and v != 0:
+        return 1 if v > 0 else -1
+    return r
+
+
 class Widgets:
 
-    def __init__(self, font, privacy, renderer, framemeta, converters):
+    def __init__(self, font, privacy, renderer, framemeta, converters, scale: float = 1.0):
         self.framemeta = framemeta
         self.renderer = renderer
         self.privacy = privacy
         self.font = font
         self.converters = converters
+        self.scale = scale
+
+    def px(self, el, a, d=None, r=None):
+        """an attribute that is a number of pixels - a position, size, line width..."""
+        return scaled(iattrib(el, a, d=d, r=r), self.scale)
+
+    def at(self, el):
+        return Coordinate(self.px(el, "x", d=0), self.px(el, "y", d=0))
 
     def create_metric(self, element, entry, **kwargs) -> Widget:
         return metric(
-            at=at(element),
+            at=self.at(element),
             entry=entry,
             accessor=metric_accessor_from(attrib(element, "metric")),
             formatter=quantity_formatter_from(element),
-            font=self.font(iattrib(element, "size", d=16)),
+            font=self.font(self.px(element, "size", d=16)),
             converter=self.converters.converter(attrib(element, "units", d=None)),
             align=attrib(element, "align", d="left"),
             cache=battrib(element, "cache", d=True),
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
             stroke=rgbattr(element, "outline", d=(0, 0, 0)),
-            stroke_width=iattrib(element, "outline_width", d=2),
+            stroke_width=self.px(element, "outline_width", d=2),
         )
 
     def create_metric_unit(self, element, entry, **kwargs) -> Widget:
@@ -362,32 +384,32 @@ class Widgets:
         format_string = element.text or "{:~C}"
 
         return metric(
-            at=at(element),
+            at=self.at(element),
             entry=entry,
             accessor=metric_accessor_from(attrib(element, "metric")),
             formatter=lambda q: format_string.format(q.u),
-            font=self.font(iattrib(element, "size", d=16)),
+            font=self.font(self.px(element, "size", d=16)),
             converter=self.converters.converter(attrib(element, "units", d=None)),
             align=attrib(element, "align", d="left"),
             cache=True,
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
             stroke=rgbattr(element, "outline", d=(0, 0, 0)),
-            stroke_width=iattrib(element, "outline_width", d=2),
+            stroke_width=self.px(element, "outline_width", d=2),
         )
 
     def create_icon(self, element, **kwargs) -> Widget:
         return simple_icon(
-            at=at(element),
+            at=self.at(element),
             file=attrib(element, "file"),
-            size=iattrib(element, "size", d=64),
+            size=self.px(element, "size", d=64),
             invert=battrib(element, "invert", d=True)
         )
 
     def create_datetime(self, element, entry, **kwargs):
         return text(
-            at=at(element),
+            at=self.at(element),
             value=date_formatter_from_element(element, entry),
-            font=self.font(iattrib(element, "size", d=16)),
+            font=self.font(self.px(element, "size", d=16)),
             align=attrib(element, "align", d="left"),
             cache=battrib(element, "cache", d=True),
             fill=rgbattr(element, "rgb", d=(255, 255, 255))
@@ -397,38 +419,39 @@ class Widgets:
         if element.text is None:
             raise IOError("Text components should have the text in the element like <component...>Text</component>")
 
-        return text(
-            at=at(element),
+        return CachingText(
+            at=self.at(element),
             value=lambda: element.text,
-            font=self.font(iattrib(element, "size", d=16)),
+            static=True,
+            font=self.font(self.px(element, "size", d=16)),
             align=attrib(element, "align", d="left"),
             direction=attrib(element, "direction", d="ltr"),
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
             stroke=rgbattr(element, "outline", d=(0, 0, 0)),
-            stroke_width=iattrib(element, "outline_width", d=2),
+            stroke_width=self.px(element, "outline_width", d=2),
         )
 
     def create_moving_map(self, element, entry, **kwargs) -> Widget:
         return moving_map(
-            at=at(element),
+            at=self.at(element),
             entry=entry,
-            size=iattrib(element, "size", d=256),
+            size=self.px(element, "size", d=256),
             zoom=iattrib(element, "zoom", d=16, r=range(1, 20)),
             renderer=self.renderer,
-            corner_radius=iattrib(element, "corner_radius", 0),
+            corner_radius=self.px(element, "corner_radius", 0),
             opacity=fattrib(element, "opacity", 0.7),
             rotate=battrib(element, "rotate", d=True)
         )
 
     def create_journey_map(self, element, entry, **kwargs) -> Widget:
         return journey_map(
-            at(element),
+            self.at(element),
             entry,
             privacy_zone=self.privacy,
             renderer=self.renderer,
             timeseries=self.framemeta,
-            size=iattrib(element, "size", d=256),
-            corner_radius=iattrib(element, "corner_radius", 0),
+            size=self.px(element, "size", d=256),
+            corner_radius=self.px(element, "corner_radius", 0),
             opacity=fattrib(element, "opacity", 0.7)
         )
 
@@ -438,12 +461,12 @@ class Widgets:
             privacy_zone=self.privacy,
             renderer=self.renderer,
             timeseries=self.framemeta,
-            size=iattrib(element, "size", d=256),
+            size=self.px(element, "size", d=256),
             zoom=iattrib(element, "zoom", d=16, r=range(1, 20))
         )
 
     def create_circuit_map(self, element, entry, **kwargs) -> Widget:
-        size = iattrib(element, "size", d=256)
+        size = self.px(element, "size", d=256)
         return Circuit(
             location=lambda: entry().point,
             privacy_zone=self.privacy,
@@ -451,8 +474,8 @@ class Widgets:
             dimensions=Dimension(size, size),
             fill=rgbattr(element, "fill", d=(255, 0, 0)),
             outline=rgbattr(element, "outline", d=(255, 255, 255)),
-            fill_width=iattrib(element, "fill_width", d=4),
-            outline_width=iattrib(element, "outline_width", d=0)
+            fill_width=self.px(element, "fill_width", d=4),
+            outline_width=self.px(element, "outline_width", d=0)
         )
 
     def create_gradient_chart(self, *args, **kwargs):
@@ -473,22 +496,25 @@ class Widgets:
         window = Window(
             self.framemeta,
             duration=timeunits(seconds=iattrib(element, "seconds", d=5 * 60)),
-            samples=iattrib(element, "samples", d=256),
+            samples=self.px(element, "samples", d=256),
             key=value
         )
 
-        title = self.font(iattrib(element, "size_title", d=16))
+        def view(e):
+            return window.view(timeunits(millis=e.timestamp.magnitude))
+
+        title = self.font(self.px(element, "size_title", d=16))
         values = battrib(element, "values", d=True)
         if not values:
             title = None
 
         return Translate(
-            at=at(element),
+            at=self.at(element),
             widget=SimpleChart(
-                value=lambda: window.view(timeunits(millis=entry().timestamp.magnitude)),
+                value=lambda: rendered(entry(), view),
                 font=title,
                 filled=battrib(element, "filled", d=True),
-                height=iattrib(element, "height", d=64),
+                height=self.px(element, "height", d=64),
                 bg=rgbattr(element, "bg", d=(0, 0, 0, 170)),
                 fill=rgbattr(element, "fill", d=(91, 113, 146)),
                 line=rgbattr(element, "line", d=(255, 255, 255)),
@@ -499,9 +525,9 @@ class Widgets:
 
     def create_compass(self, element, entry, **kwargs) -> Widget:
         return Compass(
-            size=iattrib(element, "size", d=256),
+            size=self.px(element, "size", d=256),
             reading=lambda: nonesafe(entry().cog),
-            font=self.font(iattrib(element, "textsize", d=16)),
+            font=self.font(self.px(element, "textsize", d=16)),
             fg=rgbattr(element, "fg", d=(255, 255, 255)),
             bg=rgbattr(element, "bg", d=None),
             text=rgbattr(element, "text", d=(255, 255, 255)),
@@ -509,9 +535,9 @@ class Widgets:
 
     def create_compass_arrow(self, element, entry, **kwargs) -> Widget:
         return CompassArrow(
-            size=iattrib(element, "size", d=256),
+            size=self.px(element, "size", d=256),
             reading=lambda: nonesafe(entry().cog),
-            font=self.font(iattrib(element, "textsize", d=32)),
+            font=self.font(self.px(element, "textsize", d=32)),
             arrow=rgbattr(element, "arrow", d=(255, 255, 255)),
             bg=rgbattr(element, "bg", d=(0, 0, 0, 0)),
             text=rgbattr(element, "text", d=(255, 255, 255)),
@@ -521,7 +547,7 @@ class Widgets:
 
     def create_bar(self, element, entry, **kwargs) -> Widget:
         return Bar(
-            size=Dimension(x=iattrib(element, "width", d=400), y=iattrib(element, "height", d=30)),
+            size=Dimension(x=self.px(element, "width", d=400), y=self.px(element, "height", d=30)),
             reading=metric_value(
                 entry,
                 accessor=metric_accessor_from(attrib(element, "metric")),
@@ -533,17 +559,17 @@ class Widgets:
             zero=rgbattr(element, "zero", d=(255, 255, 255)),
             bar=rgbattr(element, "bar", d=(255, 255, 255)),
             outline=rgbattr(element, "outline", d=(255, 255, 255)),
-            outline_width=iattrib(element, "outline-width", d=3),
+            outline_width=self.px(element, "outline-width", d=3),
             highlight_colour_negative=rgbattr(element, "h-neg", d=(255, 0, 0)),
             highlight_colour_positive=rgbattr(element, "h-pos", d=(0, 255, 0)),
             max_value=iattrib(element, "max", d=20),
             min_value=iattrib(element, "min", d=-20),
-            cr=iattrib(element, "cr", d=5),
+            cr=self.px(element, "cr", d=5),
         )
 
     def create_zone_bar(self, element, entry, **kwargs):
         return GradientBar(
-            size=Dimension(x=iattrib(element, "width", d=400), y=iattrib(element, "height", d=30)),
+            size=Dimension(x=self.px(element, "width", d=400), y=self.px(element, "height", d=30)),
             reading=metric_value(
                 entry,
                 accessor=metric_accessor_from(attrib(element, "metric")),
@@ -554,8 +580,8 @@ class Widgets:
             fill=rgbattr(element, "fill", d=(255, 255, 255, 0)),
             divider=rgbattr(element, "zone-divider", d=(255, 255, 255)),
             outline=rgbattr(element, "outline", d=(255, 255, 255)),
-            outline_width=iattrib(element, "outline-width", d=3),
-            cr=iattrib(element, "cr", d=5),
+            outline_width=self.px(element, "outline-width", d=3),
+            cr=self.px(element, "cr", d=5),
             max_value=iattrib(element, "max", d=400),
             min_value=iattrib(element, "min", d=0),
             z1_value=iattrib(element, "z1", d=120),
@@ -570,7 +596,7 @@ class Widgets:
 
     def create_asi(self, element, entry, **kwargs) -> Widget:
         return AirspeedIndicator(
-            size=iattrib(element, "size", d=256),
+            size=self.px(element, "size", d=256),
             reading=metric_value(
                 entry,
                 accessor=metric_accessor_from(attrib(element, "metric", d="speed")),
@@ -578,7 +604,7 @@ class Widgets:
                 formatter=lambda q: q.m,
                 default=0
             ),
-            font=self.font(iattrib(element, "textsize", d=16)),
+            font=self.font(self.px(element, "textsize", d=16)),
             Vs0=iattrib(element, "vs0", d=40),
             Vs=iattrib(element, "vs", d=46),
             Vfe=iattrib(element, "vfe", d=103),
@@ -590,13 +616,13 @@ class Widgets:
     def create_cairo_circuit_map(self, element, entry, **kwargs):
         try:
             import gopro_overlay.layout_xml_cairo
-            return gopro_overlay.layout_xml_cairo.create_cairo_circuit_map(element, entry, self.framemeta, **kwargs)
+            return gopro_overlay.layout_xml_cairo.create_cairo_circuit_map(element, entry, self.framemeta, scale=self.scale, **kwargs)
         except ModuleNotFoundError:
             raise IOError("This widget needs pycairo to be installed - please see docs") from None
 
     def create_gps_lock_icon(self, element, entry, **kwargs) -> Widget:
         at = Coordinate(0, 0)
-        size = iattrib(element, "size", d=64)
+        size = self.px(element, "size", d=64)
         return GPSLock(
             fix=lambda: entry().gpsfix,
             lock_no=simple_icon(at, attrib(element, "lock_none", d="gps_lock_none.png"), size),
@@ -1,13 +1,13 @@
 from .dimensions import Dimension
-from .layout_xml import iattrib, rgbattr, fattrib
+from .layout_xml import iattrib, rgbattr, fattrib, scaled
 from .widgets.cairo.cairo import CairoWidget
 from .widgets.cairo.circuit import CairoCircuit
 from .widgets.cairo.circuit import Line
 from .widgets.widgets import Widget
 
 
-def create_cairo_circuit_map(element, entry, timeseries, **kwargs) -> Widget:
-    size = iattrib(element, "size", d=256)
+def create_cairo_circuit_map(element, entry, timeseries, scale: float = 1.0, **kwargs) -> Widget:
+    size = scaled(iattrib(element, "size", d=256), scale)
     rotation = iattrib(element, "rotate", d=0)
 
     return CairoWidget(
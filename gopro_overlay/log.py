@@ -1,8 +1,29 @@
+import contextlib
 import sys
+import threading
+from typing import Callable
+
+_local = threading.local()
 
 
 def log(s):
-    print(s, file=sys.stderr)
+    sink = getattr(_local, "sink", None)
+    if sink is not None:
+        sink(str(s))
+    else:
+        print(s, file=sys.stderr)
+
+
+@contextlib.contextmanager
+def log_to(sink: Callable[[str], None]):
+    """send log() messages from this thread to sink, rather than stderr"""
+    previous = getattr(_local, "sink", None)
+    _local.sink = sink
+    try:
+        yield
+    finally:
+        _local.sink = previous
+
 
 def fatal(s, error=True):
     log(s)
@@ -0,0 +1,88 @@
+import dataclasses
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Callable, Dict, Any
+
+from gopro_overlay.segments import Segment
+
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path: Path, sample: int = 1024 * 1024) -> str:
+    """
+    Identifies a file without reading all of it (they can be many GB) - size & mtime, and the
+    contents of the start and end of the file
+    """
+    st = os.stat(path)
+    digest = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    with open(path, "rb") as f:
+        digest.update(f.read(sample))
+        if st.st_size > sample:
+            f.seek(max(sample, st.st_size - sample))
+            digest.update(f.read(sample))
+    return digest.hexdigest()
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SegmentManifest:
+    """
+    Records how a render was split into segments, and which of them are complete, so a render
+    that is stopped part way through can carry on where it left off.
+
+    The key describes everything that affects the output (layout, input files, options) - if it doesn't
+    match the manifest on disk, then the segments on disk are from some other render, and are ignored.
+    """
+
+    def __init__(self, path: Path, key: Dict[str, Any], segments: List[Segment], completed=None):
+        self.path = path
+        self.key = key
+        self.segments = segments
+        self.completed = set(completed) if completed else set()
+
+    @staticmethod
+    def load_or_create(path: Path, key: Dict[str, Any], plan: Callable[[], List[Segment]]) -> 'SegmentManifest':
+        # make the key look the same as it would after a round trip through json
+        key = json.loads(json.dumps(key))
+
+        if path.exists():
+            try:
+                stored = json.loads(path.read_text())
+                if stored.get("version") == MANIFEST_VERSION and stored.get("key") == key:
+                    return SegmentManifest(
+                        path=path,
+                        key=key,
+                        segments=[Segment(**s) for s in stored["segments"]],
+                        completed=stored["completed"]
+                    )
+            except (ValueError, KeyError, TypeError):
+                pass
+
+        manifest = SegmentManifest(path=path, key=key, segments=plan())
+        manifest.save()
+        return manifest
+
+    @property
+    def resumed(self) -> bool:
+        return len(self.completed) > 0
+
+    def remaining(self) -> List[Segment]:
+        return [s for s in self.segments if s.index not in self.completed]
+
+    def complete(self, segment: Segment):
+        self.completed.add(segment.index)
+        self.save()
+
+    def save(self):
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.write_text(json.dumps({
+            "version": MANIFEST_VERSION,
+            "key": self.key,
+            "segments": [dataclasses.asdict(s) for s in self.segments],
+            "completed": sorted(self.completed),
+        }, indent=2))
+        os.replace(temporary, self.path)
@@ -0,0 +1,131 @@
+import struct
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.timeunits import Timeunit
+
+# Just enough Matroska to send ffmpeg uncompressed rgba frames, each with its own timestamp.
+# https://www.matroska.org/technical/elements.html
+
+EBML = b"\x1A\x45\xDF\xA3"
+EBML_VERSION = b"\x42\x86"
+EBML_READ_VERSION = b"\x42\xF7"
+EBML_MAX_ID_LENGTH = b"\x42\xF2"
+EBML_MAX_SIZE_LENGTH = b"\x42\xF3"
+DOC_TYPE = b"\x42\x82"
+DOC_TYPE_VERSION = b"\x42\x87"
+DOC_TYPE_READ_VERSION = b"\x42\x85"
+
+SEGMENT = b"\x18\x53\x80\x67"
+INFO = b"\x15\x49\xA9\x66"
+TIMESTAMP_SCALE = b"\x2A\xD7\xB1"
+MUXING_APP = b"\x4D\x80"
+WRITING_APP = b"\x57\x41"
+
+TRACKS = b"\x16\x54\xAE\x6B"
+TRACK_ENTRY = b"\xAE"
+TRACK_NUMBER = b"\xD7"
+TRACK_UID = b"\x73\xC5"
+TRACK_TYPE = b"\x83"
+FLAG_LACING = b"\x9C"
+CODEC_ID = b"\x86"
+VIDEO = b"\xE0"
+PIXEL_WIDTH = b"\xB0"
+PIXEL_HEIGHT = b"\xBA"
+COLOUR_SPACE = b"\x2E\xB5\x24"
+
+CLUSTER = b"\x1F\x43\xB6\x75"
+TIMESTAMP = b"\xE7"
+SIMPLE_BLOCK = b"\xA3"
+
+UNKNOWN_SIZE = b"\x01\xFF\xFF\xFF\xFF\xFF\xFF\xFF"
+
+# 1 microsecond ticks
+TIMESTAMP_SCALE_NS = 1000
+
+
+def size(n: int) -> bytes:
+    """EBML variable length size, always using the 8 byte form"""
+    return b"\x01" + n.to_bytes(7, "big")
+
+
+def element(id: bytes, *content: bytes) -> bytes:
+    data = b"".join(content)
+    return id + size(len(data)) + data
+
+
+def uint(id: bytes, value: int) -> bytes:
+    return element(id, value.to_bytes(8, "big"))
+
+
+def string(id: bytes, value: str) -> bytes:
+    return element(id, value.encode("ascii"))
+
+
+def header(dimension: Dimension) -> bytes:
+    return b"".join([
+        element(
+            EBML,
+            uint(EBML_VERSION, 1),
+            uint(EBML_READ_VERSION, 1),
+            uint(EBML_MAX_ID_LENGTH, 4),
+            uint(EBML_MAX_SIZE_LENGTH, 8),
+            string(DOC_TYPE, "matroska"),
+            uint(DOC_TYPE_VERSION, 4),
+            uint(DOC_TYPE_READ_VERSION, 2),
+        ),
+        # streaming, so the segment never ends
+        SEGMENT, UNKNOWN_SIZE,
+        element(
+            INFO,
+            uint(TIMESTAMP_SCALE, TIMESTAMP_SCALE_NS),
+            string(MUXING_APP, "gopro-dashboard"),
+            string(WRITING_APP, "gopro-dashboard"),
+        ),
+        element(
+            TRACKS,
+            element(
+                TRACK_ENTRY,
+                uint(TRACK_NUMBER, 1),
+                uint(TRACK_UID, 1),
+                uint(TRACK_TYPE, 1),
+                uint(FLAG_LACING, 0),
+                string(CODEC_ID, "V_UNCOMPRESSED"),
+                element(
+                    VIDEO,
+                    uint(PIXEL_WIDTH, dimension.x),
+                    uint(PIXEL_HEIGHT, dimension.y),
+                    element(COLOUR_SPACE, b"RGBA"),
+                )
+            )
+        )
+    ])
+
+
+# track 1, timestamp relative to cluster, keyframe
+block_header = struct.Struct(">BhB")
+
+
+def frame_header(at: Timeunit, length: int) -> bytes:
+    """A whole cluster for a single frame, up to, but not including, the frame data"""
+    timestamp = uint(TIMESTAMP, at.us)
+    block = SIMPLE_BLOCK + size(block_header.size + length) + block_header.pack(0x81, 0, 0x80)
+    return CLUSTER + size(len(timestamp) + len(block) + length) + timestamp + block
+
+
+class MatroskaFrameWriter:
+    """
+    Writes rgba frames, with explicit timestamps, as a Matroska stream, so that ffmpeg can be sent
+    only the frames that change.
+    """
+
+    def __init__(self, writer, dimension: Dimension):
+        self.writer = writer
+        self.dimension = dimension
+        self._started = False
+
+    def write(self, frame, at: Timeunit):
+        if not self._started:
+            self.writer.write(header(self.dimension))
+            self._started = True
+        self.writer.write(frame_header(at, len(frame)))
+        self.writer.write(frame)
@@ -0,0 +1,205 @@
+import contextlib
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# Just enough ISO-BMFF (MP4/MOV) to find a track, and where its samples are in the file, without ffmpeg.
+# https://developer.apple.com/documentation/quicktime-file-format
+
+BoxHeader = struct.Struct(">I4s")
+LargeSize = struct.Struct(">Q")
+FullBoxCount = struct.Struct(">4xI")
+
+
+@dataclass(frozen=True)
+class Box:
+    type: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class Track:
+    index: int
+    handler: str
+    format: str
+    timebase: int
+    offsets: array
+    sizes: array
+    times: array
+    durations: array
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+def boxes(buf, start: int, end: int) -> Iterator[Box]:
+    """the boxes in buf between start and end, each with the start and end of its content"""
+    offset = start
+    while offset + BoxHeader.size <= end:
+        size, kind = BoxHeader.unpack_from(buf, offset)
+        header = BoxHeader.size
+        if size == 1:
+            size, = LargeSize.unpack_from(buf, offset + header)
+            header += LargeSize.size
+        elif size == 0:
+            size = end - offset
+
+        if size < header or offset + size > end:
+            raise IOError(f"Corrupt MP4 - box '{kind.decode('latin-1')}' at {offset} has size {size}")
+
+        yield Box(kind.decode("latin-1"), offset + header, offset + size)
+        offset += size
+
+
+def child(buf, box: Box, *path: str) -> Optional[Box]:
+    for kind in path:
+        box = next((b for b in boxes(buf, box.start, box.end) if b.type == kind), None)
+        if box is None:
+            return None
+    return box
+
+
+def _table(buf, box: Box, fmt: str, columns: int = 1) -> tuple:
+    count, = FullBoxCount.unpack_from(buf, box.start)
+    start = box.start + FullBoxCount.size
+    if start + count * columns * struct.calcsize(f">{fmt}") > box.end:
+        raise IOError(f"Corrupt MP4 - '{box.type}' table is longer than its box")
+    return struct.unpack_from(f">{count * columns}{fmt}", buf, start)
+
+
+def _timebase(buf, mdhd: Box) -> int:
+    version = buf[mdhd.start]
+    timescale, = struct.unpack_from(">I", buf, mdhd.start + (20 if version == 1 else 12))
+    return timescale
+
+
+def _samples(buf, stbl: Box):
+    stsz = child(buf, stbl, "stsz")
+    stts = child(buf, stbl, "stts")
+    stsc = child(buf, stbl, "stsc")
+    stco = child(buf, stbl, "stco")
+    co64 = child(buf, stbl, "co64")
+
+    if stsz is None or stts is None or stsc is None or (stco is None and co64 is None):
+        raise IOError("Corrupt MP4 - sample table is incomplete")
+
+    fixed_size, count = struct.unpack_from(">4xII", buf, stsz.start)
+    if fixed_size:
+        sizes = array("L", [fixed_size]) * count
+    else:
+        sizes = array("L", struct.unpack_from(f">{count}I", buf, stsz.start + 12))
+
+    chunks = _table(buf, co64, "Q") if co64 is not None else _table(buf, stco, "I")
+
+    # each run is (first chunk, samples per chunk, description) - runs last until the next one starts
+    runs = _table(buf, stsc, "I", columns=3)
+    offsets = array("Q")
+    for run in range(0, len(runs), 3):
+        first_chunk, per_chunk = runs[run] - 1, runs[run + 1]
+        last_chunk = runs[run + 3] - 1 if run + 3 < len(runs) else len(chunks)
+        for chunk in range(first_chunk, last_chunk):
+            offset = chunks[chunk]
+            for _ in range(per_chunk):
+                offsets.append(offset)
+                offset += sizes[len(offsets) - 1]
+
+    durations = array("Q")
+    stts_entries = _table(buf, stts, "I", columns=2)
+    for entry in range(0, len(stts_entries), 2):
+        durations.extend(array("Q", [stts_entries[entry + 1]]) * stts_entries[entry])
+
+    if len(offsets) != count or len(durations) != count:
+        raise IOError(f"Corrupt MP4 - {count} samples, but {len(offsets)} offsets and {len(durations)} durations")
+
+    times = array("Q", [0]) * count
+    for i in range(1, count):
+        times[i] = times[i - 1] + durations[i - 1]
+
+    return offsets, sizes, times, durations
+
+
+def _track(buf, index: int, trak: Box, format: Optional[str]) -> Optional[Track]:
+    mdia = child(buf, trak, "mdia")
+    if mdia is None:
+        return None
+
+    mdhd = child(buf, mdia, "mdhd")
+    hdlr = child(buf, mdia, "hdlr")
+    stbl = child(buf, mdia, "minf", "stbl")
+    stsd = stbl and child(buf, stbl, "stsd")
+    if mdhd is None or hdlr is None or stsd is None:
+        return None
+
+    handler = bytes(buf[hdlr.start + 8:hdlr.start + 12]).decode("latin-1")
+    # first sample description - its type is the codec tag, as ffprobe's codec_tag_string
+    descriptions = list(boxes(buf, stsd.start + FullBoxCount.size, stsd.end))
+    if not descriptions or (format is not None and descriptions[0].type != format):
+        return None
+
+    return Track(index, handler, descriptions[0].type, _timebase(buf, mdhd), *_samples(buf, stbl))
+
+
+def tracks(buf, format: Optional[str] = None) -> List[Track]:
+    """tracks of the movie (optionally only those of a format), in file order, so index is ffmpeg's stream number"""
+    moov = next((b for b in boxes(buf, 0, len(buf)) if b.type == "moov"), None)
+    if moov is None:
+        raise IOError("Not an MP4 file - no 'moov' box")
+
+    found = []
+    traks = [b for b in boxes(buf, moov.start, moov.end) if b.type == "trak"]
+    for index, trak in enumerate(traks):
+        track = _track(buf, index, trak, format)
+        if track is not None:
+            found.append(track)
+    return found
+
+
+def gpmd_track(buf) -> Optional[Track]:
+    matches = tracks(buf, format="gpmd")
+    if len(matches) > 1:
+        raise IOError("Multiple GoPro metadata tracks")
+    return matches[0] if matches else None
+
+
+def sample_data(buf, track: Track) -> bytes:
+    """the samples of the track, one after the other, as ffmpeg would copy them"""
+    if len(track) and max(o + s for o, s in zip(track.offsets, track.sizes)) > len(buf):
+        raise IOError("Truncated MP4 - samples are missing from the end of the file")
+    return b"".join(buf[o:o + s] for o, s in zip(track.offsets, track.sizes))
+
+
+def samples(buf, track: Track) -> Iterator[bytes]:
+    """
+    the samples of the track, one at a time. If buf is an mmap, the kernel is asked to read the next sample
+    while this one is being used
+    """
+    advise = getattr(buf, "madvise", None)
+    count = len(track)
+    for i in range(count):
+        if advise is not None and i + 1 < count:
+            start = track.offsets[i + 1] - track.offsets[i + 1] % mmap.PAGESIZE
+            end = min(track.offsets[i + 1] + track.sizes[i + 1], len(buf))
+            if end > start:
+                advise(mmap.MADV_WILLNEED, start, end - start)
+
+        offset, size = track.offsets[i], track.sizes[i]
+        if offset + size > len(buf):
+            raise IOError("Truncated MP4 - samples are missing from the end of the file")
+        yield buf[offset:offset + size]
+
+
+@contextlib.contextmanager
+def mapped(filepath: Path):
+    with open(filepath, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise IOError(f"Not an MP4 file - {filepath} is empty")
+        try:
+            yield mm
+        finally:
+            mm.close()
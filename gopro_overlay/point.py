@@ -35,7 +35,7 @@ class Point:
         self.lat = lat
 
     def __eq__(self, other):
-        return self.lat == other.lat and self.lon == other.lon
+        return type(other) == type(self) and self.lat == other.lat and self.lon == other.lon
 
     def __sub__(self, other):
         return Point(self.lat - other.lat, self.lon - other.lon)
@@ -84,7 +84,7 @@ class Point3:
         return f"Point3(x={self.x}, y={self.y}, z={self.z})"
 
     def __eq__(self, other: 'Point3'):
-        return (self.x == other.x) and (self.y == other.y) and (self.z == other.z)
+        return type(other) == type(self) and (self.x == other.x) and (self.y == other.y) and (self.z == other.z)
 
     def dot(self, other: 'Point3') -> float:
         return (self.x * other.x) + (self.y * other.y) + (self.z * other.z)
@@ -163,7 +163,7 @@ class Quaternion:
         return str(self)
 
     def __eq__(self, other: 'Quaternion'):
-        return (self.w == other.w) and (self.v == other.v)
+        return type(other) == type(self) and (self.w == other.w) and (self.v == other.v)
 
     def length(self) -> float:
         return math.sqrt(self.sum_squares())
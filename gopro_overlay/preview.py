@@ -0,0 +1,52 @@
+import math
+from typing import List, Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.timeunits import Timeunit
+
+
+def preview_indices(frames: int, fps: float, every: float) -> List[int]:
+    """indexes of frames, every `every` seconds, of a timeline of frames at fps"""
+    step = max(1, round(every * fps))
+    return list(range(0, frames, step))
+
+
+def tile_dimension(dimensions: Dimension, width: int) -> Dimension:
+    return Dimension(width, max(1, round(dimensions.y * width / dimensions.x)))
+
+
+def fmt_time(t: Timeunit) -> str:
+    seconds = int(t.millis() / 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def contact_sheet(tiles: List[Image.Image], labels: List[str], font: ImageFont.FreeTypeFont, columns: int = 4,
+                  gap: int = 4, backgrounds: Optional[List[Image.Image]] = None) -> Image.Image:
+    """
+    Lays out tiles (all the same size) in a grid, each on its background frame (or a plain grey), labelled
+    """
+    if not tiles:
+        raise ValueError("Need at least one tile")
+
+    width, height = tiles[0].size
+    columns = min(columns, len(tiles))
+    rows = math.ceil(len(tiles) / columns)
+
+    sheet = Image.new("RGBA", (gap + columns * (width + gap), gap + rows * (height + gap)), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(sheet)
+
+    for i, (tile, label) in enumerate(zip(tiles, labels)):
+        x = gap + (i % columns) * (width + gap)
+        y = gap + (i // columns) * (height + gap)
+
+        if backgrounds is not None:
+            background = backgrounds[i].convert("RGBA")
+        else:
+            background = Image.new("RGBA", tile.size, (64, 64, 64, 255))
+
+        sheet.paste(Image.alpha_composite(background, tile), (x, y))
+        draw.text((x + 4, y + 4), label, font=font, fill=(255, 255, 255), stroke_width=2, stroke_fill=(0, 0, 0))
+
+    return sheet
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import List, Iterable
+
+from PIL import Image, ImageChops
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.widgets.widgets import Canvas
+
+
+class OutsideRegions(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Region:
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def box(self):
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+    def overlaps(self, other: 'Region') -> bool:
+        return self.x < other.x + other.width and other.x < self.x + self.width and \
+            self.y < other.y + other.height and other.y < self.y + self.height
+
+    def union(self, other: 'Region') -> 'Region':
+        x = min(self.x, other.x)
+        y = min(self.y, other.y)
+        return Region(
+            x=x, y=y,
+            width=max(self.x + self.width, other.x + other.width) - x,
+            height=max(self.y + self.height, other.y + other.height) - y
+        )
+
+
+def merge_overlapping(regions: List[Region]) -> List[Region]:
+    regions = list(regions)
+    merged = True
+    while merged:
+        merged = False
+        for i, a in enumerate(regions):
+            for j in range(i + 1, len(regions)):
+                if a.overlaps(regions[j]):
+                    regions[i] = a.union(regions.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+    return sorted(regions, key=lambda r: (r.y, r.x))
+
+
+def _occupied_tiles(mask: Image.Image, tile: int):
+    width, height = mask.size
+    return {
+        (tx, ty)
+        for ty in range(0, (height + tile - 1) // tile)
+        for tx in range(0, (width + tile - 1) // tile)
+        if mask.crop((tx * tile, ty * tile, min(width, (tx + 1) * tile), min(height, (ty + 1) * tile))).getbbox()
+    }
+
+
+def _connected(tiles):
+    remaining = set(tiles)
+    while remaining:
+        todo = [remaining.pop()]
+        component = []
+        while todo:
+            tx, ty = todo.pop()
+            component.append((tx, ty))
+            for n in [(tx + dx, ty + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]:
+                if n in remaining:
+                    remaining.remove(n)
+                    todo.append(n)
+        yield component
+
+
+def find_regions(dimensions: Dimension, frames: Iterable[Image.Image], tile: int = 32, margin: int = 32) -> List[Region]:
+    """
+    Finds the areas of the frame that widgets draw in, from a sample of frames.
+    Each cluster of drawn-on tiles becomes a region, grown by margin, as widgets may draw a little
+    differently in frames that weren't sampled.
+    """
+    mask = Image.new("L", dimensions.tuple(), 0)
+    for frame in frames:
+        mask = ImageChops.lighter(mask, frame.getchannel("A"))
+
+    regions = []
+    for component in _connected(_occupied_tiles(mask, tile)):
+        xs = [t[0] for t in component]
+        ys = [t[1] for t in component]
+        x0 = max(0, min(xs) * tile - margin)
+        y0 = max(0, min(ys) * tile - margin)
+        x1 = min(dimensions.x, (max(xs) + 1) * tile + margin)
+        y1 = min(dimensions.y, (max(ys) + 1) * tile + margin)
+        regions.append(Region(x=x0, y=y0, width=x1 - x0, height=y1 - y0))
+
+    return merge_overlapping(regions)
+
+
+def _offsets(regions: List[Region]) -> List[int]:
+    offsets = []
+    y = 0
+    for r in regions:
+        offsets.append(y)
+        y += r.height
+    return offsets
+
+
+def packed_dimension(regions: List[Region]) -> Dimension:
+    return Dimension(
+        x=max(r.width for r in regions),
+        y=sum(r.height for r in regions)
+    )
+
+
+def overlay_filter(regions: List[Region]) -> str:
+    """ffmpeg filter graph that cuts packed regions back out of input 1 and overlays each in place on input 0"""
+    count = len(regions)
+    parts = ["[1:v]split={}{}".format(count, "".join(f"[s{i}]" for i in range(count)))]
+    for i, (region, y) in enumerate(zip(regions, _offsets(regions))):
+        parts.append(f"[s{i}]crop={region.width}:{region.height}:0:{y}[r{i}]")
+
+    previous = "[0:v]"
+    for i, region in enumerate(regions):
+        output = f"[o{i}]" if i < count - 1 else ""
+        parts.append(f"{previous}[r{i}]overlay={region.x}:{region.y}{output}")
+        previous = output
+
+    return ";".join(parts)
+
+
+class RegionPacker:
+    """
+    Copies regions of a full size frame into a smaller frame, stacked one above the other,
+    so that only the parts of the overlay that widgets draw on need to be sent to ffmpeg.
+    Like Scene, takes turns with its canvases, so a packed frame is valid for `canvases` calls
+
+    Regions found from a sample of frames can miss something a widget draws later - rather than lose it, pack raises
+    OutsideRegions for a frame with anything drawn outside the regions.
+    """
+
+    def __init__(self, regions: List[Region], canvases: int = 1):
+        if not regions:
+            raise ValueError("Need at least one region")
+        self.regions = regions
+        self.dimension = packed_dimension(regions)
+        self._placements = list(zip(regions, _offsets(regions)))
+        self._canvases = [Canvas(self.dimension) for _ in range(canvases)]
+        self._next = 0
+
+    def outside(self, image: Image.Image):
+        """the bounding box of what is drawn outside the regions, or None"""
+        alpha = image.getchannel("A")
+        for region in self.regions:
+            alpha.paste(0, region.box)
+        # quicker than getbbox, for the usual case of nothing there
+        if alpha.getextrema()[1] == 0:
+            return None
+        return alpha.getbbox()
+
+    def pack(self, image: Image.Image) -> memoryview:
+        outside = self.outside(image)
+        if outside is not None:
+            raise OutsideRegions(f"Widgets drew at {outside}, outside the overlay regions {[r.box for r in self.regions]}")
+
+        canvas = self._canvases[self._next]
+        self._next = (self._next + 1) % len(self._canvases)
+
+        for region, y in self._placements:
+            canvas.image.paste(image.crop(region.box), (0, y))
+
+        return canvas.view()
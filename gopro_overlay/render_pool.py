@@ -0,0 +1,133 @@
+import contextlib
+import multiprocessing
+import traceback
+from queue import Empty
+from typing import Callable, ContextManager, Iterator, List, Sequence, Any
+
+from gopro_overlay.timeunits import Timeunit
+
+
+class WorkerFailed:
+
+    def __init__(self, worker: int, reason: str):
+        self.worker = worker
+        self.reason = reason
+
+
+class WorkerDone:
+
+    def __init__(self, worker: int, stats):
+        self.worker = worker
+        self.stats = stats
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _render_chunks(worker: int, create_drawer, chunks, queue):
+    try:
+        with create_drawer() as draw:
+            last = None
+            for chunk in chunks:
+                for index, dt in enumerate(chunk):
+                    frame = draw(dt)
+                    if frame is not None:
+                        last = frame
+                    elif index == 0:
+                        # the frame before this one, in the timeline, came from another worker's chunk
+                        frame = last
+                    queue.put(frame)
+            stats = getattr(draw, "stats", None)
+            queue.put(WorkerDone(worker, stats() if stats else None))
+    except BaseException:
+        queue.put(WorkerFailed(worker, traceback.format_exc()))
+
+
+class FrameRenderPool:
+    """
+    Draws frames on several processes, and hands them back in timeline order.
+
+    The timeline is cut into contiguous chunks, which are dealt round-robin to the workers, so each worker
+    sees runs of consecutive timestamps, which keeps per-widget caches (Window, MovingMap, ...) useful.
+
+    Each worker builds its own overlay, using `create_drawer`, which should be a context manager yielding a
+    function of Timeunit -> frame. Frames need to be picklable, so bytes rather than images.
+
+    The drawing function can return None, meaning "the same as the last frame this worker drew" - it comes back as
+    None, meaning "the same as the frame before", except at the start of a chunk, where the worker sends its last
+    frame again instead.
+
+    If the drawing function has a `stats()` method, what it returns (which needs to be picklable) once the worker
+    has drawn all its frames is kept, for each worker, in `stats`, after the last frame has been read.
+
+    Memory use is bounded by workers * queue_size frames.
+    """
+
+    def __init__(self, workers: int, create_drawer: Callable[[], ContextManager[Callable[[Timeunit], Any]]],
+                 chunk_size: int = 10, queue_size: int = None):
+        if workers < 1:
+            raise ValueError(f"Need at least one worker, not {workers}")
+        self.workers = workers
+        self.create_drawer = create_drawer
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size if queue_size is not None else chunk_size
+        self.context = multiprocessing.get_context("fork")
+        self.stats = []
+
+    @contextlib.contextmanager
+    def frames(self, steps: Sequence[Timeunit]) -> Iterator[Iterator[Any]]:
+        chunks = chunked(list(steps), self.chunk_size)
+        self.stats = []
+
+        queues = [self.context.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        processes = [
+            self.context.Process(
+                target=_render_chunks,
+                args=(n, self.create_drawer, chunks[n::self.workers], queues[n]),
+                name=f"render-worker-{n}",
+                daemon=True
+            )
+            for n in range(self.workers)
+        ]
+
+        for p in processes:
+            p.start()
+
+        try:
+            yield self._reassemble(chunks, queues, processes)
+        finally:
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+            for p in processes:
+                p.join()
+            for q in queues:
+                q.close()
+
+    def _reassemble(self, chunks, queues, processes):
+        for index, chunk in enumerate(chunks):
+            worker = index % self.workers
+            for _ in chunk:
+                frame = _next_from(queues[worker], processes[worker])
+                if isinstance(frame, WorkerFailed):
+                    raise IOError(f"Render worker {frame.worker} failed:\n{frame.reason}")
+                yield frame
+
+        for worker in range(self.workers):
+            done = _next_from(queues[worker], processes[worker])
+            if isinstance(done, WorkerFailed):
+                raise IOError(f"Render worker {done.worker} failed:\n{done.reason}")
+            self.stats.append(done.stats)
+
+
+def _next_from(queue, process, poll=1.0):
+    while True:
+        try:
+            return queue.get(timeout=poll)
+        except Empty:
+            if not process.is_alive():
+                try:
+                    return queue.get_nowait()
+                except Empty:
+                    raise IOError(f"Render worker {process.name} exited with code {process.exitcode}") from None
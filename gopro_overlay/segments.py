@@ -0,0 +1,111 @@
+import math
+import multiprocessing
+import traceback
+from dataclasses import dataclass
+from queue import Empty
+from typing import Any, Dict, List, Optional, Callable
+
+from gopro_overlay.timeunits import Timeunit, timeunits
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A run of overlay frames, [first, first + count), rendered to its own file"""
+    index: int
+    first: int
+    count: int
+
+    def start(self, fps: float) -> Timeunit:
+        return timeunits(seconds=self.first / fps)
+
+    def duration(self, fps: float) -> Timeunit:
+        return timeunits(seconds=self.count / fps)
+
+
+def _snap_to_keyframe(boundary: int, fps: float, keyframes: List[float]) -> int:
+    """first frame at or after the keyframe nearest to the boundary, so the segment's seek lands just after it"""
+    nearest = min(keyframes, key=lambda k: abs(k - boundary / fps))
+    return math.ceil(round(nearest * fps, 6))
+
+
+def plan_segments(frames: int, segments: int, fps: float, keyframes: Optional[List[float]] = None) -> List[Segment]:
+    """
+    Splits frames into (at most) `segments` similar sized segments. If keyframes (in seconds) are given, segments
+    start at them, which may mean fewer segments, if keyframes are sparse.
+    """
+    if segments < 1:
+        raise ValueError(f"Need at least one segment, not {segments}")
+
+    boundaries = [round(frames * i / segments) for i in range(1, segments)]
+    if keyframes:
+        boundaries = [_snap_to_keyframe(b, fps, keyframes) for b in boundaries]
+
+    boundaries = sorted({b for b in boundaries if 0 < b < frames})
+    edges = [0, *boundaries, frames]
+
+    return [
+        Segment(index=i, first=first, count=end - first)
+        for i, (first, end) in enumerate(zip(edges, edges[1:]))
+        if end > first
+    ]
+
+
+def _render_segment(segment: Segment, render: Callable[[Segment], Any], queue):
+    try:
+        queue.put((segment.index, render(segment), None))
+    except BaseException:
+        queue.put((segment.index, None, traceback.format_exc()))
+
+
+def render_segments(segments: List[Segment], render: Callable[[Segment], Any], concurrency: Optional[int] = None,
+                    poll: float = 1.0, done: Callable[[Segment], None] = lambda s: None) -> Dict[int, Any]:
+    """
+    Renders each segment on its own process, up to `concurrency` at the same time (default all of them), so
+    that several ffmpeg encoders can be kept busy. `render` is called in the (forked) process, and is expected
+    to write the segment's file. `done` is called, in this process, as each segment finishes.
+
+    Returns what `render` returned for each segment (which needs to be picklable), by segment index.
+    """
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    concurrency = concurrency if concurrency else len(segments)
+
+    waiting = list(segments)
+    running = {}
+    results = {}
+
+    def start_next():
+        segment = waiting.pop(0)
+        # not a daemon, a segment may want its own processes
+        process = context.Process(target=_render_segment, args=(segment, render, queue), name=f"segment-{segment.index}")
+        process.start()
+        running[segment.index] = (segment, process)
+
+    try:
+        while waiting or running:
+            while waiting and len(running) < concurrency:
+                start_next()
+
+            try:
+                index, result, failure = queue.get(timeout=poll)
+            except Empty:
+                for i, (_, process) in running.items():
+                    if not process.is_alive() and process.exitcode != 0:
+                        raise IOError(f"Segment {i} exited with code {process.exitcode}") from None
+                continue
+
+            if failure is not None:
+                raise IOError(f"Segment {index} failed:\n{failure}")
+
+            segment, process = running.pop(index)
+            process.join()
+            results[index] = result
+            done(segment)
+        return results
+    finally:
+        for _, process in running.values():
+            if process.is_alive():
+                process.terminate()
+        for _, process in running.values():
+            process.join()
+        queue.close()
@@ -0,0 +1,148 @@
+import bisect
+import operator
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.gpmd import GoproMeta
+from gopro_overlay.gpmd_calculate import timestamp_calculators
+from gopro_overlay.gpmd_visitors import FanOutVisitor
+from gopro_overlay.gpmd_visitors_xyz import XYZVisitor, XYZComponents
+from gopro_overlay.point import PintPoint3
+from gopro_overlay.timeunits import Timeunit
+
+# SIUN of the streams, as units that pint understands
+sensor_units = {
+    "m/s²": "m/s^2",
+    "rad/s": "rad/s",
+}
+
+
+class SensorSeries:
+    """
+    Every sample of a high rate sensor (ACCL, GYRO - 200Hz or more), as columns: the frame time of each sample in
+    microseconds, like Timeunit, and x, y, z as float32, all in `unit`. Much smaller, and quicker to make, than
+    an Entry per sample.
+    """
+
+    def __init__(self, name: str, unit: Optional[str] = None, time=None, x=None, y=None, z=None):
+        self.name = name
+        self.unit = unit
+        self.time = time if time is not None else array("q")
+        self.x = x if x is not None else array("f")
+        self.y = y if y is not None else array("f")
+        self.z = z if z is not None else array("f")
+
+    def __len__(self):
+        return len(self.time)
+
+    def extend(self, unit: str, times: Iterable[int], x: Iterable[float], y: Iterable[float], z: Iterable[float]):
+        if self.unit is None:
+            self.unit = unit
+        elif unit != self.unit:
+            raise IOError(f"{self.name} changes units from {self.unit} to {unit}")
+        self.time.extend(times)
+        self.x.fromlist(list(x))
+        self.y.fromlist(list(y))
+        self.z.fromlist(list(z))
+
+    def append(self, other: 'SensorSeries'):
+        """the samples of another series of the same stream - from a later run of packets - after these"""
+        if len(other):
+            self.extend(other.unit, other.time, other.x, other.y, other.z)
+
+    def sort(self):
+        """packets can overlap a little at their edges, so samples aren't always in time order as they are found"""
+        time = self.time
+        if all(a <= b for a, b in zip(time, time[1:])):
+            return
+        order = sorted(range(len(time)), key=time.__getitem__)
+        for name in ["time", "x", "y", "z"]:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[i] for i in order]))
+
+    @property
+    def min(self) -> Timeunit:
+        return Timeunit(self.time[0])
+
+    @property
+    def max(self) -> Timeunit:
+        return Timeunit(self.time[-1])
+
+    def index_of(self, at: Timeunit) -> int:
+        """index of the first sample at or after the given time"""
+        return bisect.bisect_left(self.time, at.us)
+
+    def between(self, start: Timeunit, end: Timeunit) -> 'SensorSeries':
+        """the samples from start, up to but not including end"""
+        s, e = self.index_of(start), self.index_of(end)
+        return SensorSeries(self.name, self.unit, self.time[s:e], self.x[s:e], self.y[s:e], self.z[s:e])
+
+    def point(self, index: int, units) -> PintPoint3:
+        unit = units.Unit(self.unit)
+        return PintPoint3(
+            x=units.Quantity(self.x[index], unit),
+            y=units.Quantity(self.y[index], unit),
+            z=units.Quantity(self.z[index], unit),
+        )
+
+
+class SensorSeriesConverter:
+    """converts every sample of each XYZ packet, straight from the decoded samples into the series' columns"""
+
+    def __init__(self, frame_calculator, series: SensorSeries, total_samples=0):
+        self._frame_calculator = frame_calculator
+        self._series = series
+        self._total_samples = total_samples
+
+    def convert(self, counter, components: XYZComponents):
+        count = len(components.points)
+        sample_time_calculator = self._frame_calculator.next_packet(
+            components.timestamp,
+            self._total_samples,
+            count
+        )
+
+        unit = sensor_units.get(components.siun)
+        if unit is None:
+            raise IOError(f"Unsupported units {components.siun}")
+
+        values, width = components.points.values, components.points.width
+
+        def column(index, sign):
+            c = values[index::width].tolist()
+            return c if sign > 0 else list(map(operator.neg, c))
+
+        self._series.extend(
+            unit,
+            (sample_time_calculator(index)[0].us for index in range(count)),
+            *[column(index, sign) for index, sign in components.orin.columns]
+        )
+        self._total_samples += count
+
+
+def sensor_visitors(series: Dict[str, SensorSeries], calculators: Dict[str, Any], counter=0,
+                    total_samples: Optional[Dict[str, int]] = None) -> List[XYZVisitor]:
+    """a visitor for each of the series, keyed on its stream, that adds every sample of that stream to it"""
+    return [
+        XYZVisitor(
+            name,
+            on_item=SensorSeriesConverter(
+                calculators[name], found, total_samples[name] if total_samples is not None else 0
+            ).convert,
+            counter=counter
+        )
+        for name, found in series.items()
+    ]
+
+
+def sensor_series(meta: GoproMeta, metameta: Optional[MetaMeta], names=("ACCL", "GYRO")) -> Dict[str, SensorSeries]:
+    """every sample of each of the named XYZ streams, found in a single traversal"""
+    calculators = timestamp_calculators(meta, metameta, list(names))
+    found = {name: SensorSeries(name) for name in names}
+
+    meta.accept(FanOutVisitor(*sensor_visitors(found, calculators)))
+
+    for series in found.values():
+        series.sort()
+    return found
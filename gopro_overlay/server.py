@@ -0,0 +1,177 @@
+import itertools
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Any, Dict
+
+from gopro_overlay.common import new_thread_event_loop
+from gopro_overlay.log import log_to
+from gopro_overlay.timing import Timers
+
+default_socket_location = Path.home() / ".gopro-graphics" / "gopro-dashboard.sock"
+
+# render(args, cwd, timers, create_progress) - args as for gopro-dashboard, relative to the client's cwd
+JobRender = Callable[[List[str], Path, Timers, Callable[[int], Any]], None]
+
+
+class JobChannel:
+    """
+    Sends a job's events to its client, one json object per line. The client may go away before the job
+    finishes, after which events are dropped - the job still runs to completion.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self._lock = threading.Lock()
+        self.connected = True
+
+    def send(self, event: str, **fields):
+        line = json.dumps({"event": event, **fields}) + "\n"
+        with self._lock:
+            if not self.connected:
+                return
+            try:
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                self.connected = False
+
+    def log(self, message: str):
+        self.send("log", message=message)
+
+    def progress(self, max_value: int) -> 'JobProgress':
+        return JobProgress(self, max_value)
+
+
+class JobProgress:
+    """like a progressbar.ProgressBar, but sends a progress event at most every `every` seconds"""
+
+    def __init__(self, channel: JobChannel, max_value: int, every: float = 1.0, clock=time.monotonic):
+        self.channel = channel
+        self.max_value = max_value
+        self.every = every
+        self.clock = clock
+        self._last = None
+
+    def update(self, value: int):
+        now = self.clock()
+        if self._last is None or now - self._last >= self.every:
+            self._last = now
+            self.channel.send("progress", frame=value, frames=self.max_value)
+
+    def finish(self):
+        self.channel.send("progress", frame=self.max_value, frames=self.max_value)
+
+
+class RenderServer:
+    """
+    Accepts render jobs on a local unix socket, and runs up to `concurrency` of them at once, in this process,
+    so that everything that is slow to start (imports, units, fonts, ffmpeg checks, ...) is only done once.
+
+    A job is a single line of json - {"args": [...], "cwd": "..."}. The server replies with a line of json for each
+    event - accepted, started, log, progress, timer - finishing with done, after which the connection is closed.
+    """
+
+    def __init__(self, path: Path, render: JobRender, concurrency: int = 1):
+        if concurrency < 1:
+            raise ValueError(f"Need a concurrency of at least one, not {concurrency}")
+        self.path = path
+        self.render = render
+        self.concurrency = concurrency
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job",
+                                            initializer=new_thread_event_loop)
+        self._server = None
+
+    def _run(self, job: int, request: Dict, channel: JobChannel):
+        channel.send("started", job=job)
+        timers = Timers()
+        failure = None
+        try:
+            with log_to(channel.log):
+                self.render(request["args"], Path(request.get("cwd", ".")), timers, channel.progress)
+        except KeyboardInterrupt:
+            raise
+        except BaseException:
+            # includes SystemExit, from fatal(), which must not stop the server
+            failure = traceback.format_exc()
+
+        for timer in timers:
+            channel.send("timer", name=timer.name, count=timer.count, seconds=timer.seconds, text=str(timer))
+        channel.send("done", job=job, ok=failure is None, failure=failure)
+
+    def handle(self, rfile, wfile):
+        channel = JobChannel(wfile)
+        try:
+            request = json.loads(rfile.readline())
+            if not isinstance(request, dict) or not isinstance(request.get("args"), list):
+                raise ValueError("No args")
+        except ValueError:
+            channel.send("done", ok=False, failure="Unable to read job - expected a line of json, like {\"args\": [...]}")
+            return
+
+        job = next(self._ids)
+        channel.send("accepted", job=job)
+        self._executor.submit(self._run, job, request, channel).result()
+
+    def _bind(self):
+        if self.path.exists():
+            if not stat.S_ISSOCK(self.path.stat().st_mode):
+                raise IOError(f"{self.path} exists, and isn't a socket")
+            self.path.unlink()
+
+        render_server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                render_server.handle(self.rfile, self.wfile)
+
+        # jobs can write files anywhere this user can, so only this user may connect - from the moment it is bound
+        umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(str(self.path), Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        os.chmod(self.path, 0o600)
+        return server
+
+    def __enter__(self):
+        self._server = self._bind()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            self.path.unlink(missing_ok=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(path: Path, args: List[str], cwd: Path, on_event: Callable[[Dict], None] = lambda e: None) -> Dict:
+    """Sends a job to a RenderServer, calling on_event for each event, returning the final (done) event"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(path))
+        with s.makefile("rwb") as f:
+            f.write((json.dumps({"args": args, "cwd": str(cwd)}) + "\n").encode("utf-8"))
+            f.flush()
+            for line in f:
+                event = json.loads(line)
+                on_event(event)
+                if event["event"] == "done":
+                    return event
+
+    raise IOError("Server closed the connection before the job was done")
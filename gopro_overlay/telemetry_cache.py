@@ -0,0 +1,110 @@
+import dataclasses
+import hashlib
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from gopro_overlay.__version__ import __version__
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
+from gopro_overlay.framemeta_columns import encode, decode, Unsupported, Reader
+from gopro_overlay.gpmd_visitors_gps import GPSLockLog
+from gopro_overlay.log import log
+from gopro_overlay.sensors import SensorSeries
+
+# Change this whenever parse_gopro would make different entries from the same file
+PARSER_VERSION = 3
+
+Header = struct.Struct("<4sI")
+MAGIC = b"GPTC"
+
+
+class TelemetryCache:
+    """
+    What parse_gopro made from each GoPro file, keyed on its path, size, modification time and the parser
+    version, so layouts can be tried over and over against the same footage without parsing it every time.
+
+    Each file's entries are stored as columns of numbers in their own file under the cache directory, along with
+    its GPS lock log, so a lock filter can be applied to them just as it would be while parsing. They can be loaded
+    back as entries, or, with columnar, straight into a ColumnarFrameMeta. Any sensor series parsed along with them
+    are stored too, and a file parsed without the series that are asked for isn't loaded.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / "telemetry"
+
+    @staticmethod
+    def _key(filepath, metameta: MetaMeta) -> dict:
+        st = os.stat(filepath)
+        return {
+            "path": os.path.abspath(filepath),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "parser": f"{__version__}/{PARSER_VERSION}",
+            "metameta": dataclasses.asdict(metameta) if metameta is not None else None,
+        }
+
+    def _file_for(self, filepath) -> Path:
+        return self.path / f"{hashlib.sha256(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:32]}.bin"
+
+    def load(self, filepath, units, metameta: MetaMeta, columnar=False,
+             sensors: Optional[Dict[str, SensorSeries]] = None) -> Optional[Tuple[FrameMeta, GPSLockLog]]:
+        cached = self._file_for(filepath)
+        try:
+            data = cached.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        try:
+            magic, length = Header.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError("Not a telemetry cache file")
+            header = json.loads(data[Header.size:Header.size + length].decode("utf-8"))
+            if header["key"] != self._key(filepath, metameta):
+                return None
+            if sensors is not None and not set(sensors).issubset(s["name"] for s in header["sensors"]):
+                return None
+            reader = Reader(memoryview(data), Header.size + length, header["byteorder"])
+            lock_log = GPSLockLog([reader.take(t, header["lock_log"]) for t in GPSLockLog.typecodes.values()])
+            found = {
+                s["name"]: SensorSeries(s["name"], s["unit"], *[reader.take(t, s["samples"]) for t in "qfff"])
+                for s in header["sensors"]
+            }
+            if columnar:
+                frame_meta = ColumnarFrameMeta.decode(header, reader.data, reader.offset, units)
+            else:
+                frame_meta = decode(header, reader.data, reader.offset, units, FrameMeta())
+            if sensors is not None:
+                sensors.update((name, found[name]) for name in sensors)
+            return frame_meta, lock_log
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            log(f"Ignoring telemetry cache {cached} - {e}")
+            return None
+
+    def save(self, filepath, metameta: MetaMeta, frame_meta: FrameMeta, lock_log: GPSLockLog,
+             sensors: Optional[Dict[str, SensorSeries]] = None):
+        try:
+            header, blobs = encode(frame_meta)
+        except Unsupported as e:
+            log(f"Not caching telemetry for {filepath} - {e}")
+            return
+
+        header["key"] = self._key(filepath, metameta)
+        header["lock_log"] = len(lock_log)
+        sensors = list(sensors.values()) if sensors is not None else []
+        header["sensors"] = [{"name": s.name, "unit": s.unit, "samples": len(s)} for s in sensors]
+        encoded = json.dumps(header).encode("utf-8")
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        cached = self._file_for(filepath)
+        temporary = cached.with_name(f"{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with temporary.open("wb") as f:
+            f.write(Header.pack(MAGIC, len(encoded)))
+            f.write(encoded)
+            for blob in [*lock_log.columns(), *[c for s in sensors for c in (s.time, s.x, s.y, s.z)], *blobs]:
+                blob.tofile(f)
+        os.replace(temporary, cached)
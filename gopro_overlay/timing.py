@@ -1,6 +1,6 @@
 import contextlib
 import time
-from typing import TypeVar, Callable
+from typing import TypeVar, Callable, Iterable, Iterator
 
 from gopro_overlay.log import log
 
@@ -22,6 +22,19 @@ class PoorTimer:
         self.count += 1
         return r
 
+    def timed(self, iterable: Iterable[T]) -> Iterator[T]:
+        """time how long each item takes to arrive from the iterable"""
+        iterator = iter(iterable)
+        while True:
+            t = time.time_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.total += (time.time_ns() - t)
+            self.count += 1
+            yield item
+
     @contextlib.contextmanager
     def timing(self, doprint=True):
         t = time.time_ns()
@@ -54,3 +67,30 @@ class PoorTimer:
     def __str__(self):
         return f"{' ' * 4 * self.indent}Timer({self.name} - Called: {self.count:,.0f}, Total: {self.seconds:.5f}, " \
                f"Avg: {self.avg:.5f}, Rate: {self.rate:,.2f})"
+
+
+class Timers:
+    """PoorTimers by name, so the timings of several renders can be added up"""
+
+    def __init__(self):
+        self._timers = {}
+
+    def timer(self, name) -> PoorTimer:
+        if name not in self._timers:
+            self._timers[name] = PoorTimer(name)
+        return self._timers[name]
+
+    def include(self, timer: PoorTimer):
+        mine = self.timer(timer.name)
+        mine.total += timer.total
+        mine.count += timer.count
+
+    def merge(self, other: 'Timers'):
+        for timer in other:
+            self.include(timer)
+
+    def __iter__(self):
+        return iter(list(self._timers.values()))
+
+    def __len__(self):
+        return len(self._timers)
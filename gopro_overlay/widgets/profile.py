@@ -11,6 +11,10 @@ class ProfiledWidget(Widget):
         self.widget = widget
         self.timer = PoorTimer(name, level)
 
+    @property
+    def static(self):
+        return self.widget.static
+
     def draw(self, image, draw):
         with self.timer.timing(doprint=False):
             self.widget.draw(image, draw)
@@ -12,7 +12,10 @@ class CachingText(Widget):
                  fill=None,
                  stroke=(0, 0, 0),
                  stroke_width=2,
+                 static=False,
                  ):
+        """static=True promises that value() will always return the same text"""
+        self.static = static
         self.at = at
         self.value = value
         self.font = font
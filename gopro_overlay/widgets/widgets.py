@@ -1,5 +1,6 @@
 import functools
 import importlib
+import itertools
 import math
 import os
 from typing import Tuple, List
@@ -13,11 +14,16 @@ from gopro_overlay.point import Coordinate
 
 
 class Widget:
+    # static widgets always draw the same thing, by compositing, so the Scene can draw them just once
+    static = False
+
     def draw(self, image: Image, draw: ImageDraw):
         raise NotImplemented("not implemented")
 
 
 class EmptyDrawable(Widget):
+    static = True
+
     def draw(self, image: Image, draw: ImageDraw):
         pass
 
@@ -27,12 +33,18 @@ class Composite(Widget):
     def __init__(self, *widgets):
         self.widgets = widgets
 
+    @property
+    def static(self):
+        return all(w.static for w in self.widgets)
+
     def draw(self, image: Image, draw: ImageDraw):
         for w in self.widgets:
             w.draw(image, draw)
 
 
 class Drawable(Widget):
+    static = True
+
     def __init__(self, at, drawable):
         self.at = at
         self.drawable = drawable
@@ -143,6 +155,10 @@ class Translate(Widget):
         self.at = at
         self.widget = widget
 
+    @property
+    def static(self):
+        return self.widget.static
+
     def draw(self, image: Image, draw: ImageDraw):
         ivp = ImageTranslate(self.at, image)
         dvp = DrawTranslate(self.at, draw)
@@ -172,6 +188,10 @@ class Frame(Widget):
         self.mask = None
         self.fade_out = fade_out
 
+    @property
+    def static(self):
+        return self.child.static
+
     def _maybe_init(self):
         if self.mask is None:
             self.mask = Image.new('L', (self.dimensions.x, self.dimensions.y), 0)
@@ -222,17 +242,105 @@ class Frame(Widget):
         image.alpha_composite(rect, (0, 0))
 
 
-class Scene:
+def flatten(widget: Widget) -> List[Widget]:
+    """Unpack composites (also inside translations) into the list of widgets they would draw, in order"""
+    if isinstance(widget, Composite):
+        return [f for w in widget.widgets for f in flatten(w)]
+    if isinstance(widget, Translate):
+        return [Translate(widget.at, f) for f in flatten(widget.widget)]
+    return [widget]
+
+
+class StaticLayer(Widget):
+    """A run of static widgets, pre-drawn once and cropped to the area they cover"""
+    static = True
 
     def __init__(self, dimensions: Dimension, widgets: List[Widget]):
+        image = Image.new("RGBA", (dimensions.x, dimensions.y), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+
+        for w in widgets:
+            w.draw(image, draw)
+
+        self.bbox = image.getbbox()
+        self.image = image.crop(self.bbox) if self.bbox else None
+
+    def paste(self, image: Image):
+        if self.image is not None:
+            image.paste(self.image, self.bbox[0:2])
+
+    def draw(self, image: Image, draw: ImageDraw):
+        if self.image is not None:
+            image.alpha_composite(self.image, self.bbox[0:2])
+
+
+class Canvas:
+    """An RGBA image that draws straight into a bytearray, so frames can be handed on without tobytes()"""
+
+    def __init__(self, dimensions: Dimension):
+        self.dimensions = dimensions
+        self.buffer = bytearray(dimensions.x * dimensions.y * 4)
+        self.image = Image.frombuffer("RGBA", (dimensions.x, dimensions.y), self.buffer, "raw", "RGBA", 0, 1)
+        # PIL marks frombuffer images readonly, and would copy them on first draw, but this memory is ours to draw on
+        self.image.readonly = 0
+
+    def view(self) -> memoryview:
+        return memoryview(self.buffer)
+
+    def clear(self, base: Image = None):
+        if base is not None:
+            self.image.paste(base)
+        else:
+            self.image.paste((0, 0, 0, 0), (0, 0, self.dimensions.x, self.dimensions.y))
+
+
+class Scene:
+    """
+    Draws widgets onto a fixed set of canvases, taking turns, so the image returned by draw() is only valid
+    until that canvas comes round again, after `canvases` more calls. Use buffer() to get at the raw rgba bytes
+    of the last frame without copying.
+    """
+
+    def __init__(self, dimensions: Dimension, widgets: List[Widget], canvases: int = 1):
         self._widgets = widgets
         self._dimensions = dimensions
+        self._base = None
+        self._layers = None
+        self._canvases = [Canvas(dimensions) for _ in range(canvases)]
+        self._next = 0
+        self._canvas = self._canvases[0]
+
+    def _init_layers(self):
+        flattened = [f for w in self._widgets for f in flatten(w)]
+
+        layers = []
+        for static, run in itertools.groupby(flattened, key=lambda w: w.static):
+            if static:
+                layers.append(StaticLayer(self._dimensions, list(run)))
+            else:
+                layers.extend(run)
+
+        if layers and isinstance(layers[0], StaticLayer):
+            self._base = Image.new("RGBA", (self._dimensions.x, self._dimensions.y), (0, 0, 0, 0))
+            layers.pop(0).paste(self._base)
+
+        self._layers = layers
+
+    def buffer(self) -> memoryview:
+        return self._canvas.view()
 
     def draw(self) -> Image.Image:
-        image = Image.new("RGBA", (self._dimensions.x, self._dimensions.y), (0, 0, 0, 0))
+        if self._layers is None:
+            self._init_layers()
+
+        self._canvas = self._canvases[self._next]
+        self._next = (self._next + 1) % len(self._canvases)
+        self._canvas.clear(self._base)
+
+        image = self._canvas.image
         draw = ImageDraw.Draw(image)
 
-        for w in self._widgets:
+        for w in self._layers:
             w.draw(image, draw)
 
         return image
@@ -54,6 +54,9 @@ setup(
         "bin/gopro-contrib-data-extract.py",
         "bin/gopro-cut.py",
         "bin/gopro-dashboard.py",
+        "bin/gopro-dashboard-batch.py",
+        "bin/gopro-dashboard-client.py",
+        "bin/gopro-dashboard-server.py",
         "bin/gopro-extract.py",
         "bin/gopro-join.py",
         "bin/gopro-layout.py",
@@ -4,7 +4,7 @@ from typing import Optional
 
 import pytest
 
-from gopro_overlay.arguments import gopro_dashboard_arguments
+from gopro_overlay.arguments import gopro_dashboard_arguments, gopro_dashboard_batch_arguments, relative_to
 from gopro_overlay.geo import ArgsKeyFinder
 from gopro_overlay.point import Point, BoundingBox
 
@@ -177,6 +177,81 @@ def test_units_user():
     assert do_args("--units-temperature", "kelvin").units_temperature == "kelvin"
 
 
+def test_overlay_fps():
+    assert do_args().overlay_fps == 10.0
+    assert not do_args().overlay_vfr
+    assert do_args("--overlay-fps", "25").overlay_fps == 25.0
+    assert do_args("--overlay-vfr").overlay_vfr
+
+
+def test_overlay_fps_must_be_positive():
+    with pytest.raises(SystemExit):
+        do_args("--overlay-fps", "0")
+
+
+def test_segments():
+    assert do_args().segments == 1
+    assert do_args("--segments", "4").segments == 4
+
+
+def test_segments_are_their_own_workers():
+    with pytest.raises(SystemExit):
+        do_args("--segments", "4", "--workers", "2")
+
+
+def test_resumable():
+    args = do_args("--resumable")
+    assert args.resumable
+    assert args.segment_length == 60.0
+
+    with pytest.raises(SystemExit):
+        do_args("--resumable", "--workers", "2")
+
+
+def test_batch():
+    args = gopro_dashboard_batch_arguments(["a.MP4", "b.MP4", "--output-dir", "out", "--layout", "speed-awareness"])
+    assert args.inputs == [Path("a.MP4"), Path("b.MP4")]
+    assert args.output_dir == Path("out")
+    assert args.concurrency == 1
+    assert not args.related
+    assert args.layout == "speed-awareness"
+
+
+def test_batch_needs_output_dir():
+    with pytest.raises(SystemExit):
+        gopro_dashboard_batch_arguments(["a.MP4"])
+
+
+def test_batch_gpx_only_always_has_input():
+    assert gopro_dashboard_batch_arguments(["a.MP4", "--output-dir", "out", "--use-gpx-only", "--gpx", "bob"]).use_gpx_only
+
+
+def test_batch_concurrency_not_with_workers():
+    assert gopro_dashboard_batch_arguments(["a.MP4", "--output-dir", "out", "--concurrency", "4"]).concurrency == 4
+
+    with pytest.raises(SystemExit):
+        gopro_dashboard_batch_arguments(["a.MP4", "--output-dir", "out", "--concurrency", "2", "--workers", "2"])
+
+
+def test_relative_to_client_directory():
+    args = relative_to(do_args("--gpx", "ride.gpx", "--cache-dir", "/cache"), Path("/client"))
+    assert args.input == Path("/client/input")
+    assert args.output == Path("/client/output")
+    assert args.gpx == Path("/client/ride.gpx")
+    assert args.cache_dir == Path("/cache")
+    assert args.font == "Roboto-Medium.ttf"
+
+
+def test_preview():
+    args = do_args("--preview")
+    assert args.preview
+    assert args.preview_every == 60.0
+    assert do_args("--preview", "--preview-every", "5").preview_every == 5.0
+
+    with pytest.raises(SystemExit):
+        do_args("--preview", "--segments", "2")
+
+
 def do_args(*args, input: Optional[str] = "input", output: Optional[str] = "output"):
     all_args = [a for a in [input, output, *args] if a]
     print(all_args)
@@ -0,0 +1,80 @@
+import argparse
+import threading
+from pathlib import Path
+
+import pytest
+
+from gopro_overlay.batch import batch_inputs, clip_arguments, render_batch
+from gopro_overlay.log import fatal
+
+
+def touch(d: Path, *names):
+    for name in names:
+        (d / name).touch()
+
+
+def test_batch_inputs_from_directory(tmp_path):
+    touch(tmp_path, "GH020001.MP4", "GH010001.MP4", "notes.txt")
+
+    assert batch_inputs([tmp_path]) == [tmp_path / "GH010001.MP4", tmp_path / "GH020001.MP4"]
+
+
+def test_batch_inputs_with_related_files(tmp_path):
+    touch(tmp_path, "GH010001.MP4", "GH020001.MP4", "GH030001.MP4", "GH010002.MP4", "other.mp4")
+
+    assert batch_inputs([tmp_path / "GH020001.MP4", tmp_path / "other.mp4"], related=True) == [
+        tmp_path / "GH010001.MP4", tmp_path / "GH020001.MP4", tmp_path / "GH030001.MP4", tmp_path / "other.mp4"
+    ]
+
+
+def test_batch_inputs_only_once(tmp_path):
+    touch(tmp_path, "GH010001.MP4", "GH020001.MP4")
+
+    assert batch_inputs([tmp_path / "GH010001.MP4", tmp_path / "GH020001.MP4"], related=True) == [
+        tmp_path / "GH010001.MP4", tmp_path / "GH020001.MP4"
+    ]
+
+
+def test_batch_inputs_must_exist(tmp_path):
+    with pytest.raises(IOError):
+        batch_inputs([tmp_path / "missing.MP4"])
+
+
+def test_clip_arguments():
+    args = argparse.Namespace(inputs=[Path("a")], output_dir=Path("out"), related=False, concurrency=2, layout="xml")
+
+    clip = clip_arguments(args, Path("in/GH010001.MP4"))
+
+    assert vars(clip) == {"layout": "xml", "input": Path("in/GH010001.MP4"), "output": Path("out/GH010001.MP4")}
+
+
+def test_render_batch_carries_on_after_failure():
+    rendered = []
+
+    def render(clip, timers):
+        timers.timer("program").time(lambda: rendered.append(clip))
+        if clip == Path("b"):
+            fatal("b is broken")
+
+    batch = render_batch([Path("a"), Path("b"), Path("c")], render)
+
+    assert rendered == [Path("a"), Path("b"), Path("c")]
+    assert [c.ok for c in batch.clips] == [True, False, True]
+    assert "SystemExit" in batch.failed[0].failure
+    assert batch.timers.timer("program").count == 3
+
+
+def test_render_batch_concurrently():
+    clips = [Path(f"{i}") for i in range(4)]
+    together = threading.Barrier(2, timeout=5)
+    finished = []
+
+    def render(clip, timers):
+        # would time out if two clips weren't rendering at the same time
+        together.wait()
+
+    batch = render_batch(clips, render, concurrency=2, done=lambda r: finished.append(r.clip))
+
+    assert [c.clip for c in batch.clips] == clips
+    assert all(c.ok for c in batch.clips)
+    assert sorted(finished) == clips
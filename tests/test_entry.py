@@ -1,3 +1,4 @@
+import pickle
 from datetime import timedelta
 
 from gopro_overlay.entry import Entry
@@ -26,3 +27,34 @@ def test_interpolating_quantity():
     e2 = Entry(datetime_of(10), alt=metres(20))
 
     assert e1.interpolate(e2, datetime_of(1)).alt == metres(11)
+
+
+def test_items_holds_known_and_other_fields():
+    e = Entry(datetime_of(0), alt=metres(10), hr=None, something=1, nothing=None)
+
+    assert e.alt == metres(10)
+    assert e.something == 1
+    assert e.hr is None
+    assert e.nothing is None
+    assert e.never_set is None
+    assert e.items == {"alt": metres(10), "something": 1}
+
+
+def test_updating_entry():
+    e = Entry(datetime_of(0), alt=metres(10))
+
+    e.update(alt=None, speed=metres(1), other=2)
+    assert e.alt is None
+    assert e.speed == metres(1)
+    assert e.other == 2
+    assert e.items == {"speed": metres(1), "other": 2}
+
+    e.update(other=None)
+    assert e.items == {"speed": metres(1)}
+
+
+def test_entry_survives_pickling():
+    e = pickle.loads(pickle.dumps(Entry(datetime_of(0), alt=metres(10), other=2)))
+
+    assert e.dt == datetime_of(0)
+    assert e.items == {"alt": metres(10), "other": 2}
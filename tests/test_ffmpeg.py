@@ -1,3 +1,4 @@
+import json
 import os
 from io import BytesIO
 from os import stat_result
@@ -72,11 +73,15 @@ def test_parsing_stream_information():
     streams = ffmpeg.find_streams(
         "whatever",
         invoke=fake_invoke(
-            expected=["ffprobe", "-hide_banner", "-print_format", "json", "-show_streams", "whatever"],
+            expected=["ffprobe", "-hide_banner", "-print_format", "json", "-show_entries",
+                      "stream=index,codec_type,codec_tag_string,width,height,duration,nb_frames,time_base"
+                      ":packet=stream_index,duration",
+                      "-read_intervals", "%+3", "whatever"],
             stdout=ffprobe_output
         ),
         find_frame_duration=find_frame,
-        stat=stat
+        stat=stat,
+        probes=ffmpeg.ProbeCache()
     )
 
     assert streams.video.stream == 0
@@ -91,6 +96,72 @@ def test_parsing_stream_information():
     assert streams.file.length == 9876
 
 
+def fake_stat(size=9876, mtime=30):
+    return lambda file: stat_result([000, 1234, 123, 1, 1000, 1000, size, 10, mtime, 30])
+
+
+def counting_invoke(stdout):
+    calls = []
+
+    def invoked(commands):
+        calls.append(commands)
+        return objectview({"stderr": "", "stdout": stdout})
+
+    return invoked, calls
+
+
+def probe_with_packet():
+    probe = json.loads(ffprobe_output)
+    probe["packets"] = [
+        {"stream_index": 0, "duration": 1001},
+        {"stream_index": 3, "duration": 1001},
+    ]
+    return json.dumps(probe)
+
+
+def test_find_streams_takes_gpmd_frame_duration_from_same_probe():
+    invoked, calls = counting_invoke(probe_with_packet())
+
+    def find_frame(*args):
+        raise AssertionError("should not probe again")
+
+    streams = ffmpeg.find_streams("whatever", invoke=invoked, find_frame_duration=find_frame, stat=fake_stat(),
+                                  probes=ffmpeg.ProbeCache())
+
+    assert streams.meta.frame_duration == 1001
+    assert len(calls) == 1
+
+
+def test_find_streams_only_probes_each_file_once():
+    invoked, calls = counting_invoke(probe_with_packet())
+    probes = ffmpeg.ProbeCache()
+
+    first = ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=probes)
+    second = ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=probes)
+
+    assert first == second
+    assert len(calls) == 1
+
+    ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(mtime=31), probes=probes)
+    ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(size=9877, mtime=31), probes=probes)
+    assert len(calls) == 3
+
+
+def test_probe_cache_persists_between_runs(tmp_path):
+    path = tmp_path / "probes.jsonl"
+    invoked, calls = counting_invoke(probe_with_packet())
+
+    first = ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=ffmpeg.ProbeCache(path))
+
+    with path.open("a") as f:
+        f.write('{"key": ["torn')
+
+    second = ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=ffmpeg.ProbeCache(path))
+
+    assert first == second
+    assert len(calls) == 1
+
+
 class FakePopen:
     def __init__(self):
         self.stdin = BytesIO()
@@ -216,3 +287,136 @@ def test_extract_frame():
 def test_flatten():
     l = ["a", ["b", "c"], "d", ["e", "f", "g"]]
     assert ffmpeg.flatten(l) == ["a", "b", "c", "d", "e", "f", "g"]
+
+
+def test_ffmpeg_generate_execute_fps():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlay(output=Path("output"), overlay_size=Dimension(100, 200), execution=fake, fps=25.0)
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[fake.args.index("-framerate") + 1] == "25.0"
+
+
+def test_ffmpeg_overlay_execute_vfr():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(input=Path("input"), output=Path("output"), overlay_size=Dimension(3, 4), execution=fake, vfr=True)
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel", "info",
+        "-i", "input",  # input 0
+        "-f", "matroska",  # timestamps come with the frames
+        "-i", "-",  # input 1
+        "-filter_complex", "[0:v][1:v]overlay",
+        "-vcodec", "libx264",
+        "-preset", "veryfast",
+        "output"
+    ]
+
+
+def test_ffmpeg_overlay_execute_filter():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(input=Path("input"), output=Path("output"), overlay_size=Dimension(3, 4), execution=fake,
+                                vsize=720, overlay_filter="[1:v]crop=1:1:0:0[r];[0:v][r]overlay=2:3")
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[fake.args.index("-filter_complex") + 1] == "[1:v]crop=1:1:0:0[r];[0:v][r]overlay=2:3,scale=-1:720"
+
+
+def test_finding_keyframes():
+    keyframes = ffmpeg.find_keyframes(
+        "whatever-file",
+        invoke=fake_invoke(
+            expected=["ffprobe", "-hide_banner", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+                      "-print_format", "csv=print_section=0", "whatever-file"],
+            stdout="1.001000,__\n0.000000,K_\n0.500500,K_\nN/A,K_\n"
+        )
+    )
+
+    assert keyframes == [0.0, 0.5005]
+
+
+def test_ffmpeg_overlay_execute_segment():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(input=Path("input"), output=Path("output"), overlay_size=Dimension(3, 4), execution=fake,
+                                start=timeunits(seconds=12.5), duration=timeunits(seconds=30))
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[:11] == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel", "info",
+        "-ss", "12.5",  # seek input 0 to start of segment
+        "-t", "30.0",  # and only read the segment
+        "-i", "input",
+    ]
+
+
+def test_load_frames_batches_seeks_into_one_call():
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        frames = cmd.count("-ss")
+        return objectview({"stdout": bytes(2 * 1 * 4 * frames)})
+
+    frames = ffmpeg.load_frames(Path("input"), [timeunits(seconds=s) for s in [0, 1.5, 3]], Dimension(2, 1), run=fake_run, batch=2)
+
+    assert len(frames) == 3
+    assert [len(f) for f in frames] == [8, 8, 8]
+    assert len(calls) == 2
+    assert calls[0][4:12] == ["-ss", "0.0", "-i", str(Path("input").absolute()), "-ss", "1.5", "-i", str(Path("input").absolute())]
+    assert calls[0][calls[0].index("-filter_complex") + 1] == \
+           "[0:v]trim=end_frame=1,scale=2:1,setsar=1[f0];[1:v]trim=end_frame=1,scale=2:1,setsar=1[f1];[f0][f1]concat=n=2:v=1:a=0[out]"
+
+
+def test_load_frames_past_the_end():
+    with pytest.raises(IOError):
+        ffmpeg.load_frames(Path("input"), [timeunits(seconds=0), timeunits(seconds=100)], Dimension(2, 1),
+                           run=lambda cmd, **kwargs: objectview({"stdout": bytes(8)}))
+
+
+def test_ffmpeg_overlay_scales_video_first():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(input=Path("input"), output=Path("output"), overlay_size=Dimension(3, 4), execution=fake,
+                                vsize=720, scale_first=True)
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[fake.args.index("-filter_complex") + 1] == "[0:v]scale=-1:720[scaled];[scaled][1:v]overlay"
+
+
+def test_ffmpeg_overlay_scales_video_first_with_regions():
+    ffmpeg = FFMPEGOverlayVideo(input=Path("input"), output=Path("output"), overlay_size=Dimension(3, 4), vsize=720,
+                                overlay_filter="[1:v]crop=1:1:0:0[r];[0:v][r]overlay=2:3", scale_first=True)
+
+    assert ffmpeg.filter() == "[0:v]scale=-1:720[scaled];[1:v]crop=1:1:0:0[r];[scaled][r]overlay=2:3"
+
+
+def test_probe_cache_appends_after_torn_line(tmp_path):
+    path = tmp_path / "probes.jsonl"
+    path.write_text('{"key": ["torn')
+
+    invoked, calls = counting_invoke(probe_with_packet())
+    ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=ffmpeg.ProbeCache(path))
+    ffmpeg.find_streams("whatever", invoke=invoked, stat=fake_stat(), probes=ffmpeg.ProbeCache(path))
+
+    assert len(calls) == 1
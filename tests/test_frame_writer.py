@@ -0,0 +1,94 @@
+import time
+from io import BytesIO
+
+import pytest
+
+from gopro_overlay.frame_writer import AsyncFrameWriter
+
+
+class SlowWriter:
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.written = []
+
+    def write(self, frame):
+        time.sleep(self.delay)
+        self.written.append(bytes(frame))
+        return len(frame)
+
+
+class BrokenWriter:
+
+    def write(self, frame):
+        raise BrokenPipeError()
+
+
+def test_frames_are_written_in_order():
+    output = BytesIO()
+
+    with AsyncFrameWriter(output) as writer:
+        for i in range(10):
+            writer.write(bytes([i]))
+
+    assert output.getvalue() == bytes(range(10))
+    assert writer.write_timer.count == 10
+    assert writer.stall_timer.count == 10
+
+
+def test_extra_arguments_are_passed_on():
+    output = []
+
+    class Recording:
+        def write(self, frame, at):
+            output.append((frame, at))
+
+    with AsyncFrameWriter(Recording()) as writer:
+        writer.write(b"a", 1)
+        writer.write(b"b", 2)
+
+    assert output == [(b"a", 1), (b"b", 2)]
+
+
+def test_slow_writer_is_encode_bound():
+    output = SlowWriter(delay=0.01)
+
+    with AsyncFrameWriter(output, queue_size=2) as writer:
+        for i in range(10):
+            writer.write(bytes([i]))
+
+    assert len(output.written) == 10
+    assert writer.bound == "encode-bound"
+    assert writer.max_depth == 2
+    assert "encode-bound" in str(writer)
+
+
+def test_slow_drawing_is_render_bound():
+    output = SlowWriter()
+
+    with AsyncFrameWriter(output, queue_size=2) as writer:
+        for i in range(5):
+            time.sleep(0.01)
+            writer.write(bytes([i]))
+
+    assert writer.bound == "render-bound"
+    assert writer.max_depth <= 1
+
+
+def test_writer_errors_are_raised_to_the_drawer():
+    with pytest.raises(BrokenPipeError):
+        with AsyncFrameWriter(BrokenWriter(), queue_size=1) as writer:
+            for i in range(10):
+                writer.write(bytes([i]))
+                time.sleep(0.01)
+
+
+def test_writer_errors_are_raised_on_close():
+    with pytest.raises(BrokenPipeError):
+        with AsyncFrameWriter(BrokenWriter()) as writer:
+            writer.write(b"a")
+
+
+def test_needs_a_queue():
+    with pytest.raises(ValueError):
+        AsyncFrameWriter(BytesIO(), queue_size=0)
@@ -4,7 +4,9 @@ from datetime import timedelta
 
 from gopro_overlay import fake
 from gopro_overlay.entry import Entry
-from gopro_overlay.framemeta import FrameMeta, Window
+from gopro_overlay.framemeta import FrameMeta, Window, refilter_gps_lock
+from gopro_overlay.gpmd import GPSFix
+from gopro_overlay.gpmd_visitors_gps import GPSLockLog, GPSLockComponents, GPSLockTracker
 from gopro_overlay.point import Point
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
@@ -159,4 +161,18 @@ def test_skipping_items():
     assert len(skipped) == 3
     assert skipped[0].lat == 1.0
     assert skipped[1].lat == 3.0
-    assert skipped[2].lat == 6.0
\ No newline at end of file
+    assert skipped[2].lat == 6.0
+
+def test_refiltering_gps_lock_replays_samples_that_landed_on_the_same_frame():
+    lock_log = GPSLockLog()
+    lock_log.record(timeunits(seconds=1), GPSLockComponents(GPSFix.NO, Point(1.0, 1.0), 0.0, 1.0))
+    lock_log.record(timeunits(seconds=1), GPSLockComponents(GPSFix.LOCK_3D, Point(1.0, 1.0), 0.0, 1.0))
+
+    fm = FrameMeta()
+    # only the last sample at a frame time is kept
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), point=Point(1.0, 1.0), gpsfix=GPSFix.LOCK_3D.value))
+
+    refilter_gps_lock(fm, lock_log, units, GPSLockTracker())
+
+    assert fm.get(timeunits(seconds=1)).gpsfix == GPSFix.NO.value
+    assert fm.get(timeunits(seconds=1)).gpslock == units.Quantity(GPSFix.NO.value)
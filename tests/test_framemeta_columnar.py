@@ -0,0 +1,162 @@
+import datetime
+
+import pytest
+
+from gopro_overlay import timeseries_process
+from gopro_overlay.entry import Entry
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.framemeta import FrameMeta, parse_gopro
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
+from gopro_overlay.point import Point
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_framedata import file_path_of_test_asset
+from tests.test_timeseries import datetime_of
+
+
+def parsed():
+    gpmd = file_path_of_test_asset("hero5.raw").read_bytes() * 4
+    return parse_gopro(gpmd, units, MetaMeta(stream=3, frame_count=4, timebase=1000, frame_duration=1001))
+
+
+def rows(fm):
+    return [(e.dt, sorted((k, str(v)) for k, v in e.items.items())) for e in fm.items()]
+
+
+def test_columnar_has_the_same_entries():
+    fm = parsed()
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    assert len(columnar) == len(fm)
+    assert columnar.framelist == fm.framelist
+    assert (columnar.min, columnar.max, columnar.mid, columnar.duration()) == (fm.min, fm.max, fm.mid, fm.duration())
+    assert rows(columnar) == rows(fm)
+
+    step = datetime.timedelta(seconds=1)
+    assert [e.dt for e in columnar.items(step)] == [e.dt for e in fm.items(step)]
+
+    for t in fm.framelist[::50]:
+        assert str(columnar.get(t).speed) == str(fm.get(t).speed)
+        assert str(columnar.get(t).accl) == str(fm.get(t).accl)
+
+
+def test_processing_is_the_same():
+    fm = parsed()
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    for f in [fm, columnar]:
+        f.process(timeseries_process.process_ses("point", lambda i: i.point, alpha=0.45))
+        f.process_deltas(timeseries_process.calculate_speeds(), skip=18)
+        f.process(timeseries_process.calculate_odo())
+        f.process(timeseries_process.filter_locked())
+
+    assert rows(columnar) == rows(fm)
+
+
+def test_getting_between_frames_gets_earlier():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), point=Point(lat=1.0, lon=1.0), alt=12))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(1), lat=2.0))
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    assert columnar.get(timeunits(seconds=0)).point == Point(lat=1.0, lon=1.0)
+    assert columnar.get(timeunits(seconds=1.5)).alt == 12
+    assert columnar.get(timeunits(seconds=3)).lat == 2.0
+    assert columnar.get(timeunits(seconds=3)).alt is None
+    assert columnar.get(timeunits(seconds=3)).point is None
+
+    with pytest.raises(KeyError):
+        columnar.get(timeunits(seconds=1.5), interpolate=False)
+
+
+def test_updates_are_held_in_the_column_unit():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), speed=units.Quantity(1, units.mps)))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(1)))
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    columnar.get(timeunits(seconds=2)).update(speed=units.Quantity(3.6, units.kph), missing=None)
+    assert columnar.get(timeunits(seconds=2)).speed.units == units.mps
+    assert columnar.get(timeunits(seconds=2)).speed.magnitude == pytest.approx(1.0)
+    assert columnar.get(timeunits(seconds=2)).missing is None
+
+    columnar.get(timeunits(seconds=1)).update(speed=None)
+    assert columnar.get(timeunits(seconds=1)).speed is None
+
+
+def test_values_a_column_cant_hold_are_held_as_they_are():
+    fm = FrameMeta()
+    for i in range(3):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), speed=units.Quantity(i, units.mps), alt=i))
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    # as merge_gpx_with_gopro might, from a GPX file
+    columnar.get(timeunits(seconds=0)).update(speed=4.5)
+    columnar.get(timeunits(seconds=1)).update(alt=units.Quantity(10, units.m), name="fast")
+    columnar.get(timeunits(seconds=2)).update(alt=units.Quantity(12, units.m))
+    columnar.get(timeunits(seconds=2)).update(alt=units.Quantity(3, units.s))
+
+    assert [e.speed for e in columnar.items()] == [4.5, units.Quantity(1, units.mps), units.Quantity(2, units.mps)]
+    assert [e.alt for e in columnar.items()] == [0, units.Quantity(10, units.m), units.Quantity(3, units.s)]
+    assert [e.name for e in columnar.items()] == [None, "fast", None]
+
+
+def test_rows_can_be_added():
+    fm = FrameMeta()
+    for i in [0, 2]:
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), alt=i))
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    held = columnar.get(timeunits(seconds=2))
+    assert held.alt == 2
+
+    columnar.add(timeunits(seconds=1), Entry(datetime_of(1), alt=1, point=Point(1.0, 2.0)))
+    columnar.add(timeunits(seconds=3), Entry(datetime_of(3), alt=3))
+    columnar.add(timeunits(seconds=0), Entry(datetime_of(0), lat=5.0))
+
+    assert columnar.framelist == [timeunits(seconds=i) for i in range(4)]
+    assert [e.dt for e in columnar.items()] == [datetime_of(i) for i in range(4)]
+    assert [e.alt for e in columnar.items()] == [None, 1, 2, 3]
+    assert columnar.get(timeunits(seconds=0)).lat == 5.0
+    assert columnar.get(timeunits(seconds=1)).point == Point(1.0, 2.0)
+
+    held.update(alt=20)
+    assert columnar.get(timeunits(seconds=2)).alt == 20
+
+    assert list(columnar.frames) == columnar.framelist
+    assert columnar.frames[timeunits(seconds=3)].alt == 3
+    assert timeunits(seconds=1.5) not in columnar.frames
+
+    replaced = columnar.frames[timeunits(seconds=3)]
+    columnar.add(timeunits(seconds=3), Entry(datetime_of(4), lat=1.0))
+    assert len(columnar) == 4
+    assert (replaced.dt, replaced.alt, replaced.lat) == (datetime_of(4), None, 1.0)
+
+
+def test_clone_is_updated_apart():
+    fm = FrameMeta()
+    for i in range(2):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), alt=i))
+    columnar = ColumnarFrameMeta.of(fm, units)
+
+    clone = columnar.clone()
+    clone.get(timeunits(seconds=0)).update(alt=10)
+    clone.add(timeunits(seconds=2), Entry(datetime_of(2), alt=2))
+
+    assert [e.alt for e in clone.items()] == [10, 1, 2]
+    assert [e.alt for e in columnar.items()] == [0, 1]
+
+
+def test_a_row_held_on_to_sees_updates():
+    fm = FrameMeta()
+    for i in range(3):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), alt=i))
+    columnar = ColumnarFrameMeta.of(fm, units)
+    columnar._recent_rows = 1
+
+    held = columnar.get(timeunits(seconds=0))
+    assert held.alt == 0
+    columnar.get(timeunits(seconds=1))
+    columnar.get(timeunits(seconds=0)).update(alt=10)
+
+    assert held.alt == 10
@@ -1,6 +1,7 @@
 import datetime
 import inspect
 import os
+import struct
 from array import array
 from pathlib import Path
 from typing import Tuple
@@ -8,11 +9,12 @@ from typing import Tuple
 import pytest
 
 from gopro_overlay import ffmpeg
-from gopro_overlay.ffmpeg import StreamInfo
-from gopro_overlay.gpmd import GoproMeta, GPSFix, GPS5, XYZ, GPMDItem, interpret_item
-from gopro_overlay.gpmd_calculate import CorrectionFactorsPacketTimeCalculator, CoriTimestampPacketTimeCalculator
+from gopro_overlay.ffmpeg import StreamInfo, MetaMeta
+from gopro_overlay.gpmd import GoproMeta, GPSFix, GPS5, XYZ, GPMDItem, interpret_item, visitor_table
+from gopro_overlay.gpmd_calculate import CorrectionFactorsPacketTimeCalculator, CoriTimestampPacketTimeCalculator, \
+    timestamp_calculators, UnknownPacketTimeCalculator
 from gopro_overlay.gpmd_visitors import DetermineTimestampOfFirstSHUTVisitor, CalculateCorrectionFactorsVisitor, \
-    CorrectionFactors
+    CorrectionFactors, FanOutVisitor
 from gopro_overlay.gpmd_visitors_debug import DebuggingVisitor
 from gopro_overlay.gpmd_visitors_gps import GPSVisitor, GPS5EntryConverter, DetermineFirstLockedGPSUVisitor
 from gopro_overlay.gpmd_visitors_xyz import XYZVisitor, XYZComponentConverter
@@ -53,6 +55,20 @@ def test_load_hero6_raw():
     assert len(devc) == 14
 
 
+def test_parsing_does_not_copy_payloads():
+    data = bytearray(load_meta("hero6.raw").tobytes())
+    dvnm = GoproMeta.parse(data)[0].with_type("DVNM")[0]
+
+    assert dvnm.rawdata.obj is data
+    assert dvnm.interpret() == "Hero6 Black"
+
+
+def test_parsing_truncated_data():
+    data = load_meta("hero6.raw").tobytes()
+    with pytest.raises(struct.error):
+        GoproMeta.parse(data[:-4])
+
+
 def test_debugging_visitor_at_least_doesnt_blow_up():
     meta = load("hero6.raw")
     meta.accept(DebuggingVisitor())
@@ -132,6 +148,24 @@ def test_load_hero6_raw_accl():
     meta[0].accept(XYZVisitor("ACCL", on_item=assert_components))
 
 
+def test_hero6_accl_samples():
+    strm = [s for s in load("hero6.raw")[0].with_type("STRM") if "ACCL" in s.itemset][0]
+    scale = strm.with_type("SCAL")[0].interpret()
+    accl = strm.with_type("ACCL")[0]
+
+    samples = accl.samples(scale)
+
+    assert len(samples) == 204
+    assert samples[0] == XYZ(x=9.97846889952153, y=0.05502392344497608, z=3.145933014354067)
+    assert samples[-1] == samples[203]
+    assert samples[0:2] == [samples[0], samples[1]]
+    assert list(samples) == accl.interpret(scale)
+    assert list(samples.column(0)) == [p.x for p in accl.interpret(scale)]
+
+    with pytest.raises(IndexError):
+        samples[204]
+
+
 def test_load_hero6_raw_accl_complete():
     # hero6 - no CORI, so old timestamps, no ORIN, so hardcode orientation?
     meta = load("hero6.raw")
@@ -155,6 +189,43 @@ def test_load_hero6_ble_raw():
     assert meta[1].with_type("DVNM")[0].interpret() == "SENSORB6"
 
 
+def packets_of(data):
+    """splits gpmd into packets, one top level item in each, as they would be in the mp4"""
+    offset, packets = 0, []
+    for item in GoproMeta.parse(data):
+        packets.append(bytes(data[offset:offset + item.bytecount]))
+        offset += item.bytecount
+    return packets
+
+
+def test_streaming_visits_same_items_as_parsing():
+    data = load_meta("hero6+ble.raw")
+    packets = packets_of(data)
+    assert len(packets) == 2
+
+    streamed = GoproMeta.stream(lambda: iter(packets))
+
+    assert streamed.accept(CountingVisitor()).count == load("hero6+ble.raw").accept(CountingVisitor()).count
+    assert [i.fourcc for i in streamed.items()] == ["DEVC", "DEVC"]
+
+
+def test_streaming_parses_each_packet_as_visited():
+    packets = packets_of(load_meta("hero6+ble.raw"))
+    given = []
+
+    def each_packet():
+        for packet in packets:
+            given.append(packet)
+            yield packet
+
+    items = GoproMeta.stream(each_packet).items()
+
+    next(items)
+    assert len(given) == 1
+    next(items)
+    assert len(given) == 2
+
+
 def test_load_extracted_meta():
     assert len(load("gopro-meta.gpmd")) == 707
 
@@ -379,5 +450,122 @@ class CountingVisitor:
         pass
 
 
+def test_fan_out_visits_everything_for_each_visitor():
+    meta = load("hero6+ble.raw")
+    a, b = CountingVisitor(), CountingVisitor()
+
+    meta.accept(FanOutVisitor(a, b))
+
+    expected = meta.accept(CountingVisitor()).count
+    assert a.count == expected
+    assert b.count == expected
+
+
+def test_fan_out_only_passes_on_what_is_wanted():
+    meta = load("accel/rotation-example.gpmd")
+    orientations = []
+    shut, cori = DetermineTimestampOfFirstSHUTVisitor(), CORIVisitor(on_item=orientations.append)
+
+    meta.accept(FanOutVisitor(shut, cori))
+
+    assert shut.timestamp == meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+    assert len(orientations) > 0
+
+
+class DVNMVisitor:
+    def __init__(self):
+        self.names = []
+        self.ended = 0
+
+    def vic_DEVC(self, item, contents):
+        return self
+
+    def vi_DVNM(self, item):
+        self.names.append(item.interpret())
+
+    def v_end(self):
+        self.ended += 1
+
+
+def test_visitor_table_made_from_methods():
+    table = visitor_table(DVNMVisitor())
+
+    assert set(table.items.keys()) == {"DVNM"}
+    assert set(table.containers.keys()) == {"DEVC"}
+    assert table is visitor_table(DVNMVisitor())
+
+
+def test_visitor_table_can_be_declared():
+    visitor = CalculateCorrectionFactorsVisitor("GYRO", MetaMeta(stream=3, frame_count=1, timebase=1000, frame_duration=1001))
+    assert set(visitor_table(visitor).items.keys()) == {"GYRO"}
+
+
+def test_visitor_without_table_is_visited_by_name():
+    assert visitor_table(CountingVisitor()) is None
+    assert load("hero6+ble.raw").accept(CountingVisitor()).count > 0
+
+
+def test_visiting_with_table():
+    visitor = load("hero6+ble.raw").accept(DVNMVisitor())
+    assert visitor.names == ["Hero6 Black", "SENSORB6"]
+    assert visitor.ended == 2
+
+
+class NothingWantedVisitor:
+    def __init__(self):
+        self.ended = 0
+
+    def vic_DEVC(self, item, contents):
+        return self
+
+    def vi_XXXX(self, item):
+        raise AssertionError("not in this file")
+
+    def v_end(self):
+        self.ended += 1
+
+
+class IterationCountingList(list):
+    iterated = 0
+
+    def __iter__(self):
+        self.iterated += 1
+        return super().__iter__()
+
+
+def test_skips_containers_with_nothing_wanted():
+    meta = load("hero6+ble.raw")
+    devc = meta[0]
+    assert "XXXX" not in devc.itemset
+    devc.items = IterationCountingList(devc.items)
+
+    assert meta.accept(NothingWantedVisitor()).ended == 2
+    assert devc.items.iterated == 0
+
+    meta.accept(DVNMVisitor())
+    assert devc.items.iterated == 1
+
+
+class AcceptCountingMeta:
+    def __init__(self, meta):
+        self.meta = meta
+        self.count = 0
+
+    def accept(self, visitor):
+        self.count += 1
+        return self.meta.accept(visitor)
+
+
+def test_timestamp_calculators_share_one_traversal():
+    meta = AcceptCountingMeta(GoproMeta.parse(load_meta("hero6.raw").tobytes() * 3))
+    metameta = MetaMeta(stream=3, frame_count=3, timebase=1000, frame_duration=1001)
+
+    calculators = timestamp_calculators(meta, metameta, ["GPS5", "GRAV"])
+
+    assert meta.count == 1
+    assert isinstance(calculators["GPS5"], CorrectionFactorsPacketTimeCalculator)
+    assert isinstance(calculators["GRAV"], UnknownPacketTimeCalculator)
+
+
 def test_interpreting_strings():
     assert interpret_item(GPMDItem("SIUN", 143, 4, 1, 12, bytes([0x6d, 0x2f, 0x73, 0xb2]))) == "m/s²"
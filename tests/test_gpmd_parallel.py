@@ -0,0 +1,107 @@
+import pytest
+
+from gopro_overlay import framemeta
+from gopro_overlay.counter import ReasonCounter
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.framemeta import parse_gopro
+from gopro_overlay.gpmd import GoproMeta
+from gopro_overlay.gpmd_calculate import timestamp_calculators
+from gopro_overlay.gpmd_parallel import packet_ranges, handoffs, map_in_processes
+from gopro_overlay.sensors import sensor_series
+from gopro_overlay.units import units
+from tests.test_framedata import file_path_of_test_asset
+from tests.test_telemetry_cache import described, some_filter, RecordingFilter, series_of, described_series
+
+
+@pytest.fixture
+def always_parallel(monkeypatch):
+    monkeypatch.setattr(framemeta, "parallel_packets", 2)
+
+
+def test_parallel_parse_of_joined_file_is_same_as_sequential(always_parallel):
+    # joined, so the timestamp calculators have to carry on from where the previous run left off
+    gpmd = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes() * 2
+    metameta = MetaMeta(stream=3, frame_count=88, timebase=1000, frame_duration=1001)
+
+    expected = described(parse_gopro(gpmd, units, metameta))
+
+    assert described(parse_gopro(gpmd, units, metameta, processes=3)) == expected
+
+
+def test_parallel_parse_finds_every_sensor_sample_in_order(always_parallel):
+    gpmd = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes() * 2
+    metameta = MetaMeta(stream=3, frame_count=88, timebase=1000, frame_duration=1001)
+
+    expected = {name: described_series(s) for name, s in sensor_series(GoproMeta.parse(gpmd), metameta).items()}
+
+    sensors = series_of("ACCL", "GYRO")
+    parse_gopro(gpmd, units, metameta, processes=3, sensors=sensors)
+    assert {name: described_series(s) for name, s in sensors.items()} == expected
+
+
+def test_parallel_parse_applies_lock_filter_in_order(always_parallel):
+    gpmd = file_path_of_test_asset("hero5.raw").read_bytes() * 20
+    metameta = MetaMeta(stream=3, frame_count=20, timebase=1000, frame_duration=1001)
+
+    counter = ReasonCounter()
+    expected = described(parse_gopro(gpmd, units, metameta, gps_lock_filter=some_filter(counter)))
+    assert counter.total() > 0
+
+    parallel_counter = ReasonCounter()
+    fm = parse_gopro(gpmd, units, metameta, gps_lock_filter=some_filter(parallel_counter), processes=4)
+
+    assert described(fm) == expected
+    assert dict(parallel_counter.items()) == dict(counter.items())
+
+
+def test_parallel_parse_gives_lock_filter_every_sample_in_order(always_parallel):
+    # joined, so some GPS samples of one run land on the same frame times as the next
+    gpmd = file_path_of_test_asset("hero5.raw").read_bytes() * 20
+    metameta = MetaMeta(stream=3, frame_count=20, timebase=1000, frame_duration=1001)
+
+    serial = RecordingFilter(some_filter(ReasonCounter()))
+    expected = described(parse_gopro(gpmd, units, metameta, gps_lock_filter=serial))
+
+    parallel = RecordingFilter(some_filter(ReasonCounter()))
+    assert described(parse_gopro(gpmd, units, metameta, gps_lock_filter=parallel, processes=3)) == expected
+    assert parallel.submitted == serial.submitted
+
+
+def test_packet_ranges():
+    meta = GoproMeta.parse(file_path_of_test_asset("hero5.raw").read_bytes() * 20)
+
+    ranges = packet_ranges(meta, 4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(meta)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    assert packet_ranges(meta, 1) == [(0, len(meta))]
+    assert len(packet_ranges(meta, len(meta) * 2)) == len(meta)
+
+
+def test_handoffs_carry_sample_counts_and_counter():
+    meta = GoproMeta.parse(file_path_of_test_asset("hero5.raw").read_bytes() * 4)
+    metameta = MetaMeta(stream=3, frame_count=4, timebase=1000, frame_duration=1001)
+    calculators = timestamp_calculators(meta, metameta, ["GPS5", "ACCL"])
+
+    found = handoffs(meta, calculators, packet_ranges(meta, len(meta)), [])
+
+    assert [h.start for h in found] == list(range(len(meta)))
+    assert [h.counter for h in found] == list(range(len(meta)))
+
+    gps_per_packet = [sum(i.repeat for s in d.with_type("STRM") for i in s.with_type("GPS5")) for d in meta]
+    assert [h.total_samples["GPS5"] for h in found] == [sum(gps_per_packet[:n]) for n in range(len(meta))]
+
+
+def fail_on_two(job):
+    if job == 2:
+        raise ValueError(f"no {job}")
+    return job
+
+
+def test_map_in_processes():
+    assert map_in_processes(lambda job: job * 2, [1, 2, 3]) == [2, 4, 6]
+
+    with pytest.raises(IOError, match="no 2"):
+        map_in_processes(fail_on_two, [1, 2, 3])
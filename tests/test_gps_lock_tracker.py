@@ -2,8 +2,9 @@ from collections import Counter
 
 from gopro_overlay.counter import ReasonCounter
 from gopro_overlay.gpmd import GPSFix
-from gopro_overlay.gpmd_visitors_gps import GPSLockTracker, GPSLockComponents, GPSDOPFilter, GPSLockFilter, GPSMaxSpeedFilter, GPSReportingFilter
+from gopro_overlay.gpmd_visitors_gps import GPSLockTracker, GPSLockComponents, GPSDOPFilter, GPSLockFilter, GPSMaxSpeedFilter, GPSReportingFilter, GPSLockLog
 from gopro_overlay.point import Point
+from gopro_overlay.timeunits import timeunits
 
 
 # When GPS Lock is acquired part way through a packet, the GPSF will indicate "LOCKED", but actually
@@ -66,3 +67,18 @@ def test_reporting_filter():
 
     assert counter.get("DOP Rejected") == 2
     assert counter.get("DOP Submitted") == 3
+
+
+def test_lock_log_replays_every_sample_in_order_keeping_the_last_at_each_frame_time():
+    log = GPSLockLog()
+    log.record(timeunits(seconds=1), GPSLockComponents(GPSFix.NO, Point(1.0, 1.0), 0.0, 1.0))
+    # lands on the same frame time, so replaces the one before - but the tracker still needs to see both
+    log.record(timeunits(seconds=1), GPSLockComponents(GPSFix.LOCK_3D, Point(1.0, 1.0), 0.0, 1.0))
+    log.record(timeunits(seconds=2), GPSLockComponents(GPSFix.LOCK_3D, Point(2.0, 1.0), 1.0, None))
+
+    assert len(log) == 3
+    assert log.replay(GPSLockTracker()) == {timeunits(seconds=1): GPSFix.NO, timeunits(seconds=2): GPSFix.LOCK_3D}
+
+    copied = GPSLockLog()
+    copied.extend(log)
+    assert copied.replay(GPSLockTracker()) == log.replay(GPSLockTracker())
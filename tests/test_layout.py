@@ -2,15 +2,24 @@ import random
 from datetime import timedelta
 from pathlib import Path
 
+from PIL import Image
+
 from gopro_overlay import fake, arguments
 from gopro_overlay.dimensions import Dimension
+from gopro_overlay.entry import Entry
 from gopro_overlay.font import load_font
+from gopro_overlay.framemeta import FrameMeta
 from gopro_overlay.geo import CachingRenderer
+from gopro_overlay.gpmd_visitors_gps import GPSFix
 from gopro_overlay.layout import Overlay, speed_awareness_layout
 from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout, Converters
+from gopro_overlay.point import Point
 from gopro_overlay.privacy import NoPrivacyZone
+from gopro_overlay.timeunits import timeunits
 from gopro_overlay.timing import PoorTimer
+from gopro_overlay.units import units
 from tests.approval import approve_image
+from tests.test_timeseries import datetime_of
 from tests.testenvironment import is_make
 
 # Need reproducible results for approval tests
@@ -147,6 +156,35 @@ def test_render_xml_component_with_exclusions():
                            ))
 
 
+def test_default_layout_skips_frames_that_would_look_the_same():
+    # standing still - GPS at 18Hz, so every frame has a different datetime and timestamp
+    stopped = FrameMeta()
+    for i in range(18 * 3):
+        t = timeunits(seconds=i / 18)
+        stopped.add(t, Entry(
+            datetime_of(1644606742 + i / 18),
+            timestamp=units.Quantity(t.millis(), units.number),
+            point=Point(51.5, -0.1),
+            speed=units.Quantity(0, units.mps),
+            alt=units.Quantity(10, units.m),
+            gpsfix=GPSFix.LOCK_3D.value,
+        ))
+
+    blank_map = lambda map: Image.new("RGBA", map.size, (0, 0, 0, 255))
+    xmldoc = load_xml_layout(Path("default-1920x1080"))
+    overlay = Overlay(
+        Dimension(1920, 1080),
+        framemeta=stopped,
+        create_widgets=layout_from_xml(xmldoc, blank_map, stopped, font, privacy=NoPrivacyZone())
+    )
+
+    # at 30fps, the clock, showing tenths of a second, only changes every third frame
+    for i in range(60):
+        overlay.draw(timeunits(seconds=i / 30))
+
+    assert overlay.deduplicated == 40
+
+
 def time_layout(name, layout, repeat=20, dimensions=Dimension(1920, 1080)):
     overlay = Overlay(dimensions, framemeta=framemeta, create_widgets=layout)
 
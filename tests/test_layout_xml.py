@@ -1,6 +1,8 @@
 import datetime
+import xml.etree.ElementTree as ET
 
-from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from
+from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from, scaled, Widgets, Converters
+from gopro_overlay.point import Coordinate
 from gopro_overlay.timeseries import Entry
 from gopro_overlay.units import units
 from tests.test_timeseries import datetime_of
@@ -32,3 +34,21 @@ def test_date_formatter():
     # Will just have to accept that calling with tz=None will do local tz, as its cached in datetime.py
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=utc)() == "2022/02/11 19:12:22.000000"
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=sort_of_pst)() == "2022/02/11 11:12:22.000000"
+
+
+def test_scaling_pixels():
+    assert scaled(100, 1.0) == 100
+    assert scaled(100, 0.5) == 50
+    assert scaled(-30, 1 / 3) == -10
+    assert scaled(0, 0.25) == 0
+    assert scaled(1, 0.25) == 1
+    assert scaled(None, 0.25) is None
+
+
+def test_widgets_scale_positions_and_sizes():
+    element = ET.fromstring('<component type="metric" x="300" y="90" size="48" zoom="16"/>')
+    widgets = Widgets(font=None, privacy=None, renderer=None, framemeta=None, converters=Converters(), scale=1 / 3)
+
+    assert widgets.at(element) == Coordinate(100, 30)
+    assert widgets.px(element, "size") == 16
+    assert widgets.px(element, "width", d=400) == 133
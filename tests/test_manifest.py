@@ -0,0 +1,62 @@
+from gopro_overlay.manifest import SegmentManifest, file_fingerprint, text_fingerprint
+from gopro_overlay.segments import plan_segments
+
+key = {"layout": "abc", "inputs": {"a.mp4": "123"}, "options": {"fps": "10.0"}}
+
+
+def plan():
+    return plan_segments(100, 4, 10.0)
+
+
+def test_new_manifest_has_everything_to_do(tmp_path):
+    manifest = SegmentManifest.load_or_create(tmp_path / "manifest.json", key, plan)
+
+    assert not manifest.resumed
+    assert manifest.remaining() == plan()
+    assert (tmp_path / "manifest.json").exists()
+
+
+def test_completed_segments_are_remembered(tmp_path):
+    manifest = SegmentManifest.load_or_create(tmp_path / "manifest.json", key, plan)
+    manifest.complete(manifest.segments[0])
+    manifest.complete(manifest.segments[2])
+
+    reloaded = SegmentManifest.load_or_create(tmp_path / "manifest.json", key, lambda: [])
+
+    assert reloaded.resumed
+    assert reloaded.segments == plan()
+    assert [s.index for s in reloaded.remaining()] == [1, 3]
+
+
+def test_different_key_starts_again(tmp_path):
+    manifest = SegmentManifest.load_or_create(tmp_path / "manifest.json", key, plan)
+    manifest.complete(manifest.segments[0])
+
+    reloaded = SegmentManifest.load_or_create(tmp_path / "manifest.json", {**key, "layout": "def"}, plan)
+
+    assert not reloaded.resumed
+    assert len(reloaded.remaining()) == 4
+
+
+def test_corrupt_manifest_starts_again(tmp_path):
+    (tmp_path / "manifest.json").write_text("{ not json")
+
+    manifest = SegmentManifest.load_or_create(tmp_path / "manifest.json", key, plan)
+
+    assert len(manifest.remaining()) == 4
+
+
+def test_file_fingerprint_changes_with_content(tmp_path):
+    f = tmp_path / "file"
+    f.write_bytes(b"a" * 5000)
+    first = file_fingerprint(f, sample=1024)
+
+    assert file_fingerprint(f, sample=1024) == first
+
+    f.write_bytes(b"a" * 4999 + b"b")
+    assert file_fingerprint(f, sample=1024) != first
+
+
+def test_text_fingerprint():
+    assert text_fingerprint("a") == text_fingerprint("a")
+    assert text_fingerprint("a") != text_fingerprint("b")
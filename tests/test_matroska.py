@@ -0,0 +1,55 @@
+from io import BytesIO
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.matroska import MatroskaFrameWriter, header, EBML, SEGMENT, CLUSTER, SIMPLE_BLOCK, TIMESTAMP, frame_header
+from gopro_overlay.timeunits import timeunits
+
+
+def read_size(data, offset):
+    assert data[offset] == 0x01
+    return int.from_bytes(data[offset + 1:offset + 8], "big"), offset + 8
+
+
+def test_header_starts_with_ebml_then_endless_segment():
+    data = header(Dimension(3, 4))
+
+    assert data.startswith(EBML)
+    ebml_size, offset = read_size(data, len(EBML))
+    offset += ebml_size
+
+    assert data[offset:offset + 4] == SEGMENT
+    assert data[offset + 4:offset + 12] == b"\x01\xff\xff\xff\xff\xff\xff\xff"
+    assert b"V_UNCOMPRESSED" in data
+    assert b"RGBA" in data
+
+
+def test_frame_is_a_cluster_with_timestamp_and_block():
+    frame = b"abcdefgh"
+    data = frame_header(timeunits(seconds=1.5), len(frame)) + frame
+
+    assert data.startswith(CLUSTER)
+    cluster_size, offset = read_size(data, len(CLUSTER))
+    assert offset + cluster_size == len(data)
+
+    assert data[offset:offset + 1] == TIMESTAMP
+    timestamp_size, offset = read_size(data, offset + 1)
+    assert int.from_bytes(data[offset:offset + timestamp_size], "big") == 1_500_000
+    offset += timestamp_size
+
+    assert data[offset:offset + 1] == SIMPLE_BLOCK
+    block_size, offset = read_size(data, offset + 1)
+    assert data[offset:offset + 4] == b"\x81\x00\x00\x80"
+    assert data[offset + 4:offset + block_size] == frame
+
+
+def test_writer_sends_header_once():
+    output = BytesIO()
+    writer = MatroskaFrameWriter(output, Dimension(1, 1))
+
+    writer.write(memoryview(bytearray(4)), timeunits(seconds=0))
+    writer.write(memoryview(bytearray(4)), timeunits(seconds=1))
+
+    data = output.getvalue()
+    assert data.count(EBML) == 1
+    assert data.count(CLUSTER) == 2
+    assert len(data) == len(header(Dimension(1, 1))) + 2 * (len(frame_header(timeunits(seconds=0), 4)) + 4)
@@ -0,0 +1,190 @@
+import struct
+
+import pytest
+
+from gopro_overlay import mp4, ffmpeg
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.gpmd import GoproMeta
+from tests.test_framedata import file_path_of_test_asset
+
+
+def box(kind: str, *content: bytes) -> bytes:
+    data = b"".join(content)
+    return struct.pack(">I4s", 8 + len(data), kind.encode("latin-1")) + data
+
+
+def large_box(kind: str, *content: bytes) -> bytes:
+    data = b"".join(content)
+    return struct.pack(">I4sQ", 1, kind.encode("latin-1"), 16 + len(data)) + data
+
+
+def full(kind: str, *content: bytes, version=0) -> bytes:
+    return box(kind, struct.pack(">B3x", version), *content)
+
+
+def table(kind: str, fmt: str, rows) -> bytes:
+    rows = list(rows)
+    return full(kind, struct.pack(">I", len(rows)), *[struct.pack(">" + fmt, *r) for r in rows])
+
+
+def trak(handler: str, format: str, timebase: int, sizes, chunks, per_chunk, durations, co64=False, mdhd_version=0):
+    if mdhd_version == 1:
+        mdhd = full("mdhd", struct.pack(">QQIQ4x", 0, 0, timebase, 0), version=1)
+    else:
+        mdhd = full("mdhd", struct.pack(">IIII4x", 0, 0, timebase, 0))
+
+    return box(
+        "trak",
+        box("tkhd", bytes(84)),
+        box(
+            "mdia",
+            mdhd,
+            full("hdlr", struct.pack(">I4s12x", 0, handler.encode("latin-1")), b"name\0"),
+            box(
+                "minf",
+                box(
+                    "stbl",
+                    full("stsd", struct.pack(">I", 1), box(format, bytes(8))),
+                    table("stts", "II", durations),
+                    table("stsc", "III", [(first, n, 1) for first, n in per_chunk]),
+                    full("stsz", struct.pack(">II", 0, len(sizes)), *[struct.pack(">I", s) for s in sizes]),
+                    table("co64", "Q", [(c,) for c in chunks]) if co64 else table("stco", "I", [(c,) for c in chunks]),
+                )
+            )
+        )
+    )
+
+
+def movie(samples, per_chunk=1, co64=False, mdhd_version=0, large_mdat=False):
+    """an mp4 with a video track (no samples) and a gpmd track of the given samples, with per_chunk samples in each chunk"""
+    ftyp = box("ftyp", b"mp41", bytes(4))
+    mdat_header = 16 if large_mdat else 8
+    mdat = (large_box if large_mdat else box)("mdat", *samples)
+
+    def moov(mdat_start):
+        offsets, offset = [], mdat_start + mdat_header
+        for s in samples:
+            offsets.append(offset)
+            offset += len(s)
+        chunks = offsets[::per_chunk]
+        return box(
+            "moov",
+            box("mvhd", bytes(100)),
+            trak("vide", "avc1", 90000, [], [], [], []),
+            trak("meta", "gpmd", 1000, [len(s) for s in samples], chunks, [(1, per_chunk)], [(len(samples), 1001)],
+                 co64=co64, mdhd_version=mdhd_version),
+        )
+
+    # moov at the front, like GoPro files
+    start = len(ftyp) + len(moov(0))
+    return ftyp + moov(start) + mdat
+
+
+def split(data: bytes, n: int):
+    step = len(data) // n
+    return [data[i * step:(i + 1) * step if i < n - 1 else len(data)] for i in range(n)]
+
+
+def packets(data: bytes):
+    """the gpmd as a GoPro writes it, a DEVC to each sample"""
+    found, offset = [], 0
+    while offset < len(data):
+        _, _, size, repeat = struct.unpack_from(">4sBBH", data, offset)
+        end = offset + 8 + (size * repeat + 3) // 4 * 4
+        found.append(data[offset:end])
+        offset = end
+    return found
+
+
+samples = [b"abc", b"defgh", b"ijklmno", b"pq"]
+
+
+def test_finding_gpmd_track():
+    track = mp4.gpmd_track(movie(samples))
+
+    assert track.index == 1
+    assert track.handler == "meta"
+    assert track.format == "gpmd"
+    assert track.timebase == 1000
+    assert len(track) == 4
+    assert list(track.sizes) == [3, 5, 7, 2]
+    assert list(track.durations) == [1001] * 4
+    assert list(track.times) == [0, 1001, 2002, 3003]
+
+
+def test_reading_sample_data():
+    buf = movie(samples)
+    assert mp4.sample_data(buf, mp4.gpmd_track(buf)) == b"".join(samples)
+
+
+@pytest.mark.parametrize("per_chunk,co64,mdhd_version,large_mdat", [
+    (2, False, 0, False),
+    (1, True, 1, False),
+    (4, False, 0, True),
+])
+def test_reading_sample_data_variants(per_chunk, co64, mdhd_version, large_mdat):
+    buf = movie(samples, per_chunk=per_chunk, co64=co64, mdhd_version=mdhd_version, large_mdat=large_mdat)
+    track = mp4.gpmd_track(buf)
+    assert track.timebase == 1000
+    assert mp4.sample_data(buf, track) == b"".join(samples)
+
+
+def test_all_tracks():
+    found = mp4.tracks(movie(samples))
+    assert [(t.index, t.format) for t in found] == [(0, "avc1"), (1, "gpmd")]
+
+
+def test_no_moov():
+    with pytest.raises(IOError):
+        mp4.tracks(box("ftyp", b"mp41", bytes(4)))
+
+
+def test_corrupt_box_size():
+    with pytest.raises(IOError):
+        mp4.tracks(box("ftyp", b"mp41") + struct.pack(">I4s", 1000, b"moov"))
+
+
+def test_truncated_file():
+    buf = movie(samples)
+    with pytest.raises(IOError):
+        mp4.sample_data(buf[:-1], mp4.gpmd_track(buf))
+
+
+def test_load_gpmd_and_metameta_from_file(tmp_path):
+    raw = file_path_of_test_asset("hero6.raw").read_bytes()
+    path = tmp_path / "GH010001.MP4"
+    path.write_bytes(movie(split(raw, 5)))
+
+    assert ffmpeg.load_gpmd_from(path) == raw
+    assert len(GoproMeta.parse(ffmpeg.load_gpmd_from(path))) > 0
+
+    assert ffmpeg.find_metameta(path) == MetaMeta(stream=1, frame_count=5, timebase=1000, frame_duration=1001)
+
+
+def test_packets_are_whole_devcs():
+    raw = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    found = packets(raw)
+
+    assert b"".join(found) == raw
+    assert len(found) == len(GoproMeta.parse(raw))
+    assert all(p[:4] == b"DEVC" for p in found)
+
+
+def test_gpmd_packets_from_file(tmp_path):
+    path = tmp_path / "GH010001.MP4"
+    path.write_bytes(movie(samples, per_chunk=2))
+
+    assert list(ffmpeg.gpmd_packets_from(path)) == samples
+
+
+def test_truncated_file_packets():
+    buf = movie(samples)
+    with pytest.raises(IOError):
+        list(mp4.samples(buf[:-1], mp4.gpmd_track(buf)))
+
+
+def test_load_gpmd_from_empty_file(tmp_path):
+    path = tmp_path / "empty.MP4"
+    path.touch()
+    with pytest.raises(IOError):
+        ffmpeg.load_gpmd_from(path)
@@ -0,0 +1,156 @@
+import datetime
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.layout import Overlay, EntryFingerprint
+from gopro_overlay.layout_components import rendered
+from gopro_overlay.point import Point
+from gopro_overlay.regions import Region
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from gopro_overlay.widgets.widgets import Widget
+
+start = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def entry_at(seconds, speed, point=Point(51.5, -0.1)):
+    return Entry(
+        start + datetime.timedelta(seconds=seconds),
+        speed=units.Quantity(speed, units.mps),
+        point=point,
+    )
+
+
+class SpeedWidget(Widget):
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.drawn = []
+
+    def draw(self, image, draw):
+        self.drawn.append(self.entry().speed)
+
+
+class Square(Widget):
+
+    def draw(self, image, draw):
+        draw.rectangle((6, 6, 7, 7), fill=(255, 0, 0, 255))
+
+
+def overlay_of(*speeds, **kwargs):
+    framemeta = FrameMeta()
+    for index, speed in enumerate(speeds):
+        framemeta.add(timeunits(seconds=index), entry_at(index, speed))
+
+    widgets = []
+
+    def create(entry):
+        widgets.append(SpeedWidget(entry))
+        return widgets
+
+    return Overlay(Dimension(10, 10), framemeta, create, **kwargs), widgets[0]
+
+
+def test_repeated_values_are_not_redrawn():
+    overlay, widget = overlay_of(1, 1, 1, 2, 2, 3)
+
+    for s in range(6):
+        overlay.draw(timeunits(seconds=s))
+
+    assert len(widget.drawn) == 3
+    assert overlay.deduplicated == 3
+
+
+def test_repeated_flag():
+    overlay, _ = overlay_of(1, 1, 2)
+
+    overlay.draw(timeunits(seconds=0))
+    assert not overlay.repeated
+    overlay.draw(timeunits(seconds=1))
+    assert overlay.repeated
+    overlay.draw(timeunits(seconds=2))
+    assert not overlay.repeated
+
+
+def test_fingerprint_only_considers_fields_that_were_read():
+    fingerprint = EntryFingerprint()
+
+    a = entry_at(0, 1)
+    b = entry_at(1, 1, point=Point(52, 0))
+    c = entry_at(2, 2)
+
+    assert not fingerprint.matches(a)
+
+    fingerprint.recording(a).speed
+    fingerprint.remember(a)
+
+    assert fingerprint.matches(b)
+    assert not fingerprint.matches(c)
+
+    fingerprint.recording(a).point
+    fingerprint.remember(a)
+
+    assert not fingerprint.matches(b)
+
+
+def test_fingerprint_copes_with_missing_fields():
+    fingerprint = EntryFingerprint()
+
+    a = entry_at(0, 1)
+    b = Entry(start)
+
+    fingerprint.recording(a).point
+    fingerprint.remember(a)
+
+    assert not fingerprint.matches(b)
+
+    fingerprint.remember(b)
+
+    assert not fingerprint.matches(a)
+
+
+class SecondsWidget(Widget):
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.drawn = []
+        self.render = lambda e: e.dt.second
+
+    def draw(self, image, draw):
+        self.drawn.append(rendered(self.entry(), self.render))
+
+
+def test_rendered_values_are_fingerprinted_instead_of_the_fields_they_read():
+    framemeta = FrameMeta()
+    for index in range(10):
+        framemeta.add(timeunits(seconds=index / 4), entry_at(index / 4, 1))
+
+    widgets = []
+    overlay = Overlay(Dimension(10, 10), framemeta, lambda entry: widgets.append(SecondsWidget(entry)) or widgets)
+
+    for index in range(10):
+        overlay.draw(timeunits(seconds=index / 4))
+
+    assert widgets[0].drawn == [0, 1, 2]
+    assert overlay.deduplicated == 7
+
+
+def test_rendered_without_an_overlay():
+    assert rendered(entry_at(3, 1), lambda e: e.dt.second) == 3
+
+
+def test_buffer_is_whole_frame():
+    overlay, _ = overlay_of(1)
+    overlay.draw(timeunits(seconds=0))
+    assert len(overlay.buffer()) == 10 * 10 * 4
+
+
+def test_buffer_is_just_the_regions_when_given():
+    framemeta = FrameMeta()
+    framemeta.add(timeunits(seconds=0), entry_at(0, 1))
+    overlay = Overlay(Dimension(10, 10), framemeta, lambda entry: [Square()], regions=[Region(5, 5, 3, 3)])
+
+    overlay.draw(timeunits(seconds=0))
+
+    assert overlay.buffer().tobytes() == bytes([0, 0, 0, 0] * 4 + [255, 0, 0, 255] * 2 + [0, 0, 0, 0] + [255, 0, 0, 255] * 2)
@@ -0,0 +1,28 @@
+from PIL import Image
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.font import load_font
+from gopro_overlay.preview import preview_indices, tile_dimension, fmt_time, contact_sheet
+from gopro_overlay.timeunits import timeunits
+
+
+def test_preview_indices():
+    assert preview_indices(100, 10.0, 2.0) == [0, 20, 40, 60, 80]
+    assert preview_indices(5, 10.0, 0.01) == [0, 1, 2, 3, 4]
+    assert preview_indices(0, 10.0, 2.0) == []
+
+
+def test_tile_dimension_keeps_aspect():
+    assert tile_dimension(Dimension(3840, 2160), 480) == Dimension(480, 270)
+
+
+def test_fmt_time():
+    assert fmt_time(timeunits(seconds=3725.5)) == "01:02:05"
+
+
+def test_contact_sheet_grid():
+    tiles = [Image.new("RGBA", (40, 20), (255, 0, 0, 128)) for _ in range(5)]
+
+    sheet = contact_sheet(tiles, ["a"] * 5, load_font("Roboto-Medium.ttf", size=10), columns=3, gap=2)
+
+    assert sheet.size == (2 + 3 * 42, 2 + 2 * 22)
@@ -0,0 +1,93 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.regions import Region, merge_overlapping, find_regions, RegionPacker, packed_dimension, overlay_filter, \
+    OutsideRegions
+
+dimensions = Dimension(320, 240)
+
+
+def frame(*boxes):
+    image = Image.new("RGBA", dimensions.tuple(), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for box in boxes:
+        draw.rectangle(box, fill=(255, 0, 0, 255))
+    return image
+
+
+def test_overlaps():
+    a = Region(0, 0, 10, 10)
+    assert a.overlaps(Region(5, 5, 10, 10))
+    assert not a.overlaps(Region(10, 0, 10, 10))
+    assert not a.overlaps(Region(0, 20, 10, 10))
+
+
+def test_union():
+    assert Region(0, 0, 10, 10).union(Region(5, 20, 10, 10)) == Region(0, 0, 15, 30)
+
+
+def test_merge_overlapping():
+    assert merge_overlapping([
+        Region(100, 100, 10, 10),
+        Region(0, 0, 10, 10),
+        Region(5, 5, 10, 10),
+        Region(12, 12, 10, 10),
+    ]) == [Region(0, 0, 22, 22), Region(100, 100, 10, 10)]
+
+
+def test_no_regions_if_nothing_drawn():
+    assert find_regions(dimensions, [frame()]) == []
+
+
+def test_finds_separate_regions_with_margin():
+    regions = find_regions(dimensions, [frame((40, 40, 50, 50)), frame((250, 200, 260, 210))], tile=32, margin=32)
+
+    assert regions == [Region(0, 0, 96, 96), Region(192, 160, 128, 80)]
+
+
+def test_regions_cover_all_sampled_frames():
+    regions = find_regions(dimensions, [frame((10, 10, 20, 20)), frame((10, 10, 150, 20))], margin=0)
+
+    assert regions == [Region(0, 0, 160, 32)]
+
+
+def test_packing_stacks_regions():
+    regions = [Region(0, 0, 20, 10), Region(100, 100, 10, 30)]
+    assert packed_dimension(regions) == Dimension(20, 40)
+
+    packer = RegionPacker(regions)
+    packed = Image.frombytes("RGBA", packer.dimension.tuple(), packer.pack(frame((100, 100, 109, 129))).tobytes())
+
+    assert packed.getpixel((0, 0)) == (0, 0, 0, 0)
+    assert packed.getpixel((0, 10)) == (255, 0, 0, 255)
+    assert packed.getpixel((9, 39)) == (255, 0, 0, 255)
+
+
+def test_packer_takes_turns_with_canvases():
+    packer = RegionPacker([Region(0, 0, 10, 10)], canvases=2)
+
+    a = packer.pack(frame())
+    b = packer.pack(frame())
+    c = packer.pack(frame())
+
+    assert a.obj is not b.obj
+    assert a.obj is c.obj
+
+
+def test_packer_refuses_frames_drawn_outside_the_regions():
+    packer = RegionPacker([Region(0, 0, 20, 10), Region(100, 100, 10, 30)])
+
+    packer.pack(frame((0, 0, 19, 9), (100, 100, 109, 129)))
+
+    with pytest.raises(OutsideRegions, match=r"\(50, 50, 52, 52\)"):
+        packer.pack(frame((0, 0, 19, 9), (50, 50, 51, 51)))
+
+
+def test_overlay_filter():
+    assert overlay_filter([Region(0, 0, 20, 10), Region(100, 100, 10, 30)]) == \
+           "[1:v]split=2[s0][s1];" \
+           "[s0]crop=20:10:0:0[r0];" \
+           "[s1]crop=10:30:0:10[r1];" \
+           "[0:v][r0]overlay=0:0[o0];" \
+           "[o0][r1]overlay=100:100"
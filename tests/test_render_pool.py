@@ -0,0 +1,132 @@
+import contextlib
+import os
+
+import pytest
+
+from gopro_overlay.render_pool import FrameRenderPool, chunked
+from gopro_overlay.timeunits import timeunits
+
+
+@contextlib.contextmanager
+def drawer():
+    yield lambda dt: (os.getpid(), dt.us)
+
+
+def steps(n):
+    return [timeunits(millis=100 * i) for i in range(n)]
+
+
+def test_chunking():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert chunked([], 2) == []
+
+
+def test_frames_come_back_in_order():
+    pool = FrameRenderPool(workers=3, create_drawer=drawer, chunk_size=4)
+
+    with pool.frames(steps(50)) as frames:
+        drawn = list(frames)
+
+    assert [us for _, us in drawn] == [dt.us for dt in steps(50)]
+
+
+def test_chunks_are_drawn_by_the_same_worker():
+    pool = FrameRenderPool(workers=2, create_drawer=drawer, chunk_size=5)
+
+    with pool.frames(steps(20)) as frames:
+        pids = [pid for pid, _ in frames]
+
+    assert len(set(pids)) == 2
+    for chunk in chunked(pids, 5):
+        assert len(set(chunk)) == 1
+    assert pids[0] != pids[5]
+
+
+def test_single_worker():
+    pool = FrameRenderPool(workers=1, create_drawer=drawer)
+
+    with pool.frames(steps(7)) as frames:
+        assert len(list(frames)) == 7
+
+
+@contextlib.contextmanager
+def failing_drawer():
+    def draw(dt):
+        if dt.millis() >= 500:
+            raise ValueError("broken widget")
+        return dt.us
+
+    yield draw
+
+
+def test_worker_failure_is_reported():
+    pool = FrameRenderPool(workers=2, create_drawer=failing_drawer, chunk_size=2)
+
+    with pytest.raises(IOError, match="broken widget"):
+        with pool.frames(steps(10)) as frames:
+            list(frames)
+
+
+@contextlib.contextmanager
+def counting_drawer():
+    drawn = []
+
+    def draw(dt):
+        drawn.append(dt)
+        return dt.us
+
+    draw.stats = lambda: len(drawn)
+    yield draw
+
+
+def test_stats_are_collected_from_each_worker():
+    pool = FrameRenderPool(workers=3, create_drawer=counting_drawer, chunk_size=4)
+
+    with pool.frames(steps(30)) as frames:
+        assert len(list(frames)) == 30
+
+    assert len(pool.stats) == 3
+    assert sum(pool.stats) == 30
+
+
+def test_needs_a_worker():
+    with pytest.raises(ValueError):
+        FrameRenderPool(workers=0, create_drawer=drawer)
+
+
+@contextlib.contextmanager
+def deduplicating_drawer(value_at):
+    # like dashboard's drawer - None when the value is the same as the last one this worker drew
+    last = [None]
+
+    def draw(dt):
+        value = value_at(dt)
+        if value == last[0]:
+            return None
+        last[0] = value
+        return value
+
+    yield draw
+
+
+def reassembled(frames):
+    last = None
+    for frame in frames:
+        if frame is not None:
+            last = frame
+        yield last
+
+
+def test_pooled_frames_are_the_same_as_serial_when_a_chunk_starts_on_a_repeated_value():
+    # worker 0 draws chunks 0 and 2, which have the same value, but chunk 1, between them, doesn't
+    value_at = lambda dt: "a" if dt.millis() < 1000 or dt.millis() >= 2000 else "b"
+
+    with deduplicating_drawer(value_at) as draw:
+        serial = list(reassembled(draw(dt) for dt in steps(40)))
+
+    pool = FrameRenderPool(workers=2, create_drawer=lambda: deduplicating_drawer(value_at), chunk_size=10)
+    with pool.frames(steps(40)) as frames:
+        pooled = list(reassembled(frames))
+
+    assert serial == [value_at(dt) for dt in steps(40)]
+    assert pooled == serial
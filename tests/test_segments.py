@@ -0,0 +1,97 @@
+import pytest
+
+from gopro_overlay.segments import plan_segments, Segment, render_segments
+from gopro_overlay.timeunits import timeunits
+
+
+def test_segment_times():
+    segment = Segment(index=1, first=25, count=50)
+
+    assert segment.start(10.0) == timeunits(seconds=2.5)
+    assert segment.duration(10.0) == timeunits(seconds=5)
+
+
+def test_plan_even_segments():
+    assert plan_segments(100, 4, 10.0) == [
+        Segment(0, 0, 25),
+        Segment(1, 25, 25),
+        Segment(2, 50, 25),
+        Segment(3, 75, 25),
+    ]
+
+
+def test_plan_covers_all_frames():
+    segments = plan_segments(101, 3, 10.0)
+
+    assert sum(s.count for s in segments) == 101
+    assert [s.first for s in segments] == [0, 34, 67]
+
+
+def test_plan_single_segment():
+    assert plan_segments(10, 1, 10.0) == [Segment(0, 0, 10)]
+
+
+def test_plan_more_segments_than_frames():
+    assert plan_segments(2, 5, 10.0) == [Segment(0, 0, 1), Segment(1, 1, 1)]
+
+
+def test_plan_starts_segments_at_keyframes():
+    segments = plan_segments(100, 4, 10.0, keyframes=[0.0, 1.001, 2.002, 3.003, 4.004, 5.005, 6.006, 7.007, 8.008, 9.009])
+
+    assert [s.first for s in segments] == [0, 21, 51, 71]
+
+
+def test_plan_with_sparse_keyframes_makes_fewer_segments():
+    segments = plan_segments(100, 4, 10.0, keyframes=[0.0, 5.0])
+
+    assert segments == [Segment(0, 0, 50), Segment(1, 50, 50)]
+
+
+def test_plan_needs_a_segment():
+    with pytest.raises(ValueError):
+        plan_segments(10, 0, 10.0)
+
+
+def test_render_segments_in_processes(tmp_path):
+    def render(segment):
+        (tmp_path / f"{segment.index}").write_text(f"{segment.first}")
+
+    done = []
+    segments = plan_segments(30, 3, 10.0)
+
+    results = render_segments(segments, render, done=lambda s: done.append(s.index))
+
+    assert sorted(done) == [0, 1, 2]
+    assert results == {0: None, 1: None, 2: None}
+    assert [(tmp_path / f"{i}").read_text() for i in range(3)] == ["0", "10", "20"]
+
+
+def test_render_segments_returns_what_each_render_returned():
+    results = render_segments(plan_segments(30, 3, 10.0), lambda segment: segment.count * 2)
+
+    assert results == {0: 20, 1: 20, 2: 20}
+
+
+def test_render_segments_failure():
+    def render(segment):
+        if segment.index == 1:
+            raise ValueError("broken segment")
+
+    with pytest.raises(IOError, match="broken segment"):
+        render_segments(plan_segments(30, 3, 10.0), render, poll=0.1)
+
+
+def test_render_segments_limits_concurrency(tmp_path):
+    def render(segment):
+        import os, time
+        marker = tmp_path / "running"
+        marker.mkdir(exist_ok=True)
+        (marker / str(os.getpid())).touch()
+        (tmp_path / f"seen-{segment.index}").write_text(str(len(list(marker.iterdir()))))
+        time.sleep(0.1)
+        (marker / str(os.getpid())).unlink()
+
+    segments = plan_segments(50, 5, 10.0)
+    render_segments(segments, render, concurrency=2, poll=0.05)
+
+    assert all(int((tmp_path / f"seen-{s.index}").read_text()) <= 2 for s in segments)
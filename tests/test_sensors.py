@@ -0,0 +1,77 @@
+import pytest
+
+from gopro_overlay import framemeta
+from gopro_overlay.ffmpeg import MetaMeta
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.gpmd import GoproMeta, XYZ
+from gopro_overlay.gpmd_calculate import timestamp_calculator_for_packet_type
+from gopro_overlay.gpmd_visitors_xyz import ORIN, orin_columns
+from gopro_overlay.sensors import sensor_series
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_framedata import file_path_of_test_asset
+
+metameta = MetaMeta(stream=3, frame_count=88, timebase=1000, frame_duration=1001)
+
+
+@pytest.fixture(scope="module")
+def meta():
+    return GoproMeta.parse(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes())
+
+
+def samples_of(meta, fourcc):
+    return sum(i.repeat for d in meta for s in d.with_type("STRM") for i in s.with_type(fourcc))
+
+
+def test_every_sample_is_kept(meta):
+    found = sensor_series(meta, metameta)
+
+    assert len(found["ACCL"]) == samples_of(meta, "ACCL")
+    assert len(found["GYRO"]) == samples_of(meta, "GYRO")
+    assert found["ACCL"].unit == "m/s^2"
+    assert found["GYRO"].unit == "rad/s"
+    assert list(found["ACCL"].time) == sorted(found["ACCL"].time)
+
+
+def test_series_agrees_with_framemeta_accl(meta):
+    accl = sensor_series(meta, metameta, names=("ACCL",))["ACCL"]
+
+    fm = FrameMeta()
+    meta.accept(framemeta._accl_visitor(fm, units, timestamp_calculator_for_packet_type(meta, metameta, "ACCL")))
+
+    assert len(fm) > 0
+    for t in fm.framelist:
+        expected = fm.get(t, interpolate=False).accl
+        index = accl.index_of(t)
+        assert accl.time[index] == t.us
+        actual = accl.point(index, units)
+        for axis in "xyz":
+            assert getattr(actual, axis).units == getattr(expected, axis).units
+            assert getattr(actual, axis).magnitude == pytest.approx(getattr(expected, axis).magnitude, rel=1e-6)
+
+
+def test_between(meta):
+    gyro = sensor_series(meta, metameta, names=("GYRO",))["GYRO"]
+
+    start, end = timeunits(seconds=1), timeunits(seconds=2)
+    part = gyro.between(start, end)
+
+    assert 0 < len(part) < len(gyro)
+    assert part.unit == gyro.unit
+    assert part.min >= start
+    assert part.max < end
+    assert len(part) == len([t for t in gyro.time if start.us <= t < end.us])
+    assert len(gyro.between(end, start)) == 0
+
+
+def test_orin_columns_agree_with_apply():
+    original = XYZ._make([1, 2, 3])
+    for spec in orin_columns:
+        orin = ORIN(spec)
+        columns = [sign * original[index] for index, sign in orin.columns]
+        assert XYZ._make(columns) == orin.apply(original)
+
+
+def test_unknown_orin():
+    with pytest.raises(IOError):
+        ORIN("ABC")
@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import socketserver
+import stat
+import threading
+
+from gopro_overlay.log import log, fatal
+from gopro_overlay.server import RenderServer, JobChannel, JobProgress, submit
+
+
+def serving(server: RenderServer):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_job_events(tmp_path):
+    def render(args, cwd, timers, create_progress):
+        log(f"rendering {args} in {cwd}")
+        progress = create_progress(10)
+        timers.timer("drawing frames").time(lambda: progress.update(5))
+        progress.finish()
+
+    events = []
+    with RenderServer(tmp_path / "s.sock", render) as server:
+        serving(server)
+        done = submit(tmp_path / "s.sock", ["input", "output"], tmp_path, on_event=events.append)
+
+    assert done == {"event": "done", "job": 1, "ok": True, "failure": None}
+    assert [e["event"] for e in events] == ["accepted", "started", "log", "progress", "progress", "timer", "done"]
+    assert events[2]["message"] == f"rendering ['input', 'output'] in {tmp_path}"
+    assert events[4] == {"event": "progress", "frame": 10, "frames": 10}
+    assert events[5]["name"] == "drawing frames"
+    assert events[5]["count"] == 1
+    assert not (tmp_path / "s.sock").exists()
+
+
+def test_socket_is_private_as_soon_as_it_is_bound(tmp_path, monkeypatch):
+    modes = []
+
+    class Recording(socketserver.ThreadingUnixStreamServer):
+        def server_bind(self):
+            super().server_bind()
+            modes.append(stat.S_IMODE(os.stat(self.server_address).st_mode))
+
+    monkeypatch.setattr(socketserver, "ThreadingUnixStreamServer", Recording)
+
+    umask = os.umask(0o002)
+    try:
+        with RenderServer(tmp_path / "s.sock", lambda *a: None):
+            assert stat.S_IMODE((tmp_path / "s.sock").stat().st_mode) == 0o600
+        assert os.umask(0o002) == 0o002
+    finally:
+        os.umask(umask)
+
+    assert len(modes) == 1
+    assert modes[0] & 0o077 == 0
+
+
+def test_failing_job_doesnt_stop_server(tmp_path):
+    def render(args, cwd, timers, create_progress):
+        if args == ["bad"]:
+            fatal("this one is bad")
+
+    with RenderServer(tmp_path / "s.sock", render) as server:
+        serving(server)
+        failed = submit(tmp_path / "s.sock", ["bad"], tmp_path)
+        worked = submit(tmp_path / "s.sock", ["good"], tmp_path)
+
+    assert not failed["ok"]
+    assert "SystemExit" in failed["failure"]
+    assert worked["ok"]
+
+
+def test_jobs_limited_by_concurrency(tmp_path):
+    running = []
+    most = []
+    lock = threading.Lock()
+
+    def render(args, cwd, timers, create_progress):
+        with lock:
+            running.append(args)
+            most.append(len(running))
+        threading.Event().wait(0.05)
+        with lock:
+            running.remove(args)
+
+    with RenderServer(tmp_path / "s.sock", render, concurrency=2) as server:
+        serving(server)
+        results = []
+        clients = [threading.Thread(target=lambda i=i: results.append(submit(tmp_path / "s.sock", [str(i)], tmp_path)))
+                   for i in range(5)]
+        [c.start() for c in clients]
+        [c.join() for c in clients]
+
+    assert len(results) == 5
+    assert all(r["ok"] for r in results)
+    assert max(most) <= 2
+
+
+def test_bad_request():
+    out = io.BytesIO()
+
+    RenderServer.__new__(RenderServer).handle(io.BytesIO(b"not json\n"), out)
+
+    event = json.loads(out.getvalue())
+    assert event["event"] == "done"
+    assert not event["ok"]
+
+
+def test_progress_is_throttled():
+    out = io.BytesIO()
+    now = [0.0]
+    progress = JobProgress(JobChannel(out), 100, every=1.0, clock=lambda: now[0])
+
+    for i in range(100):
+        now[0] = i * 0.1
+        progress.update(i)
+
+    frames = [json.loads(line)["frame"] for line in out.getvalue().splitlines()]
+    assert frames == [0, 10, 20, 30, 40, 50, 60, 70, 80, 90]
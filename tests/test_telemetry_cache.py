@@ -0,0 +1,212 @@
+import os
+
+import pytest
+
+from gopro_overlay.counter import ReasonCounter
+from gopro_overlay.entry import Entry
+from gopro_overlay.ffmpeg import find_metameta
+from gopro_overlay import framemeta
+from gopro_overlay.framemeta import framemeta_from, FrameMeta, parse_gopro
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
+from gopro_overlay.gpmd import GoproMeta
+from gopro_overlay.gpmd_visitors_gps import GPSReportingFilter, GPSLockTracker, GPSDOPFilter, WorstOfGPSLockFilter, \
+    GPSLockFilter, GPSLockComponents, GPSFix
+from gopro_overlay.framemeta_columns import encode, Unsupported
+from gopro_overlay.sensors import SensorSeries, sensor_series
+from gopro_overlay.telemetry_cache import TelemetryCache
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_framedata import file_path_of_test_asset
+from tests.test_mp4 import movie, packets
+from tests.test_timeseries import datetime_of
+
+
+@pytest.fixture(scope="module")
+def gopro_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("footage") / "GH010001.MP4"
+    path.write_bytes(movie(packets(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes())))
+    return path
+
+
+@pytest.fixture(scope="module")
+def locked_gopro_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("footage") / "GH010002.MP4"
+    path.write_bytes(movie(packets(file_path_of_test_asset("hero5.raw").read_bytes() * 20)))
+    return path
+
+
+def described(fm: FrameMeta):
+    fm.check_modified()
+    return [(t.us, e.dt, sorted((k, str(v)) for k, v in e.items.items())) for t, e in
+            ((t, fm.get(t, interpolate=False)) for t in fm.framelist)]
+
+
+def some_filter(counter: ReasonCounter):
+    return WorstOfGPSLockFilter(
+        GPSReportingFilter(GPSLockTracker(), rejected=counter.inc("Heuristics")),
+        GPSReportingFilter(GPSDOPFilter(5), rejected=counter.inc("DOP")),
+    )
+
+
+class RecordingFilter(GPSLockFilter):
+    """remembers everything the filter it wraps is given, in order"""
+
+    def __init__(self, delegate: GPSLockFilter):
+        self.delegate = delegate
+        self.submitted = []
+
+    def submit(self, components: GPSLockComponents) -> GPSFix:
+        self.submitted.append((components.fix, components.point.lat, components.point.lon, components.speed,
+                               components.dop))
+        return self.delegate.submit(components)
+
+
+def test_telemetry_is_parsed_a_packet_at_a_time(gopro_file, monkeypatch):
+    metameta = find_metameta(gopro_file)
+    expected = described(parse_gopro(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes(), units, metameta))
+
+    def whole_track(filepath):
+        raise AssertionError("Read the whole track")
+
+    monkeypatch.setattr(framemeta, "load_gpmd_from", whole_track)
+
+    assert described(framemeta_from(gopro_file, units, metameta)) == expected
+    assert described(framemeta_from(gopro_file, units, metameta, processes=4)) == expected
+
+
+def test_parsed_telemetry_is_the_same_from_the_cache(gopro_file, tmp_path):
+    metameta = find_metameta(gopro_file)
+    expected = described(framemeta_from(gopro_file, units, metameta))
+
+    cache = TelemetryCache(tmp_path)
+    assert cache.load(gopro_file, units, metameta) is None
+
+    assert described(framemeta_from(gopro_file, units, metameta, cache=cache)) == expected
+
+    cached, lock_log = cache.load(gopro_file, units, metameta)
+    assert described(cached) == expected
+    assert len(lock_log) > 0
+    assert described(framemeta_from(gopro_file, units, metameta, cache=cache)) == expected
+
+
+def test_lock_filter_is_applied_to_cached_telemetry(locked_gopro_file, tmp_path):
+    metameta = find_metameta(locked_gopro_file)
+
+    counter = ReasonCounter()
+    expected = described(framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=some_filter(counter)))
+    assert counter.total() > 0
+
+    cache = TelemetryCache(tmp_path)
+    for _ in range(2):
+        cached_counter = ReasonCounter()
+        fm = framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=some_filter(cached_counter), cache=cache)
+        assert described(fm) == expected
+        assert dict(cached_counter.items()) == dict(counter.items())
+
+
+def test_lock_filter_sees_every_sample_in_order_from_the_cache(locked_gopro_file, tmp_path):
+    metameta = find_metameta(locked_gopro_file)
+
+    live = RecordingFilter(some_filter(ReasonCounter()))
+    framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=live)
+
+    cache = TelemetryCache(tmp_path)
+    for _ in range(2):
+        cached = RecordingFilter(some_filter(ReasonCounter()))
+        framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=cached, cache=cache)
+        assert cached.submitted == live.submitted
+
+
+def test_columnar_telemetry_is_made_from_the_cache(locked_gopro_file, tmp_path):
+    metameta = find_metameta(locked_gopro_file)
+
+    counter = ReasonCounter()
+    expected = described(framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=some_filter(counter)))
+
+    cache = TelemetryCache(tmp_path)
+    for _ in range(2):
+        cached_counter = ReasonCounter()
+        fm = framemeta_from(locked_gopro_file, units, metameta, gps_lock_filter=some_filter(cached_counter),
+                            cache=cache, columnar=True)
+        assert isinstance(fm, ColumnarFrameMeta)
+        assert described(fm) == expected
+        assert dict(cached_counter.items()) == dict(counter.items())
+
+
+def series_of(*names):
+    return {name: SensorSeries(name) for name in names}
+
+
+def described_series(series: SensorSeries):
+    return series.unit, list(series.time), list(series.x), list(series.y), list(series.z)
+
+
+def test_sensors_are_found_with_the_telemetry_and_kept_in_the_cache(gopro_file, tmp_path):
+    metameta = find_metameta(gopro_file)
+    meta = GoproMeta.parse(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes())
+    expected = {name: described_series(s) for name, s in sensor_series(meta, metameta).items()}
+
+    sensors = series_of("ACCL", "GYRO")
+    framemeta_from(gopro_file, units, metameta, sensors=sensors)
+    assert {name: described_series(s) for name, s in sensors.items()} == expected
+
+    cache = TelemetryCache(tmp_path)
+    for _ in range(2):
+        sensors = series_of("ACCL", "GYRO")
+        framemeta_from(gopro_file, units, metameta, cache=cache, sensors=sensors)
+        assert {name: described_series(s) for name, s in sensors.items()} == expected
+
+
+def test_cache_without_the_sensors_asked_for_is_not_used(gopro_file, tmp_path):
+    metameta = find_metameta(gopro_file)
+    cache = TelemetryCache(tmp_path)
+
+    framemeta_from(gopro_file, units, metameta, cache=cache, sensors=series_of("ACCL"))
+    assert cache.load(gopro_file, units, metameta) is not None
+    assert cache.load(gopro_file, units, metameta, sensors=series_of("ACCL")) is not None
+    assert cache.load(gopro_file, units, metameta, sensors=series_of("ACCL", "GYRO")) is None
+
+    sensors = series_of("GYRO")
+    framemeta_from(gopro_file, units, metameta, cache=cache, sensors=sensors)
+    assert len(sensors["GYRO"]) > 0
+
+
+def test_cache_is_not_used_for_a_changed_file(gopro_file, tmp_path):
+    metameta = find_metameta(gopro_file)
+    cache = TelemetryCache(tmp_path)
+    framemeta_from(gopro_file, units, metameta, cache=cache)
+
+    st = os.stat(gopro_file)
+    os.utime(gopro_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    try:
+        assert cache.load(gopro_file, units, metameta) is None
+    finally:
+        os.utime(gopro_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert cache.load(gopro_file, units, metameta) is not None
+
+
+def test_corrupt_cache_is_ignored(gopro_file, tmp_path):
+    metameta = find_metameta(gopro_file)
+    cache = TelemetryCache(tmp_path)
+    expected = described(framemeta_from(gopro_file, units, metameta, cache=cache))
+
+    [cached] = (tmp_path / "telemetry").iterdir()
+    cached.write_bytes(cached.read_bytes()[:-10])
+    assert cache.load(gopro_file, units, metameta) is None
+
+    assert described(framemeta_from(gopro_file, units, metameta, cache=cache)) == expected
+    assert cache.load(gopro_file, units, metameta) is not None
+
+
+def test_items_that_cant_be_stored():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), name="not a number"))
+    with pytest.raises(Unsupported):
+        encode(fm)
+
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), alt=units.Quantity(1.0, units.m)))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(1), alt=units.Quantity(1.0, units.feet)))
+    with pytest.raises(Unsupported):
+        encode(fm)
@@ -1,4 +1,4 @@
-from gopro_overlay.timing import PoorTimer
+from gopro_overlay.timing import PoorTimer, Timers
 
 
 def test_timer_times_something():
@@ -19,3 +19,28 @@ def test_timer_works_even_if_its_not_called():
     assert timer.name == "other name"
     assert timer.avg == 0.0
     assert len(str(timer))
+
+
+def test_timer_times_items_from_iterable():
+    timer = PoorTimer("iterable")
+
+    assert list(timer.timed(iter([1, 2, 3]))) == [1, 2, 3]
+    assert timer.count == 3
+
+
+def test_timers_add_up_timers_with_the_same_name():
+    first = Timers()
+    first.timer("drawing").time(lambda: 1 * 2)
+    first.timer("drawing").time(lambda: 1 * 2)
+
+    second = Timers()
+    second.timer("drawing").time(lambda: 1 * 2)
+    second.timer("encoding").time(lambda: 1 * 2)
+
+    total = Timers()
+    total.merge(first)
+    total.merge(second)
+
+    assert [t.name for t in total] == ["drawing", "encoding"]
+    assert total.timer("drawing").count == 3
+    assert total.timer("drawing").total == first.timer("drawing").total + second.timer("drawing").total
@@ -0,0 +1,153 @@
+from PIL import Image, ImageDraw, ImageChops
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.point import Coordinate
+from gopro_overlay.widgets.widgets import Scene, Composite, Translate, Drawable, Widget, Frame, flatten, EmptyDrawable
+
+dimensions = Dimension(64, 48)
+
+
+def square(colour, size=16):
+    return Image.new("RGBA", (size, size), colour)
+
+
+class CountingWidget(Widget):
+
+    def __init__(self, widget: Widget, static=False):
+        self.widget = widget
+        self.static = static
+        self.count = 0
+
+    def draw(self, image, draw):
+        self.count += 1
+        self.widget.draw(image, draw)
+
+
+class MovingSquare(Widget):
+
+    def __init__(self):
+        self.x = 0
+
+    def draw(self, image, draw):
+        image.alpha_composite(square((0, 0, 255, 200)), (self.x, 10))
+        self.x += 3
+
+
+def unlayered(widgets):
+    image = Image.new("RGBA", dimensions.tuple(), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for w in widgets:
+        w.draw(image, draw)
+    return image
+
+
+def assert_same_image(a, b):
+    assert ImageChops.difference(a, b).getbbox() is None
+
+
+def test_static_classification():
+    assert Drawable(Coordinate(0, 0), square((255, 0, 0, 255))).static
+    assert EmptyDrawable().static
+    assert not MovingSquare().static
+    assert Composite(EmptyDrawable(), Translate(Coordinate(1, 1), EmptyDrawable())).static
+    assert not Composite(EmptyDrawable(), MovingSquare()).static
+    assert not Translate(Coordinate(1, 1), MovingSquare()).static
+    assert Frame(dimensions=Dimension(10, 10), child=EmptyDrawable()).static
+    assert not Frame(dimensions=Dimension(10, 10), child=MovingSquare()).static
+
+
+def test_flatten_pushes_translation_into_children():
+    a = EmptyDrawable()
+    b = EmptyDrawable()
+
+    flattened = flatten(Translate(Coordinate(5, 6), Composite(a, Composite(b))))
+
+    assert [f.widget for f in flattened] == [a, b]
+    assert [f.at for f in flattened] == [Coordinate(5, 6), Coordinate(5, 6)]
+
+
+def test_static_widgets_only_drawn_once():
+    static = CountingWidget(Drawable(Coordinate(0, 0), square((255, 0, 0, 255))), static=True)
+    dynamic = CountingWidget(MovingSquare())
+
+    scene = Scene(dimensions, [Composite(static, dynamic)])
+
+    for _ in range(5):
+        scene.draw()
+
+    assert static.count == 1
+    assert dynamic.count == 5
+
+
+def test_layered_scene_draws_same_as_unlayered():
+    def widgets():
+        return [
+            Translate(
+                Coordinate(2, 2),
+                Composite(
+                    Drawable(Coordinate(0, 0), square((255, 0, 0, 128))),
+                    MovingSquare(),
+                    Drawable(Coordinate(8, 8), square((0, 255, 0, 100))),
+                    Drawable(Coordinate(12, 4), square((255, 255, 0, 255))),
+                )
+            ),
+            Drawable(Coordinate(40, 30), square((255, 255, 255, 50))),
+        ]
+
+    scene = Scene(dimensions, widgets())
+    expected = widgets()
+
+    for _ in range(4):
+        assert_same_image(scene.draw(), unlayered(expected))
+
+
+def test_scene_with_only_static_widgets():
+    scene = Scene(dimensions, [Drawable(Coordinate(4, 4), square((255, 0, 0, 255)))])
+
+    first = scene.draw().copy()
+    second = scene.draw()
+
+    assert_same_image(first, second)
+    assert first.getpixel((5, 5)) == (255, 0, 0, 255)
+
+
+def test_scene_reuses_its_canvas():
+    scene = Scene(dimensions, [CountingWidget(MovingSquare())])
+
+    first = scene.draw()
+    second = scene.draw()
+
+    assert first is second
+    assert scene.buffer().obj is scene.buffer().obj
+
+
+def test_scene_takes_turns_with_canvases():
+    scene = Scene(dimensions, [MovingSquare()], canvases=3)
+
+    images = [scene.draw() for _ in range(4)]
+    buffer = scene.buffer()
+
+    assert images[0] is images[3]
+    assert len({id(i) for i in images[0:3]}) == 3
+    assert buffer.tobytes() == images[3].tobytes()
+
+
+def test_scene_buffer_is_the_image_bytes():
+    widget = MovingSquare()
+    expected = MovingSquare()
+    scene = Scene(dimensions, [widget, Drawable(Coordinate(4, 4), square((255, 0, 0, 100)))])
+
+    for _ in range(3):
+        image = scene.draw()
+        assert scene.buffer().tobytes() == image.tobytes()
+        assert scene.buffer().tobytes() == unlayered([expected, Drawable(Coordinate(4, 4), square((255, 0, 0, 100)))]).tobytes()
+
+
+def test_canvas_is_cleared_between_frames():
+    scene = Scene(dimensions, [MovingSquare()])
+
+    scene.draw()
+    image = scene.draw()
+
+    assert image.getpixel((1, 12)) == (0, 0, 0, 0)
+    assert image.getpixel((4, 12)) == (0, 0, 255, 200)